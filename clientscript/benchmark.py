@@ -0,0 +1,515 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+性能基准测试脚本
+
+用法:
+    python benchmark.py parse [--files N] [--protocols N] [--fields N] [--repeat N]
+    python benchmark.py scan [--files N] [--workers N]
+    python benchmark.py stream [--protocols N] [--fields N]
+    python benchmark.py memory [--files N] [--protocols N] [--fields N]
+    python benchmark.py codec [--messages N] [--fields N]
+    python benchmark.py forlist [--messages N] [--elements N]
+    python benchmark.py view [--messages N] [--fields N]
+"""
+import argparse
+import gc
+import os
+import re
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path:
+    sys.path.insert(0, script_dir)
+
+from dataclasses import dataclass, field
+from typing import List
+
+from dnet_parser import DnetParser, Field, Protocol, FORLIST_TYPE, iter_events
+from dnet_codec import ProtocolCodec, view_class
+
+
+# ==================== 合成语料 ====================
+
+def generate_dnet_text(file_index: int, protocols: int, fields: int) -> str:
+    """生成一个合成的.dnet文件内容（包含头部、两个段落、forlist和注释）"""
+    lines = [
+        "VERSION:1.0.0",
+        f"DESC:合成协议{file_index}",
+        f"CMODULE:netfile.netbench{file_index}",
+        f"SMODULE:netbench{file_index}",
+        "",
+        f"GS2C:0x{file_index % 256:x}:0x1:",
+    ]
+    for p in range(1, protocols + 1):
+        lines.append(f"\t{p}:S2CBench{file_index}_{p}:合成S2C协议{p}")
+        for i in range(fields):
+            lines.append(f"\t\tiField{i},4,字段{i}")
+        lines.append("\t\tsName,2ps,名称")
+        if p % 4 == 0:
+            lines.append("\t\tforlist itemList:")
+            lines.append("\t\t\tiItemID,2,物品ID")
+            lines.append("\t\t\tiAmount,4,数量")
+    lines.append("")
+    lines.append("# C2S协议")
+    lines.append(f"C2GS:0x{file_index % 256:x}:")
+    for p in range(1, protocols + 1):
+        lines.append(f"\t{p}:C2SBench{file_index}_{p}:合成C2S协议{p}")
+        for i in range(fields):
+            lines.append(f"\t\tiArg{i},4,参数{i}")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def generate_corpus(root: str, files: int, protocols: int, fields: int) -> int:
+    """在root下生成合成语料，返回总行数"""
+    total_lines = 0
+    for i in range(files):
+        sub_dir = os.path.join(root, f"group{i % 16}")
+        os.makedirs(sub_dir, exist_ok=True)
+        text = generate_dnet_text(i, protocols, fields)
+        total_lines += text.count("\n") + 1
+        with open(os.path.join(sub_dir, f"netbench{i}.dnet"), 'w', encoding='utf-8') as f:
+            f.write(text)
+    return total_lines
+
+
+# ==================== 旧版解析实现（仅用于基准对比） ====================
+
+@dataclass
+class LegacyField:
+    """旧版字段（普通数据类，每个实例带__dict__）"""
+    name: str
+    type_info: str
+    description: str
+
+
+@dataclass
+class LegacyProtocol:
+    name: str
+    description: str
+    fields: List[LegacyField] = field(default_factory=list)
+
+
+@dataclass
+class LegacyDnetFile:
+    file_path: str
+    file_name: str
+    relative_path: str
+    description: str
+    c2s_module: str
+    s2c_module: str
+    version: str = ""
+    c2s_list: List[LegacyProtocol] = field(default_factory=list)
+    s2c_list: List[LegacyProtocol] = field(default_factory=list)
+
+
+def legacy_parse_file(file_path: str, proto_root: str = ""):
+    """旧版逐行startswith + re.match解析实现"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    file_name = os.path.basename(file_path)
+    relative_path = os.path.relpath(file_path, proto_root) if proto_root else file_name
+    dnet = LegacyDnetFile(file_path=file_path, file_name=file_name, relative_path=relative_path,
+                          description="", c2s_module="", s2c_module="")
+
+    current_section = None
+    current_protocol = None
+    in_forlist = False
+
+    for line in content.split('\n'):
+        line_stripped = line.strip()
+        if not line_stripped or line_stripped.startswith('#'):
+            continue
+        if line_stripped.startswith('VERSION'):
+            match = re.match(r'VERSION[：:]\s*(.+)', line_stripped)
+            if match:
+                dnet.version = match.group(1).strip()
+            continue
+        if line_stripped.startswith('DESC'):
+            match = re.match(r'DESC[：:]\s*(.+)', line_stripped)
+            if match:
+                dnet.description = match.group(1).strip()
+            continue
+        if line_stripped.startswith('CMODULE'):
+            match = re.match(r'CMODULE[：:]\s*(.+)', line_stripped)
+            if match:
+                dnet.c2s_module = match.group(1).strip()
+            continue
+        if line_stripped.startswith('SMODULE'):
+            match = re.match(r'SMODULE[：:]\s*(.+)', line_stripped)
+            if match:
+                dnet.s2c_module = match.group(1).strip()
+            continue
+        if line_stripped.startswith('GS2C:'):
+            current_section = 'S2C'
+            current_protocol = None
+            in_forlist = False
+            continue
+        if line_stripped.startswith('C2GS:'):
+            current_section = 'C2S'
+            current_protocol = None
+            in_forlist = False
+            continue
+        if line_stripped.startswith('forlist '):
+            in_forlist = True
+            continue
+        if in_forlist and line.startswith('\t\t\t'):
+            continue
+        else:
+            in_forlist = False
+        protocol_match = re.match(r'^(\d+):([A-Za-z0-9_]+):(.+)$', line_stripped)
+        if protocol_match and current_section:
+            current_protocol = LegacyProtocol(name=protocol_match.group(2),
+                                              description=protocol_match.group(3))
+            if current_section == 'C2S':
+                dnet.c2s_list.append(current_protocol)
+            else:
+                dnet.s2c_list.append(current_protocol)
+            continue
+        field_match = re.match(r'^([a-zA-Z_][a-zA-Z0-9_]*),([^,]+),(.+)$', line_stripped)
+        if field_match and current_protocol:
+            current_protocol.fields.append(LegacyField(name=field_match.group(1),
+                                                       type_info=field_match.group(2),
+                                                       description=field_match.group(3)))
+    return dnet
+
+
+# ==================== 基准测试 ====================
+
+def summarize(dnet) -> tuple:
+    """
+    将解析结果转换为与具体类无关的元组，用于比较新旧实现的结果
+    旧版实现跳过forlist，比较时忽略forlist字段
+    """
+    def protocols(items):
+        return tuple((p.name, p.description,
+                      tuple((f.name, f.type_info, f.description) for f in p.fields
+                            if getattr(f, 'children', None) is None))
+                     for p in items)
+    return (dnet.relative_path, dnet.version, dnet.description, dnet.c2s_module,
+            dnet.s2c_module, protocols(dnet.c2s_list), protocols(dnet.s2c_list))
+
+
+def _time_parse(parse, paths, root, repeat):
+    """多次运行取最短耗时，返回(耗时秒, 解析结果)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = [parse(p, root) for p in paths]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_parse(args):
+    """对比新旧解析实现的行吞吐量"""
+    root = tempfile.mkdtemp(prefix="dnet_bench_")
+    try:
+        total_lines = generate_corpus(root, args.files, args.protocols, args.fields)
+        paths = sorted(DnetParser().collect_files(root))
+        print(f"合成语料: {len(paths)} 个文件, {total_lines} 行")
+
+        parser = DnetParser()
+        legacy_time, legacy_result = _time_parse(legacy_parse_file, paths, root, args.repeat)
+        new_time, new_result = _time_parse(parser.parse_file, paths, root, args.repeat)
+
+        if [summarize(d) for d in legacy_result] != [summarize(d) for d in new_result]:
+            print("错误: 新旧实现解析结果不一致")
+            return 1
+
+        print(f"旧版实现: {legacy_time:.3f}s, {total_lines / legacy_time:,.0f} 行/秒")
+        print(f"新版实现: {new_time:.3f}s, {total_lines / new_time:,.0f} 行/秒")
+        print(f"加速比: {legacy_time / new_time:.2f}x")
+        return 0
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_scan(args):
+    """对比串行与进程池并行扫描目录的耗时"""
+    root = tempfile.mkdtemp(prefix="dnet_bench_")
+    try:
+        generate_corpus(root, args.files, args.protocols, args.fields)
+        parser = DnetParser()
+
+        start = time.perf_counter()
+        serial = parser.scan_directory(root)
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parallel = parser.scan_directory(root, parallel=True, max_workers=args.workers)
+        parallel_time = time.perf_counter() - start
+
+        if serial != parallel:
+            print("错误: 串行与并行扫描结果不一致")
+            return 1
+
+        print(f"合成语料: {len(serial)} 个文件")
+        print(f"串行扫描: {serial_time:.3f}s")
+        print(f"并行扫描: {parallel_time:.3f}s (workers={args.workers or os.cpu_count()})")
+        print(f"加速比: {serial_time / parallel_time:.2f}x")
+        return 0
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def _measure_peak(func):
+    """返回(耗时秒, tracemalloc峰值字节, 返回值)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def bench_stream(args):
+    """对比流式事件API与完整解析处理单个超大文件的内存峰值"""
+    root = tempfile.mkdtemp(prefix="dnet_bench_")
+    try:
+        file_path = os.path.join(root, "huge.dnet")
+        text = generate_dnet_text(0, args.protocols, args.fields)
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        total_lines = text.count("\n") + 1
+        del text
+        print(f"合成文件: {total_lines} 行, {os.path.getsize(file_path) / 1024 / 1024:.1f}MB")
+
+        stream_time, stream_peak, events = _measure_peak(
+            lambda: sum(1 for _ in iter_events(file_path)))
+        parse_time, parse_peak, _ = _measure_peak(
+            lambda: DnetParser().parse_file(file_path, root))
+
+        print(f"流式事件: {events} 个事件, {stream_time:.3f}s, 内存峰值 {stream_peak / 1024:.0f}KB")
+        print(f"完整解析: {parse_time:.3f}s, 内存峰值 {parse_peak / 1024:.0f}KB")
+        return 0
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def _retained_bytes(build):
+    """返回build()结果常驻内存的字节数（tracemalloc统计）"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, result
+
+
+def bench_memory(args):
+    """对比旧版数据类与__slots__+字符串驻留的目录内存占用"""
+    root = tempfile.mkdtemp(prefix="dnet_bench_")
+    try:
+        generate_corpus(root, args.files, args.protocols, args.fields)
+        paths = sorted(DnetParser().collect_files(root))
+        parser = DnetParser()
+
+        legacy_bytes, legacy = _retained_bytes(lambda: [legacy_parse_file(p, root) for p in paths])
+        field_count = sum(len(p.fields) for d in legacy for p in d.c2s_list + d.s2c_list)
+        del legacy
+        new_bytes, _ = _retained_bytes(lambda: [parser.parse_file(p, root) for p in paths])
+
+        print(f"合成语料: {len(paths)} 个文件, {field_count} 个字段")
+        print(f"旧版数据类: {legacy_bytes / 1024 / 1024:.1f}MB")
+        print(f"紧凑模型:   {new_bytes / 1024 / 1024:.1f}MB")
+        print(f"节省: {(1 - new_bytes / legacy_bytes) * 100:.1f}%")
+        return 0
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+# ==================== 编解码 ====================
+
+_NAIVE_INT_FORMATS = {'1': '<b', '2': '<h', '4': '<i', '8': '<q'}
+
+
+def naive_decode(protocol: Protocol, data: bytes) -> dict:
+    """逐字段解释类型描述的解码实现（仅用于基准对比）"""
+    out = {}
+    offset = 0
+    for f in protocol.fields:
+        type_info = f.type_info
+        if type_info in _NAIVE_INT_FORMATS:
+            fmt = _NAIVE_INT_FORMATS[type_info]
+            out[f.name] = struct.unpack_from(fmt, data, offset)[0]
+            offset += struct.calcsize(fmt)
+        else:
+            length = struct.unpack_from('<H', data, offset)[0]
+            offset += 2
+            raw = data[offset:offset + length]
+            offset += length
+            out[f.name] = raw.decode('utf-8') if type_info.endswith('s') else raw
+    return out
+
+
+def generate_codec_protocol(fields: int) -> Protocol:
+    """生成一个混合宽度整数与字符串字段的协议"""
+    widths = ('4', '2', '8', '1')
+    protocol_fields = [Field(f"iField{i}", widths[i % len(widths)], f"字段{i}") for i in range(fields)]
+    protocol_fields.insert(fields // 2, Field("sName", "2ps", "名称"))
+    return Protocol("S2CBenchCodec", "合成编解码协议", protocol_fields)
+
+
+def _time_messages(func, items, repeat=3):
+    """多次运行取最短耗时，返回(耗时秒, 最后一次的结果列表)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = [func(item) for item in items]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _codec_messages(protocol: Protocol, count: int) -> List[dict]:
+    """生成count条合成消息（整数字段取值在类型范围内）"""
+    bounds = {'1': 100, '2': 30000, '4': 2000000000, '8': 1 << 40}
+    messages = []
+    for n in range(count):
+        values = {f.name: (n * 7919 + i) % bounds[f.type_info]
+                  for i, f in enumerate(protocol.fields) if f.type_info in bounds}
+        values["sName"] = f"英雄{n}"
+        messages.append(values)
+    return messages
+
+
+def bench_codec(args):
+    """编译后的编解码器与逐字段解释实现的消息吞吐量对比"""
+    protocol = generate_codec_protocol(args.fields)
+    codec = ProtocolCodec(protocol)
+    messages = _codec_messages(protocol, args.messages)
+
+    encode_time, packets = _time_messages(codec.encode, messages)
+    decode_time, decoded = _time_messages(codec.decode, packets)
+    naive_time, naive = _time_messages(lambda data: naive_decode(protocol, data), packets)
+
+    if decoded != messages or naive != messages:
+        print("错误: 编解码结果不一致")
+        return 1
+
+    count = len(messages)
+    avg_size = sum(len(p) for p in packets) / count
+    print(f"合成消息: {count} 条, {len(protocol.fields)} 个字段, 平均 {avg_size:.0f} 字节")
+    print(f"编码:       {encode_time:.3f}s, {count / encode_time:,.0f} 条/秒")
+    print(f"编译解码:   {decode_time:.3f}s, {count / decode_time:,.0f} 条/秒")
+    print(f"逐字段解码: {naive_time:.3f}s, {count / naive_time:,.0f} 条/秒")
+    print(f"解码加速比: {naive_time / decode_time:.2f}x")
+    return 0
+
+
+def bench_view(args):
+    """按单个字段过滤消息：懒解码视图与完整解码的吞吐量对比"""
+    protocol = generate_codec_protocol(args.fields)
+    codec = ProtocolCodec(protocol)
+    view = view_class(protocol)
+    packets = [codec.encode(values) for values in _codec_messages(protocol, args.messages)]
+    count = len(packets)
+    print(f"合成消息: {count} 条, {len(protocol.fields)} 个字段")
+
+    # 分别过滤字符串之前（偏移编译时确定）和之后（需先跳过字符串）的字段
+    last_name = protocol.fields[-1].name
+    for name in ("iField0", last_name):
+        target = codec.decode(packets[0])[name]
+        decode_time, decoded = _time_messages(lambda p: codec.decode(p)[name] == target, packets)
+        view_time, viewed = _time_messages(lambda p: getattr(view(p), name) == target, packets)
+        if decoded != viewed:
+            print("错误: 视图与完整解码的过滤结果不一致")
+            return 1
+        print(f"按 {name} 过滤:")
+        print(f"  完整解码: {decode_time:.3f}s, {count / decode_time:,.0f} 条/秒")
+        print(f"  懒解码视图: {view_time:.3f}s, {count / view_time:,.0f} 条/秒")
+        print(f"  加速比: {decode_time / view_time:.2f}x")
+    return 0
+
+
+def bench_forlist(args):
+    """大型定长forlist：逐元素字典解码与批量array解码的吞吐量对比"""
+    protocol = Protocol("S2CBenchList", "合成列表协议", [
+        Field("iHeroID", "4", "英雄ID"),
+        Field("characterList", FORLIST_TYPE, "个性列表", [Field("iCharID", "2", "个性ID")]),
+    ])
+    codec = ProtocolCodec(protocol)
+    bulk_codec = ProtocolCodec(protocol, bulk_lists=True)
+    packets = [codec.encode({"iHeroID": n,
+                             "characterList": [{"iCharID": (n + i) % 30000} for i in range(args.elements)]})
+               for n in range(args.messages)]
+
+    dict_time, decoded = _time_messages(codec.decode, packets)
+    bulk_time, bulk_decoded = _time_messages(bulk_codec.decode, packets)
+
+    for values, bulk_values in zip(decoded, bulk_decoded):
+        if [item["iCharID"] for item in values["characterList"]] != list(bulk_values["characterList"]):
+            print("错误: 批量解码结果不一致")
+            return 1
+
+    count = len(packets)
+    print(f"合成消息: {count} 条, 每条 {args.elements} 个元素")
+    print(f"字典列表解码: {dict_time:.3f}s, {count / dict_time:,.0f} 条/秒")
+    print(f"批量array解码: {bulk_time:.3f}s, {count / bulk_time:,.0f} 条/秒")
+    print(f"加速比: {dict_time / bulk_time:.2f}x")
+    return 0
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="协议配置工具性能基准测试")
+    sub = arg_parser.add_subparsers(dest="command")
+    sub.required = True
+
+    parse_cmd = sub.add_parser("parse", help="对比.dnet解析吞吐量（行/秒）")
+    parse_cmd.add_argument("--files", type=int, default=2000, help="合成文件数")
+    parse_cmd.add_argument("--protocols", type=int, default=20, help="每个段落的协议数")
+    parse_cmd.add_argument("--fields", type=int, default=6, help="每个协议的字段数")
+    parse_cmd.add_argument("--repeat", type=int, default=3, help="重复次数（取最优）")
+    parse_cmd.set_defaults(func=bench_parse)
+
+    scan_cmd = sub.add_parser("scan", help="对比串行/并行扫描目录耗时")
+    scan_cmd.add_argument("--files", type=int, default=2000, help="合成文件数")
+    scan_cmd.add_argument("--protocols", type=int, default=20, help="每个段落的协议数")
+    scan_cmd.add_argument("--fields", type=int, default=6, help="每个协议的字段数")
+    scan_cmd.add_argument("--workers", type=int, default=None, help="进程数（默认CPU核数）")
+    scan_cmd.set_defaults(func=bench_scan)
+
+    stream_cmd = sub.add_parser("stream", help="对比流式事件与完整解析的内存峰值")
+    stream_cmd.add_argument("--protocols", type=int, default=20000, help="每个段落的协议数")
+    stream_cmd.add_argument("--fields", type=int, default=6, help="每个协议的字段数")
+    stream_cmd.set_defaults(func=bench_stream)
+
+    memory_cmd = sub.add_parser("memory", help="对比目录对象模型的内存占用（tracemalloc）")
+    memory_cmd.add_argument("--files", type=int, default=2000, help="合成文件数")
+    memory_cmd.add_argument("--protocols", type=int, default=20, help="每个段落的协议数")
+    memory_cmd.add_argument("--fields", type=int, default=6, help="每个协议的字段数")
+    memory_cmd.set_defaults(func=bench_memory)
+
+    codec_cmd = sub.add_parser("codec", help="对比编解码吞吐量（条/秒）")
+    codec_cmd.add_argument("--messages", type=int, default=100000, help="消息条数")
+    codec_cmd.add_argument("--fields", type=int, default=12, help="每条消息的整数字段数")
+    codec_cmd.set_defaults(func=bench_codec)
+
+    forlist_cmd = sub.add_parser("forlist", help="对比大型forlist的逐元素/批量解码吞吐量")
+    forlist_cmd.add_argument("--messages", type=int, default=1000, help="消息条数")
+    forlist_cmd.add_argument("--elements", type=int, default=5000, help="每条消息的列表元素数")
+    forlist_cmd.set_defaults(func=bench_forlist)
+
+    view_cmd = sub.add_parser("view", help="对比按单个字段过滤时懒解码视图与完整解码的吞吐量")
+    view_cmd.add_argument("--messages", type=int, default=100000, help="消息条数")
+    view_cmd.add_argument("--fields", type=int, default=12, help="每条消息的整数字段数")
+    view_cmd.set_defaults(func=bench_view)
+
+    args = arg_parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+协议目录索引模块
+"""
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from dnet_parser import DnetFile, Protocol, ScanDelta
+
+
+class ProtocolRef(NamedTuple):
+    """协议在目录中的位置"""
+    dnet: DnetFile
+    protocol: Protocol
+    direction: str  # 'C2S' 或 'S2C'
+
+
+class CatalogIndex:
+    """
+    协议目录索引：每次扫描构建一次，提供O(1)查找
+    - 协议名称 -> [ProtocolRef]（同名协议按相对路径排序，与遍历dnet_files的顺序一致）
+    - 相对路径 -> DnetFile
+    - CMODULE/SMODULE -> [DnetFile]
+    """
+
+    def __init__(self, dnet_files: Iterable[DnetFile] = ()):
+        self._files: Dict[str, DnetFile] = {}
+        self._protocols: Dict[str, List[ProtocolRef]] = {}
+        self._modules: Dict[str, List[DnetFile]] = {}
+        self.rebuild(dnet_files)
+
+    def rebuild(self, dnet_files: Iterable[DnetFile]):
+        """根据文件列表重建索引"""
+        self._files = {}
+        self._protocols = {}
+        self._modules = {}
+        # 按相对路径顺序追加，各列表天然有序，无需逐个排序
+        for dnet in sorted(dnet_files, key=lambda d: d.relative_path):
+            self._index_file(dnet)
+
+    def extend(self, dnet_files: Iterable[DnetFile]):
+        """
+        追加一批文件（后台加载时按相对路径顺序分批追加）
+        要求这些文件都排在已索引的文件之后，各列表直接追加即保持有序，代价与本批文件数成正比
+        """
+        for dnet in dnet_files:
+            self._index_file(dnet)
+
+    def add_file(self, dnet: DnetFile):
+        """添加（或替换）单个文件"""
+        self.remove_file(dnet.relative_path)
+        self._index_file(dnet)
+
+        # 增量添加的文件可能不在末尾，恢复受影响列表的顺序（同名协议很少，排序代价可忽略）
+        for protocol in dnet.c2s_list + dnet.s2c_list:
+            self._protocols[protocol.name].sort(key=lambda r: r.dnet.relative_path)
+        for module in self._file_modules(dnet):
+            self._modules[module].sort(key=lambda d: d.relative_path)
+
+    def remove_file(self, relative_path: str) -> Optional[DnetFile]:
+        """移除单个文件，返回被移除的DnetFile"""
+        dnet = self._files.pop(relative_path, None)
+        if dnet is None:
+            return None
+
+        for protocol in dnet.c2s_list + dnet.s2c_list:
+            refs = self._protocols.get(protocol.name)
+            if refs is None:
+                continue
+            refs[:] = [r for r in refs if r.dnet is not dnet]
+            if not refs:
+                del self._protocols[protocol.name]
+
+        for module in self._file_modules(dnet):
+            files = self._modules.get(module)
+            if files is None:
+                continue
+            files[:] = [f for f in files if f is not dnet]
+            if not files:
+                del self._modules[module]
+        return dnet
+
+    def apply_delta(self, delta: ScanDelta):
+        """根据增量扫描结果更新索引，代价与变化的文件数成正比"""
+        for dnet in delta.removed:
+            self.remove_file(dnet.relative_path)
+        for dnet in delta.modified + delta.added:
+            self.add_file(dnet)
+
+    def get_file(self, relative_path: str) -> Optional[DnetFile]:
+        """按相对路径查找文件"""
+        return self._files.get(relative_path)
+
+    def find_all(self, name: str, direction: Optional[str] = None) -> List[ProtocolRef]:
+        """查找所有同名协议，direction为'C2S'或'S2C'时只返回该方向"""
+        refs = self._protocols.get(name, [])
+        if direction is None:
+            return list(refs)
+        return [r for r in refs if r.direction == direction]
+
+    def find(self, name: str, direction: Optional[str] = None) -> Optional[ProtocolRef]:
+        """查找第一个同名协议（按相对路径顺序）"""
+        for ref in self._protocols.get(name, ()):
+            if direction is None or ref.direction == direction:
+                return ref
+        return None
+
+    def find_in_file(self, relative_path: str, name: str,
+                     direction: Optional[str] = None) -> Optional[ProtocolRef]:
+        """在指定文件中查找协议"""
+        for ref in self._protocols.get(name, ()):
+            if ref.dnet.relative_path == relative_path and (direction is None or ref.direction == direction):
+                return ref
+        return None
+
+    def has_protocol(self, name: str, direction: Optional[str] = None) -> bool:
+        """协议是否存在于任何文件中"""
+        return self.find(name, direction) is not None
+
+    def files_by_module(self, module: str) -> List[DnetFile]:
+        """按CMODULE/SMODULE查找文件"""
+        return list(self._modules.get(module, []))
+
+    def files(self) -> List[DnetFile]:
+        """所有文件（按相对路径排序）"""
+        return sorted(self._files.values(), key=lambda d: d.relative_path)
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def __contains__(self, relative_path: str) -> bool:
+        return relative_path in self._files
+
+    def _index_file(self, dnet: DnetFile):
+        """将文件追加到各索引末尾"""
+        self._files[dnet.relative_path] = dnet
+        for direction, protocols in (('C2S', dnet.c2s_list), ('S2C', dnet.s2c_list)):
+            for protocol in protocols:
+                self._protocols.setdefault(protocol.name, []).append(
+                    ProtocolRef(dnet, protocol, direction))
+        for module in self._file_modules(dnet):
+            self._modules.setdefault(module, []).append(dnet)
+
+    @staticmethod
+    def _file_modules(dnet: DnetFile) -> List[str]:
+        """文件所属的模块名（CMODULE与SMODULE相同时只算一次）"""
+        modules = []
+        for module in (dnet.c2s_module, dnet.s2c_module):
+            if module and module not in modules:
+                modules.append(module)
+        return modules
+
+
+if __name__ == '__main__':
+    # 测试代码
+    import os
+    from dnet_parser import DnetParser
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    proto_dir = os.path.join(os.path.dirname(script_dir), 'proto')
+
+    index = CatalogIndex(DnetParser().scan_directory(proto_dir))
+    print(f"索引文件数: {len(index)}")
+    for ref in index.find_all("S2CUpdateHero"):
+        print(f"  S2CUpdateHero -> {ref.dnet.relative_path} ({ref.direction})")
+    ref = index.find("C2SUpdateHeroName", "C2S")
+    if ref:
+        print(f"  C2SUpdateHeroName 首个定义: {ref.dnet.relative_path}")
+    for dnet in index.files_by_module("netfile.nethero"):
+        print(f"  模块 netfile.nethero -> {dnet.relative_path}")
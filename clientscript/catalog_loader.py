@@ -0,0 +1,83 @@
+"""
+协议目录后台加载模块
+"""
+import queue
+import threading
+from typing import List, NamedTuple, Optional
+
+from dnet_parser import DnetParser, DnetFile, SCAN_BATCH_SIZE
+
+
+class LoadBatch(NamedTuple):
+    """一批加载结果（由加载线程放入结果队列）"""
+    done: int  # 已处理的文件数
+    total: int  # 文件总数
+    files: List[DnetFile]  # 本批解析成功的文件（按相对路径排序，后一批都排在前一批之后）
+
+
+class CatalogLoader:
+    """
+    后台加载线程
+    - start() 在线程中分批扫描、解析proto目录，每批结果放入线程安全的队列，立即返回
+    - 主线程定时调用 poll() 取出结果更新界面，加载过程中界面保持可操作
+    - cancel() 在当前批次解析完后停止，已取出的结果仍然有效
+    加载期间parser和cache只能由加载线程使用
+    """
+
+    def __init__(self, parser: DnetParser, proto_dir: str, cache=None, parallel: bool = True,
+                 batch_size: int = SCAN_BATCH_SIZE):
+        self.parser = parser
+        self.proto_dir = proto_dir
+        self.cache = cache
+        self.parallel = parallel
+        self.batch_size = batch_size
+        self.total: Optional[int] = None  # 文件总数，第一批结果取出后才知道
+        self.done = 0  # 已取出的结果覆盖的文件数
+        self.error: Optional[str] = None  # 加载失败的原因
+        self._results: "queue.Queue[LoadBatch]" = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="CatalogLoader", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """请求停止加载（不等待）"""
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def poll(self, max_batches: Optional[int] = None) -> List[LoadBatch]:
+        """取出已完成的批次（不阻塞），max_batches限制一次取出的数量"""
+        batches = []
+        while max_batches is None or len(batches) < max_batches:
+            try:
+                batch = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self.total = batch.total
+            self.done = batch.done
+            batches.append(batch)
+        return batches
+
+    def is_done(self) -> bool:
+        """加载线程已结束且所有结果都已取出"""
+        thread_done = self._thread is not None and not self._thread.is_alive()
+        return thread_done and self._results.empty()
+
+    def _run(self):
+        try:
+            for done, total, files in self.parser.scan_batches(
+                    self.proto_dir, self.batch_size, self.parallel,
+                    cache=self.cache, cancelled=self._cancel.is_set):
+                self._results.put(LoadBatch(done, total, files))
+        except Exception as e:
+            print(f"后台加载dnet文件失败: {e}")
+            self.error = str(e)
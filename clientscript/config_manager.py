@@ -1,12 +1,16 @@
 """
 配置文件管理模块
 """
+import copy
 import os
 import json
+from collections import OrderedDict
 from dataclasses import dataclass, field, asdict
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
 
 from dnet_parser import DnetFile
+from catalog_index import CatalogIndex
+from config_writer import ConfigWriter, SaveResult, write_json_atomic
 
 
 @dataclass
@@ -60,14 +64,157 @@ class C2SConfig:
     description: str
     c2s_mappings: Dict[str, C2SMapping] = field(default_factory=dict)
     s2c_triggers: Dict[str, S2CTriggerConfig] = field(default_factory=dict)  # S2C自定义触发条件
+    # 脏标记：自上次加载/保存以来修改过的C2S映射和S2C触发条件，保存时只重新序列化这些部分
+    # 新建或导入的配置（没有对应的已保存内容）整体为脏
+    dirty_c2s: Set[str] = field(default_factory=set, init=False, compare=False, repr=False)
+    dirty_triggers: Set[str] = field(default_factory=set, init=False, compare=False, repr=False)
+    dirty_all: bool = field(default=True, init=False, compare=False, repr=False)
 
+    def mark_dirty(self, c2s_name: Optional[str] = None, s2c_name: Optional[str] = None):
+        """标记修改过的C2S映射或S2C触发条件（映射/触发条件的内容、增删都需要标记）"""
+        if c2s_name is not None:
+            self.dirty_c2s.add(c2s_name)
+        if s2c_name is not None:
+            self.dirty_triggers.add(s2c_name)
 
-class ConfigManager:
-    """配置文件管理器"""
+    def mark_all_dirty(self):
+        """无法确定修改范围时整体标记为脏（保存时完整序列化）"""
+        self.dirty_all = True
+
+    def is_dirty(self) -> bool:
+        return self.dirty_all or bool(self.dirty_c2s) or bool(self.dirty_triggers)
+
+    def clear_dirty(self):
+        self.dirty_c2s.clear()
+        self.dirty_triggers.clear()
+        self.dirty_all = False
+
+
+class TriggerRef(NamedTuple):
+    """反向触发索引项：某个C2S配置了该S2C响应"""
+    c2s_name: str
+    dnet_file: str  # C2S所在.dnet文件的相对路径
+    response: S2CResponse  # 缓存中的共享对象，不能修改
+
+
+class ConfigSummary(NamedTuple):
+    """配置摘要：显示已配置标记和过滤所需的信息，不必加载完整配置"""
+    configured_c2s: Tuple[str, ...]  # 有响应的C2S名称（按配置顺序）
+    response_count: int  # 响应总数
+    trigger_count: int  # S2C自定义触发条件总数
+
+    def is_configured(self) -> bool:
+        return len(self.configured_c2s) > 0
+
+
+def summarize_config(config: C2SConfig) -> ConfigSummary:
+    """计算配置摘要"""
+    return ConfigSummary(
+        configured_c2s=tuple(name for name, mapping in config.c2s_mappings.items() if mapping.responses),
+        response_count=sum(len(mapping.responses) for mapping in config.c2s_mappings.values()),
+        trigger_count=sum(len(t.custom_triggers) for t in config.s2c_triggers.values()),
+    )
+
+
+def _clone(obj):
+    """复制响应/顺序组/触发条件（字段都是不可变值，比deepcopy快得多）"""
+    return type(obj)(**vars(obj))
+
+
+def copy_mapping(mapping: C2SMapping) -> C2SMapping:
+    """复制单个C2S映射（只复制数据类对象，字符串等不可变值共享）"""
+    return C2SMapping(description=mapping.description,
+                      responses=[_clone(r) for r in mapping.responses],
+                      order_groups=[_clone(g) for g in mapping.order_groups])
+
+
+def copy_trigger_config(trigger_config: S2CTriggerConfig) -> S2CTriggerConfig:
+    """复制单个S2C的触发条件"""
+    return S2CTriggerConfig(custom_triggers=[_clone(t) for t in trigger_config.custom_triggers])
+
+
+# 内存中缓存的配置文件数上限（超出时淘汰最久未使用的）
+CONFIG_CACHE_SIZE = 512
+
+# 配置摘要文件名（与gui_settings.json放在同一目录）
+SUMMARY_FILE_NAME = 'config_summary.json'
+
+# 配置摘要文件格式版本，摘要结构变化时递增
+SUMMARY_FORMAT = 1
+
+
+def _json_fragment(value, level: int) -> str:
+    """序列化位于指定缩进层级的值，结果与json.dump(indent=2)输出中的对应片段相同"""
+    text = json.dumps(value, ensure_ascii=False, indent=2)
+    return text.replace('\n', '\n' + '  ' * level) if level else text
+
+
+def _json_member(key: str, value_text: str, level: int) -> str:
+    """对象成员（键: 已序列化的值），level为所在对象的缩进层级"""
+    return f'{"  " * (level + 1)}{json.dumps(key, ensure_ascii=False)}: {value_text}'
+
+
+def _json_object_parts(members: List[str], level: int) -> List[str]:
+    """
+    用已序列化的成员拼接JSON对象（格式与json.dump(indent=2)相同）
+    返回文本片段列表，由写入线程依次写出，不在主线程拼接成完整的字符串
+    """
+    if not members:
+        return ['{}']
+    parts = ['{\n']
+    for member in members:
+        parts.append(member)
+        parts.append(',\n')
+    parts[-1] = '\n' + '  ' * level + '}'
+    return parts
 
-    def __init__(self, proto_root: str, config_root: str):
+
+class _SavedForm(NamedTuple):
+    """最近一次保存的内容：配置快照及各部分序列化后的JSON片段，下次保存时未修改的部分直接复用"""
+    source: C2SConfig  # 保存时传入的配置对象，脏标记只对同一个对象有效
+    seq: int  # 提交序号
+    stamp: Optional[Tuple[int, int]]  # 写入后的版本戳，写入完成前为None
+    snapshot: C2SConfig
+    mapping_texts: Dict[str, str]  # C2S名称 -> c2s_mappings中该成员的JSON片段（使用数据库时为空）
+    trigger_texts: Dict[str, str]  # S2C名称 -> s2c_triggers中该成员的JSON片段（使用数据库时为空）
+
+
+class ConfigManager:
+    """
+    配置文件管理器
+    默认每个.dnet文件对应config_root下的一个JSON文件；
+    传入store（config_store.SqliteConfigStore）时所有配置读写改为使用SQLite数据库，接口不变
+    """
+
+    def __init__(self, proto_root: str, config_root: str, cache_size: int = CONFIG_CACHE_SIZE,
+                 summary_path: Optional[str] = None, store=None, text_index=None):
         self.proto_root = proto_root
         self.config_root = config_root
+        self.store = store
+        # 可选的全文索引（fulltext_index.FullTextIndex），随反向触发索引一起更新配置中的条件文本
+        self.text_index = text_index
+        # 配置摘要: .dnet相对路径 -> ((文件大小, 修改时间), 摘要)，summary_path不为空时持久化
+        self.summary_path = summary_path
+        self._summaries: Dict[str, Tuple[Tuple[int, int], ConfigSummary]] = {}
+        # 已按版本戳校验过摘要的.dnet相对路径，直到refresh_summaries()前直接使用摘要表，不再访问磁盘
+        self._summary_checked: Set[str] = set()
+        self._summary_loaded = summary_path is None
+        self._summary_dirty = False
+        # 配置缓存: 配置文件路径 -> (文件大小, 修改时间, 解析结果)，按最近使用排序
+        self._cache: "OrderedDict[str, Tuple[int, int, Optional[C2SConfig]]]" = OrderedDict()
+        self._cache_size = cache_size
+        # 反向触发索引: S2C名称 -> [TriggerRef]（按.dnet相对路径排序）
+        self._triggers: Dict[str, List[TriggerRef]] = {}
+        # 已索引的配置: .dnet相对路径 -> ((文件大小, 修改时间), 涉及的S2C名称)
+        self._trigger_files: Dict[str, Tuple[Optional[Tuple[int, int]], List[str]]] = {}
+        # 后台保存: .dnet相对路径 -> (提交序号, 已提交但尚未写完的配置)，读取时优先于磁盘上的文件
+        self._pending: Dict[str, Tuple[int, C2SConfig]] = {}
+        self._save_seq = 0
+        self._writer: Optional[ConfigWriter] = None
+        # 不经过写入线程直接完成的保存结果（数据库写入、没有修改而跳过的保存），由poll_saves()取出
+        self._done_results: List[SaveResult] = []
+        # 最近一次保存的内容: .dnet相对路径 -> _SavedForm
+        self._saved: Dict[str, _SavedForm] = {}
 
     def get_config_path(self, dnet_relative_path: str) -> str:
         """根据.dnet相对路径获取对应的JSON配置文件路径"""
@@ -75,62 +222,456 @@ class ConfigManager:
         return os.path.join(self.config_root, json_path)
 
     def load_config(self, dnet_relative_path: str) -> Optional[C2SConfig]:
-        """加载配置文件"""
-        config_path = self.get_config_path(dnet_relative_path)
+        """加载配置文件（返回独立副本，可以修改，修改后需标记脏数据，见C2SConfig.mark_dirty）"""
+        config = self.peek_config(dnet_relative_path)
+        if config is None:
+            return None
+        config = copy.deepcopy(config)
+        config.clear_dirty()
+        return config
 
-        if not os.path.exists(config_path):
+    def peek_config(self, dnet_relative_path: str) -> Optional[C2SConfig]:
+        """
+        加载配置文件（返回缓存中的共享对象，调用方不能修改）
+        文件大小和修改时间未变化时直接使用缓存，不再读取和解析JSON
+        """
+        pending = self._pending.get(dnet_relative_path)
+        if pending is not None:
+            return pending[1]
+
+        config_path = self.get_config_path(dnet_relative_path)
+        stamp = self._config_stamp(dnet_relative_path)
+        if stamp is None:
+            self._cache.pop(config_path, None)
             return None
 
+        entry = self._cache.get(config_path)
+        if entry is not None and (entry[0], entry[1]) == stamp:
+            self._cache.move_to_end(config_path)
+            return entry[2]
+
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            return self._dict_to_config(data)
-        except (json.JSONDecodeError, KeyError) as e:
+            if self.store is not None:
+                config = self.store.load(dnet_relative_path)
+            else:
+                with open(config_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                config = self._dict_to_config(data)
+        except Exception as e:
+            # 损坏的文件同样缓存（结果为None），文件变化前不再重复解析和报错
             print(f"加载配置文件失败: {config_path}, 错误: {e}")
+            config = None
+
+        self._cache_put(config_path, stamp, config)
+        return config
+
+    def _config_stamp(self, dnet_relative_path: str) -> Optional[Tuple[int, int]]:
+        """
+        配置的版本戳，没有配置时返回None
+        JSON文件为(文件大小, 修改时间)，数据库为(保存次数, 保存时间)，用于校验缓存、摘要和反向触发索引
+        """
+        if self.store is not None:
+            return self.store.stamp(dnet_relative_path)
+        try:
+            st = os.stat(self.get_config_path(dnet_relative_path))
+        except OSError:
             return None
+        return st.st_size, st.st_mtime_ns
+
+    def invalidate_cache(self, dnet_relative_path: Optional[str] = None):
+        """清除配置缓存，不指定路径时清空全部"""
+        if dnet_relative_path is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(self.get_config_path(dnet_relative_path), None)
+
+    def _cache_put(self, config_path: str, stamp: Tuple[int, int], config: Optional[C2SConfig]):
+        """写入缓存并淘汰最久未使用的项"""
+        self._cache[config_path] = (stamp[0], stamp[1], config)
+        self._cache.move_to_end(config_path)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
 
     def save_config(self, dnet_relative_path: str, config: C2SConfig) -> bool:
-        """保存配置到JSON文件"""
-        config_path = self.get_config_path(dnet_relative_path)
+        """保存配置到JSON文件（等待写入完成）"""
+        seq = self.save_config_async(dnet_relative_path, config)
+        for result in self.flush_saves():
+            if result.key == dnet_relative_path and result.seq == seq:
+                return result.ok
+        return False
+
+    def save_config_async(self, dnet_relative_path: str, config: C2SConfig) -> int:
+        """
+        在后台线程保存配置，立即返回提交序号
+        - 同一个配置对象再次保存时，只复制和重新序列化标记为脏的C2S映射/触发条件，
+          其余部分复用上次保存的快照和JSON片段；没有任何脏标记时完整重新序列化
+        - 写完之前读取该配置（peek_config/load_config/config_summary）得到的是提交的快照
+        - 同一文件连续多次提交时只写最后一次；写入先写临时文件再替换，不会留下写了一半的文件
+        写入结果通过 poll_saves() 在主线程取出；提交后config的脏标记被清除
+        """
+        self._save_seq += 1
+        seq = self._save_seq
+        saved = self._saved_form(dnet_relative_path, config)
+        if not config.is_dirty():
+            # 没有脏标记也照常写入（可能有未标记的修改），完整重新序列化
+            saved = None
+        saved = self._serialize(config, seq, saved)
+        config.clear_dirty()
+        self._saved[dnet_relative_path] = saved
+        self._pending[dnet_relative_path] = (seq, saved.snapshot)
+        # 只更新已纳入反向触发索引的文件，其余文件在下次update_trigger_index时处理
+        if dnet_relative_path in self._trigger_files:
+            self._index_triggers(dnet_relative_path, None, saved.snapshot)
+
+        if self.store is not None:
+            # 数据库的单个事务很快且本身是原子的，直接在当前线程写入（连接不能跨线程使用）
+            self._done_results.append(self._save_to_store(dnet_relative_path, seq, saved.snapshot))
+            return seq
+
+        # 与json.dump(self._config_to_dict(config), indent=2)的输出逐字节相同
+        parts = ['{\n',
+                 _json_member("dnet_file", json.dumps(config.dnet_file, ensure_ascii=False), 0), ',\n',
+                 _json_member("description", json.dumps(config.description, ensure_ascii=False), 0), ',\n',
+                 _json_member("c2s_mappings", "", 0)]
+        parts += _json_object_parts(list(saved.mapping_texts.values()), 1)
+        if config.s2c_triggers:
+            parts += [',\n', _json_member("s2c_triggers", "", 0)]
+            parts += _json_object_parts(list(saved.trigger_texts.values()), 1)
+        parts.append('\n}')
+        if self._writer is None or self._writer.closed:
+            self._writer = ConfigWriter()
+        self._writer.submit(dnet_relative_path, self.get_config_path(dnet_relative_path), seq, parts)
+        return seq
+
+    def _saved_form(self, dnet_relative_path: str, config: C2SConfig) -> Optional[_SavedForm]:
+        """上次保存的内容，config不是上次保存的对象或配置已在外部变化时返回None"""
+        saved = self._saved.get(dnet_relative_path)
+        if saved is None or saved.source is not config:
+            return None
+        pending = self._pending.get(dnet_relative_path)
+        if pending is not None:
+            valid = pending[0] == saved.seq
+        else:
+            valid = saved.stamp is not None and saved.stamp == self._config_stamp(dnet_relative_path)
+        if not valid:
+            del self._saved[dnet_relative_path]
+            return None
+        return saved
 
-        # 创建目录（如果不存在）
-        config_dir = os.path.dirname(config_path)
-        if config_dir and not os.path.exists(config_dir):
-            os.makedirs(config_dir)
+    def _serialize(self, config: C2SConfig, seq: int, saved: Optional[_SavedForm]) -> _SavedForm:
+        """生成快照和JSON片段，saved不为空时复用其中未标记为脏的部分"""
+        render = self.store is None
+        reuse = saved is not None and not config.dirty_all
+        snapshot = C2SConfig(dnet_file=config.dnet_file, description=config.description)
+        mapping_texts: Dict[str, str] = {}
+        trigger_texts: Dict[str, str] = {}
 
+        for c2s_name, mapping in config.c2s_mappings.items():
+            if reuse and c2s_name not in config.dirty_c2s and c2s_name in saved.snapshot.c2s_mappings:
+                snapshot.c2s_mappings[c2s_name] = saved.snapshot.c2s_mappings[c2s_name]
+                if render:
+                    mapping_texts[c2s_name] = saved.mapping_texts[c2s_name]
+                continue
+            copied = copy_mapping(mapping)
+            snapshot.c2s_mappings[c2s_name] = copied
+            if render:
+                mapping_texts[c2s_name] = _json_member(
+                    c2s_name, _json_fragment(self._mapping_to_dict(copied), 2), 1)
+
+        for s2c_name, trigger_config in config.s2c_triggers.items():
+            # 与_config_to_dict一致，不保留没有触发条件的S2C，快照与写入的内容相同
+            if not trigger_config.custom_triggers:
+                continue
+            if reuse and s2c_name not in config.dirty_triggers and s2c_name in saved.snapshot.s2c_triggers:
+                snapshot.s2c_triggers[s2c_name] = saved.snapshot.s2c_triggers[s2c_name]
+                if render:
+                    trigger_texts[s2c_name] = saved.trigger_texts[s2c_name]
+                continue
+            copied = copy_trigger_config(trigger_config)
+            snapshot.s2c_triggers[s2c_name] = copied
+            if render:
+                trigger_texts[s2c_name] = _json_member(
+                    s2c_name, _json_fragment(self._trigger_config_to_dict(copied), 2), 1)
+
+        return _SavedForm(config, seq, None, snapshot, mapping_texts, trigger_texts)
+
+    def poll_saves(self) -> List[SaveResult]:
+        """取出已完成的后台保存结果并更新缓存、摘要和反向触发索引（在主线程调用）"""
+        results, self._done_results = self._done_results, []
+        if self._writer is not None:
+            results.extend(self._writer.poll())
+        for result in results:
+            self._finish_save(result)
+        return results
+
+    def flush_saves(self, timeout: Optional[float] = None) -> List[SaveResult]:
+        """等待所有后台保存完成，返回取出的结果"""
+        if self._writer is not None:
+            self._writer.flush(timeout)
+        return self.poll_saves()
+
+    def wait_saves(self, timeout: Optional[float] = None) -> bool:
+        """等待所有后台保存写完（不取出结果，仍由poll_saves()处理），超时返回False"""
+        if self._writer is None:
+            return True
+        return self._writer.flush(timeout)
+
+    def has_pending_saves(self) -> bool:
+        """是否有尚未写完的后台保存"""
+        return bool(self._pending)
+
+    def close(self):
+        """等待后台保存写完并结束写入线程（结果仍可通过poll_saves()取出），使用数据库时关闭数据库"""
+        if self._writer is not None:
+            self._writer.close()
+        if self.store is not None:
+            self.store.close()
+
+    def _save_to_store(self, dnet_relative_path: str, seq: int, config: C2SConfig) -> SaveResult:
         try:
-            data = self._config_to_dict(config)
-            with open(config_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            stamp = self.store.save(dnet_relative_path, config)
+            return SaveResult(dnet_relative_path, self.store.db_path, seq, stamp, None)
+        except Exception as e:
+            return SaveResult(dnet_relative_path, self.store.db_path, seq, None, str(e))
+
+    def _finish_save(self, result: SaveResult):
+        pending = self._pending.get(result.key)
+        if pending is None or pending[0] != result.seq:
+            # 写入期间又有新的提交，以最后一次提交的结果为准
+            return
+        del self._pending[result.key]
+        config = pending[1]
+        # 缓存按配置文件路径记录（数据库模式下result.path是数据库路径，只用于提示）
+        config_path = self.get_config_path(result.key)
+
+        saved = self._saved.get(result.key)
+        if not result.ok:
+            if saved is not None and saved.seq == result.seq:
+                del self._saved[result.key]
+            self._cache.pop(config_path, None)
+            print(f"保存配置文件失败: {result.path}, 错误: {result.error}")
+            if result.key in self._trigger_files:
+                # 索引中是未能保存的内容，恢复为磁盘上的配置
+                self._index_triggers(result.key, None, self.peek_config(result.key))
+            return
+
+        if saved is not None and saved.seq == result.seq:
+            self._saved[result.key] = saved._replace(stamp=result.stamp)
+        self._cache_put(config_path, result.stamp, config)
+        self._set_summary(result.key, result.stamp, summarize_config(config))
+        if result.key in self._trigger_files:
+            self._index_triggers(result.key, result.stamp, config)
+
+    def config_summary(self, dnet_relative_path: str) -> Optional[ConfigSummary]:
+        """
+        获取配置摘要，没有配置文件时返回None
+        每个配置只在第一次读取时按版本戳校验（变化时重新读取配置），之后直接使用内存中的摘要表，
+        保存时同步更新；外部修改过的配置在refresh_summaries()之后重新校验
+        """
+        if not self._summary_loaded:
+            self.load_summary()
+
+        pending = self._pending.get(dnet_relative_path)
+        if pending is not None:
+            return summarize_config(pending[1])
+
+        if dnet_relative_path in self._summary_checked:
+            entry = self._summaries.get(dnet_relative_path)
+            return entry[1] if entry is not None else None
+        return self._check_summary(dnet_relative_path, self._config_stamp(dnet_relative_path))
+
+    def _check_summary(self, dnet_relative_path: str, stamp: Optional[Tuple[int, int]]) -> Optional[ConfigSummary]:
+        """按配置当前的版本戳校验摘要，记为已校验"""
+        if not self._summary_loaded:
+            self.load_summary()
+        self._summary_checked.add(dnet_relative_path)
+        if stamp is None:
+            if self._summaries.pop(dnet_relative_path, None) is not None:
+                self._summary_dirty = True
+            return None
+
+        entry = self._summaries.get(dnet_relative_path)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+
+        config = self.peek_config(dnet_relative_path)
+        summary = summarize_config(config) if config is not None else ConfigSummary((), 0, 0)
+        self._set_summary(dnet_relative_path, stamp, summary)
+        return summary
+
+    def refresh_summaries(self, dnet_relative_paths: Optional[Iterable[str]] = None):
+        """使摘要在下次读取时重新按磁盘上的配置校验（不指定路径时全部重新校验）"""
+        if dnet_relative_paths is None:
+            self._summary_checked.clear()
+        else:
+            self._summary_checked.difference_update(dnet_relative_paths)
+
+    def is_configured(self, dnet_relative_path: str) -> bool:
+        """配置中是否有任何C2S配置了响应"""
+        summary = self.config_summary(dnet_relative_path)
+        return summary is not None and summary.is_configured()
+
+    def load_summary(self) -> bool:
+        """从磁盘加载配置摘要，格式或配置目录不一致时丢弃"""
+        self._summary_loaded = True
+        self._summaries = {}
+        self._summary_checked = set()
+        if not self.summary_path or not os.path.exists(self.summary_path):
+            return False
+
+        try:
+            with open(self.summary_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if (data.get("format") != SUMMARY_FORMAT
+                    or data.get("config_root") != self._summary_source()):
+                return False
+            for relative_path, (size, mtime_ns, names, responses, triggers) in data["entries"].items():
+                self._summaries[relative_path] = ((size, mtime_ns),
+                                                  ConfigSummary(tuple(names), responses, triggers))
+            return True
+        except Exception as e:
+            print(f"加载配置摘要失败: {self.summary_path}, 错误: {e}")
+            self._summaries = {}
+            return False
+
+    def save_summary(self) -> bool:
+        """将配置摘要写回磁盘（先写临时文件再替换）"""
+        if not self.summary_path or not self._summary_dirty:
+            return True
+
+        data = {
+            "format": SUMMARY_FORMAT,
+            "config_root": self._summary_source(),
+            "entries": {
+                relative_path: [stamp[0], stamp[1], list(summary.configured_c2s),
+                                summary.response_count, summary.trigger_count]
+                for relative_path, (stamp, summary) in self._summaries.items()
+            },
+        }
+        try:
+            write_json_atomic(self.summary_path, data, ensure_ascii=False, separators=(',', ':'))
+            self._summary_dirty = False
             return True
         except Exception as e:
-            print(f"保存配置文件失败: {config_path}, 错误: {e}")
+            print(f"保存配置摘要失败: {self.summary_path}, 错误: {e}")
             return False
 
+    def _summary_source(self) -> str:
+        """摘要对应的配置来源（配置目录或数据库文件），来源不一致的摘要文件不能使用"""
+        return os.path.abspath(self.store.db_path if self.store is not None else self.config_root)
+
+    def _set_summary(self, dnet_relative_path: str, stamp: Tuple[int, int], summary: ConfigSummary):
+        if not self._summary_loaded:
+            self.load_summary()
+        self._summaries[dnet_relative_path] = (stamp, summary)
+        self._summary_checked.add(dnet_relative_path)
+        self._summary_dirty = True
+
+    def update_trigger_index(self, dnet_relative_paths: Iterable[str]):
+        """
+        同步反向触发索引（首次调用时完整构建）
+        只重新加载大小或修改时间变化的配置，不在列表中的.dnet文件从索引中移除
+        """
+        live = set(dnet_relative_paths)
+        self.index_trigger_files(live)
+        self.prune_trigger_index(live)
+
+    def index_trigger_files(self, dnet_relative_paths: Iterable[str]):
+        """
+        将指定的.dnet文件加入反向触发索引（只重新加载大小或修改时间变化的配置），不移除其他文件
+        后台分批加载时每批调用一次，全部加载后再调用prune_trigger_index()
+        """
+        if self.store is not None and self.text_index is None:
+            # 数据库中的反向查找是一条带索引的SQL，不需要加载配置，只记录当前存在的.dnet文件
+            # （设置了全文索引时仍需加载变化的配置，索引其中的条件文本）
+            for relative_path in dnet_relative_paths:
+                self._trigger_files[relative_path] = (None, [])
+            return
+
+        for relative_path in dnet_relative_paths:
+            stamp = self._config_stamp(relative_path)
+            # 已经取得版本戳，顺便校验摘要（文件树标记已配置时不必再访问磁盘）
+            self._check_summary(relative_path, stamp)
+            indexed = self._trigger_files.get(relative_path)
+            if indexed is not None and indexed[0] == stamp:
+                continue
+            config = self.peek_config(relative_path) if stamp is not None else None
+            self._index_triggers(relative_path, stamp, config)
+
+    def prune_trigger_index(self, live: Set[str]):
+        """从反向触发索引中移除不在live中的.dnet文件"""
+        self.unindex_trigger_files([p for p in self._trigger_files if p not in live])
+
+    def unindex_trigger_files(self, dnet_relative_paths: Iterable[str]):
+        """从反向触发索引中移除指定的.dnet文件（F5刷新时移除被删除的文件）"""
+        for relative_path in dnet_relative_paths:
+            self._unindex_triggers(relative_path)
+
+    def find_triggers(self, s2c_name: str) -> List[TriggerRef]:
+        """查找配置了该S2C响应的所有C2S（需先调用update_trigger_index）"""
+        if self.store is not None:
+            return [r for r in self.store.find_triggers(s2c_name) if r.dnet_file in self._trigger_files]
+        return list(self._triggers.get(s2c_name, ()))
+
+    def _index_triggers(self, dnet_relative_path: str, stamp: Optional[Tuple[int, int]],
+                        config: Optional[C2SConfig]):
+        """重新索引单个配置中的触发关系（设置了全文索引时同时更新其中的条件文本）"""
+        if self.store is not None:
+            # 数据库的反向查找不使用内存索引，只记录版本戳（全文索引据此判断配置是否变化）
+            self._trigger_files[dnet_relative_path] = (stamp, [])
+        else:
+            self._unindex_triggers(dnet_relative_path)
+            names: List[str] = []
+            if config is not None:
+                for c2s_name, mapping in config.c2s_mappings.items():
+                    for resp in mapping.responses:
+                        refs = self._triggers.setdefault(resp.protocol, [])
+                        refs.append(TriggerRef(c2s_name, dnet_relative_path, resp))
+                        if resp.protocol not in names:
+                            names.append(resp.protocol)
+            # 与逐个遍历.dnet文件的顺序保持一致（sort是稳定的，同一文件内保持配置顺序）
+            for name in names:
+                self._triggers[name].sort(key=lambda r: r.dnet_file)
+            self._trigger_files[dnet_relative_path] = (stamp, names)
+        if self.text_index is not None:
+            self.text_index.set_config(dnet_relative_path, config)
+
+    def _unindex_triggers(self, dnet_relative_path: str):
+        """从反向触发索引中移除单个配置"""
+        indexed = self._trigger_files.pop(dnet_relative_path, None)
+        if indexed is None:
+            return
+        if self.text_index is not None:
+            self.text_index.remove_config(dnet_relative_path)
+        for name in indexed[1]:
+            refs = [r for r in self._triggers.get(name, ()) if r.dnet_file != dnet_relative_path]
+            if refs:
+                self._triggers[name] = refs
+            else:
+                self._triggers.pop(name, None)
+
     def validate_config(self, config: C2SConfig, dnet: DnetFile,
-                       all_dnet_files: List[DnetFile]) -> List[str]:
+                       all_dnet_files: List[DnetFile],
+                       index: Optional[CatalogIndex] = None) -> List[str]:
         """
         验证配置的有效性
+        index为已构建的目录索引时直接使用，否则根据all_dnet_files临时构建
         返回警告信息列表
         """
         warnings = []
 
-        # 构建所有可用的S2C协议集合
-        all_s2c_protocols = set()
-        for df in all_dnet_files:
-            for s2c in df.s2c_list:
-                all_s2c_protocols.add(s2c.name)
+        if index is None:
+            index = CatalogIndex(all_dnet_files)
 
         # 检查每个C2S的配置
         for c2s_name, mapping in config.c2s_mappings.items():
             # 检查C2S是否存在于dnet文件中
-            c2s_exists = any(p.name == c2s_name for p in dnet.c2s_list)
-            if not c2s_exists:
+            if index.find_in_file(dnet.relative_path, c2s_name, 'C2S') is None:
                 warnings.append(f"C2S协议 '{c2s_name}' 不存在于 {dnet.file_name} 中")
 
             # 检查配置的S2C是否存在
             for resp in mapping.responses:
-                if resp.protocol not in all_s2c_protocols:
+                if not index.has_protocol(resp.protocol, 'S2C'):
                     warnings.append(
                         f"C2S '{c2s_name}' 配置的S2C '{resp.protocol}' 不存在于任何.dnet文件中"
                     )
@@ -158,49 +699,59 @@ class ConfigManager:
             "dnet_file": config.dnet_file,
             "description": config.description,
             "c2s_mappings": {
-                c2s_name: {
-                    "description": mapping.description,
-                    "order_groups": [
-                        {"name": g.name, "description": g.description}
-                        for g in mapping.order_groups
-                    ],
-                    "responses": [
-                        {
-                            "protocol": r.protocol,
-                            "order": r.order,
-                            "type": r.type,
-                            "condition": r.condition,
-                            "count": r.count,
-                            "order_group": r.order_group,
-                            "ordered": r.ordered,
-                            "cmodule": r.cmodule
-                        }
-                        for r in mapping.responses
-                    ]
-                }
+                c2s_name: self._mapping_to_dict(mapping)
                 for c2s_name, mapping in config.c2s_mappings.items()
             }
         }
         # 添加S2C触发条件（如果有）
         if config.s2c_triggers:
             result["s2c_triggers"] = {
-                s2c_name: {
-                    "custom_triggers": [
-                        {
-                            "name": t.name,
-                            "type": t.type,
-                            "condition": t.condition,
-                            "count": t.count,
-                            "ordered": t.ordered
-                        }
-                        for t in trigger_config.custom_triggers
-                    ]
-                }
+                s2c_name: self._trigger_config_to_dict(trigger_config)
                 for s2c_name, trigger_config in config.s2c_triggers.items()
                 if trigger_config.custom_triggers  # 只保存有数据的
             }
         return result
 
+    @staticmethod
+    def _mapping_to_dict(mapping: C2SMapping) -> dict:
+        """将单个C2S映射转换为字典"""
+        return {
+            "description": mapping.description,
+            "order_groups": [
+                {"name": g.name, "description": g.description}
+                for g in mapping.order_groups
+            ],
+            "responses": [
+                {
+                    "protocol": r.protocol,
+                    "order": r.order,
+                    "type": r.type,
+                    "condition": r.condition,
+                    "count": r.count,
+                    "order_group": r.order_group,
+                    "ordered": r.ordered,
+                    "cmodule": r.cmodule
+                }
+                for r in mapping.responses
+            ]
+        }
+
+    @staticmethod
+    def _trigger_config_to_dict(trigger_config: S2CTriggerConfig) -> dict:
+        """将单个S2C的触发条件转换为字典"""
+        return {
+            "custom_triggers": [
+                {
+                    "name": t.name,
+                    "type": t.type,
+                    "condition": t.condition,
+                    "count": t.count,
+                    "ordered": t.ordered
+                }
+                for t in trigger_config.custom_triggers
+            ]
+        }
+
     def _dict_to_config(self, data: dict) -> C2SConfig:
         """将字典转换为配置对象"""
         config = C2SConfig(
@@ -324,3 +875,41 @@ if __name__ == '__main__':
                 print(f"  - {w}")
         else:
             print("验证通过")
+
+        # 分段保存：只重新序列化脏的部分，写出的内容应与json.dump(indent=2)完整序列化逐字节相同
+        import tempfile
+        with tempfile.TemporaryDirectory() as temp_dir:
+            splice_manager = ConfigManager(proto_dir, temp_dir)
+            config = splice_manager.create_empty_config(dnet)
+            c2s_names = list(config.c2s_mappings)
+            s2c_names = [p.name for p in dnet.s2c_list] or ["S2CUpdateHero"]
+
+            def check_save(label: str):
+                splice_manager.save_config(dnet.relative_path, config)
+                with open(splice_manager.get_config_path(dnet.relative_path), 'rb') as f:
+                    written = f.read()
+                expected = json.dumps(splice_manager._config_to_dict(config), ensure_ascii=False, indent=2)
+                result = "一致" if written == expected.encode('utf-8') else "不一致"
+                print(f"{label}: {len(written)} 字节，与完整序列化{result}")
+
+            for i, c2s_name in enumerate(c2s_names):
+                config.c2s_mappings[c2s_name].responses = [S2CResponse(protocol=s2c_names[0], order=i + 1)]
+            config.s2c_triggers[s2c_names[0]] = S2CTriggerConfig([S2CTrigger(name="登录时")])
+            check_save("完整保存")
+
+            if c2s_names:
+                config.c2s_mappings[c2s_names[-1]].responses.append(
+                    S2CResponse(protocol=s2c_names[-1], order=2, type="按条件回包", condition="英雄\"已存在\""))
+                config.mark_dirty(c2s_name=c2s_names[-1])
+                check_save("只修改一个C2S映射")
+
+            config.s2c_triggers[s2c_names[-1]] = S2CTriggerConfig([S2CTrigger(name="升级时", ordered=False)])
+            config.mark_dirty(s2c_name=s2c_names[-1])
+            check_save("添加触发条件")
+
+            config.s2c_triggers[s2c_names[0]].custom_triggers.clear()
+            config.mark_dirty(s2c_name=s2c_names[0])
+            check_save("清空触发条件")
+
+            config.mark_all_dirty()
+            check_save("整体标记为脏")
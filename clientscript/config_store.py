@@ -0,0 +1,301 @@
+"""
+SQLite配置存储模块（按.dnet文件分别存放JSON之外的可选存储方式）
+"""
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config_manager import (ConfigManager, C2SConfig, C2SMapping, S2CResponse, OrderGroup,
+                            S2CTrigger, S2CTriggerConfig, TriggerRef)
+
+
+# 数据库结构版本，结构变化时递增（旧数据库需要重新从JSON导入）
+STORE_SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS configs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,          -- .dnet相对路径
+    dnet_file TEXT NOT NULL,
+    description TEXT NOT NULL,
+    revision INTEGER NOT NULL,          -- 每次保存递增，与updated_ns一起作为配置的版本戳
+    updated_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS mappings (
+    config_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    c2s TEXT NOT NULL,
+    description TEXT NOT NULL,
+    PRIMARY KEY (config_id, position)
+);
+CREATE TABLE IF NOT EXISTS responses (
+    config_id INTEGER NOT NULL,
+    mapping_pos INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    protocol TEXT NOT NULL,
+    ord INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    condition TEXT NOT NULL,
+    count TEXT NOT NULL,
+    order_group TEXT NOT NULL,
+    ordered INTEGER NOT NULL,
+    cmodule TEXT NOT NULL,
+    PRIMARY KEY (config_id, mapping_pos, position)
+);
+CREATE INDEX IF NOT EXISTS responses_protocol ON responses (protocol);
+CREATE TABLE IF NOT EXISTS order_groups (
+    config_id INTEGER NOT NULL,
+    mapping_pos INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    PRIMARY KEY (config_id, mapping_pos, position)
+);
+CREATE TABLE IF NOT EXISTS trigger_configs (
+    config_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    s2c TEXT NOT NULL,
+    PRIMARY KEY (config_id, position)
+);
+CREATE TABLE IF NOT EXISTS triggers (
+    config_id INTEGER NOT NULL,
+    trigger_pos INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    condition TEXT NOT NULL,
+    count TEXT NOT NULL,
+    ordered INTEGER NOT NULL,
+    PRIMARY KEY (config_id, trigger_pos, position)
+);
+"""
+
+# 按config_id存放子项的表（保存/删除配置时整体替换）
+_CHILD_TABLES = ('mappings', 'responses', 'order_groups', 'trigger_configs', 'triggers')
+
+
+class SqliteConfigStore:
+    """
+    把所有配置存放在一个SQLite数据库中
+    - load() / save() 与JSON配置文件一一对应，保留映射、响应、顺序组和触发条件的顺序
+    - 每次保存是一个事务，写入中途崩溃不会留下不完整的配置
+    - 跨文件查询（反向触发查找、统计）是单条带索引的SQL
+    ConfigManager(store=...) 使用它代替JSON配置文件
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        # WAL模式下并行验证的子进程可以同时读取
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, STORE_SCHEMA_VERSION):
+            raise ValueError(f"配置数据库版本不匹配: {version}（需要 {STORE_SCHEMA_VERSION}），请重新导入")
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(f"PRAGMA user_version={STORE_SCHEMA_VERSION}")
+
+    def close(self):
+        self._conn.close()
+
+    def files(self) -> List[str]:
+        """已保存配置的.dnet相对路径（排序）"""
+        return [row[0] for row in self._conn.execute("SELECT path FROM configs ORDER BY path")]
+
+    def stamp(self, dnet_relative_path: str) -> Optional[Tuple[int, int]]:
+        """配置的版本戳（保存次数, 保存时间），没有配置时返回None"""
+        row = self._conn.execute("SELECT revision, updated_ns FROM configs WHERE path=?",
+                                 (dnet_relative_path,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def load(self, dnet_relative_path: str) -> Optional[C2SConfig]:
+        """读取配置，没有配置时返回None"""
+        conn = self._conn
+        row = conn.execute("SELECT id, dnet_file, description FROM configs WHERE path=?",
+                           (dnet_relative_path,)).fetchone()
+        if row is None:
+            return None
+        config_id, dnet_file, description = row
+        config = C2SConfig(dnet_file=dnet_file, description=description)
+
+        mappings: List[C2SMapping] = []
+        for c2s, mapping_desc in conn.execute(
+                "SELECT c2s, description FROM mappings WHERE config_id=? ORDER BY position", (config_id,)):
+            mapping = C2SMapping(description=mapping_desc)
+            config.c2s_mappings[c2s] = mapping
+            mappings.append(mapping)
+        for mapping_pos, protocol, order, type_, condition, count, order_group, ordered, cmodule in conn.execute(
+                "SELECT mapping_pos, protocol, ord, type, condition, count, order_group, ordered, cmodule "
+                "FROM responses WHERE config_id=? ORDER BY mapping_pos, position", (config_id,)):
+            mappings[mapping_pos].responses.append(
+                S2CResponse(protocol, order, type_, condition, count, order_group, bool(ordered), cmodule))
+        for mapping_pos, name, group_desc in conn.execute(
+                "SELECT mapping_pos, name, description FROM order_groups "
+                "WHERE config_id=? ORDER BY mapping_pos, position", (config_id,)):
+            mappings[mapping_pos].order_groups.append(OrderGroup(name, group_desc))
+
+        trigger_configs: List[S2CTriggerConfig] = []
+        for (s2c,) in conn.execute(
+                "SELECT s2c FROM trigger_configs WHERE config_id=? ORDER BY position", (config_id,)):
+            trigger_config = S2CTriggerConfig()
+            config.s2c_triggers[s2c] = trigger_config
+            trigger_configs.append(trigger_config)
+        for trigger_pos, name, type_, condition, count, ordered in conn.execute(
+                "SELECT trigger_pos, name, type, condition, count, ordered FROM triggers "
+                "WHERE config_id=? ORDER BY trigger_pos, position", (config_id,)):
+            trigger_configs[trigger_pos].custom_triggers.append(
+                S2CTrigger(name, type_, condition, count, bool(ordered)))
+
+        return config
+
+    def save(self, dnet_relative_path: str, config: C2SConfig) -> Tuple[int, int]:
+        """保存配置（单个事务内整体替换），返回新的版本戳"""
+        conn = self._conn
+        updated_ns = time.time_ns()
+        with conn:
+            revision = conn.execute("SELECT COALESCE(MAX(revision), 0) + 1 FROM configs").fetchone()[0]
+            row = conn.execute("SELECT id FROM configs WHERE path=?", (dnet_relative_path,)).fetchone()
+            if row is None:
+                config_id = conn.execute(
+                    "INSERT INTO configs (path, dnet_file, description, revision, updated_ns) VALUES (?, ?, ?, ?, ?)",
+                    (dnet_relative_path, config.dnet_file, config.description, revision, updated_ns)).lastrowid
+            else:
+                config_id = row[0]
+                conn.execute("UPDATE configs SET dnet_file=?, description=?, revision=?, updated_ns=? WHERE id=?",
+                             (config.dnet_file, config.description, revision, updated_ns, config_id))
+                self._delete_children(config_id)
+
+            mapping_rows, response_rows, group_rows = [], [], []
+            for mapping_pos, (c2s, mapping) in enumerate(config.c2s_mappings.items()):
+                mapping_rows.append((config_id, mapping_pos, c2s, mapping.description))
+                response_rows.extend(
+                    (config_id, mapping_pos, i, r.protocol, r.order, r.type, r.condition, r.count,
+                     r.order_group, int(r.ordered), r.cmodule)
+                    for i, r in enumerate(mapping.responses))
+                group_rows.extend((config_id, mapping_pos, i, g.name, g.description)
+                                  for i, g in enumerate(mapping.order_groups))
+            trigger_config_rows, trigger_rows = [], []
+            for trigger_pos, (s2c, trigger_config) in enumerate(config.s2c_triggers.items()):
+                trigger_config_rows.append((config_id, trigger_pos, s2c))
+                trigger_rows.extend((config_id, trigger_pos, i, t.name, t.type, t.condition, t.count, int(t.ordered))
+                                    for i, t in enumerate(trigger_config.custom_triggers))
+
+            conn.executemany("INSERT INTO mappings VALUES (?, ?, ?, ?)", mapping_rows)
+            conn.executemany("INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", response_rows)
+            conn.executemany("INSERT INTO order_groups VALUES (?, ?, ?, ?, ?)", group_rows)
+            conn.executemany("INSERT INTO trigger_configs VALUES (?, ?, ?)", trigger_config_rows)
+            conn.executemany("INSERT INTO triggers VALUES (?, ?, ?, ?, ?, ?, ?, ?)", trigger_rows)
+        return revision, updated_ns
+
+    def delete(self, dnet_relative_path: str) -> bool:
+        """删除配置，返回是否存在"""
+        with self._conn:
+            row = self._conn.execute("SELECT id FROM configs WHERE path=?", (dnet_relative_path,)).fetchone()
+            if row is None:
+                return False
+            self._delete_children(row[0])
+            self._conn.execute("DELETE FROM configs WHERE id=?", (row[0],))
+        return True
+
+    def _delete_children(self, config_id: int):
+        for table in _CHILD_TABLES:
+            self._conn.execute(f"DELETE FROM {table} WHERE config_id=?", (config_id,))
+
+    # ==================== 跨文件查询 ====================
+
+    def find_triggers(self, s2c_name: str) -> List[TriggerRef]:
+        """查找配置了指定S2C响应的所有C2S（按.dnet相对路径、配置顺序排列）"""
+        rows = self._conn.execute(
+            "SELECT m.c2s, c.path, r.protocol, r.ord, r.type, r.condition, r.count, r.order_group, "
+            "r.ordered, r.cmodule FROM responses r "
+            "JOIN configs c ON c.id = r.config_id "
+            "JOIN mappings m ON m.config_id = r.config_id AND m.position = r.mapping_pos "
+            "WHERE r.protocol=? ORDER BY c.path, r.mapping_pos, r.position", (s2c_name,))
+        return [TriggerRef(c2s, path, S2CResponse(protocol, order, type_, condition, count,
+                                                  order_group, bool(ordered), cmodule))
+                for c2s, path, protocol, order, type_, condition, count, order_group, ordered, cmodule in rows]
+
+    def referenced_s2c(self) -> List[str]:
+        """所有配置中引用过的S2C名称（排序）"""
+        return [row[0] for row in self._conn.execute(
+            "SELECT DISTINCT protocol FROM responses ORDER BY protocol")]
+
+    def configured_files(self) -> List[str]:
+        """至少有一个C2S配置了响应的.dnet相对路径（排序）"""
+        return [row[0] for row in self._conn.execute(
+            "SELECT path FROM configs c WHERE EXISTS (SELECT 1 FROM responses r WHERE r.config_id = c.id) "
+            "ORDER BY path")]
+
+    def stats(self) -> Dict[str, int]:
+        """整个项目的配置统计"""
+        conn = self._conn
+        return {
+            "files": conn.execute("SELECT COUNT(*) FROM configs").fetchone()[0],
+            "mappings": conn.execute("SELECT COUNT(*) FROM mappings").fetchone()[0],
+            "configured_c2s": conn.execute(
+                "SELECT COUNT(*) FROM (SELECT DISTINCT config_id, mapping_pos FROM responses)").fetchone()[0],
+            "responses": conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0],
+            "triggers": conn.execute("SELECT COUNT(*) FROM triggers").fetchone()[0],
+        }
+
+
+def _json_config_paths(config_root: str) -> List[str]:
+    """配置目录下所有JSON配置对应的.dnet相对路径"""
+    result = []
+    for root, _dirs, files in os.walk(config_root):
+        for file_name in files:
+            if file_name.endswith('.json'):
+                relative_json = os.path.relpath(os.path.join(root, file_name), config_root)
+                result.append(os.path.splitext(relative_json)[0] + '.dnet')
+    return sorted(result)
+
+
+def import_json(store: SqliteConfigStore, config_root: str) -> int:
+    """把JSON配置目录导入数据库，返回导入的配置数（无法解析的文件跳过）"""
+    manager = ConfigManager("", config_root)
+    count = 0
+    for relative_path in _json_config_paths(config_root):
+        config = manager.import_config(manager.get_config_path(relative_path))
+        if config is None:
+            continue
+        store.save(relative_path, config)
+        count += 1
+    return count
+
+
+def export_json(store: SqliteConfigStore, config_root: str) -> int:
+    """把数据库中的配置导出为JSON配置目录（与ConfigManager保存的文件相同），返回导出的配置数"""
+    manager = ConfigManager("", config_root)
+    count = 0
+    for relative_path in store.files():
+        export_path = manager.get_config_path(relative_path)
+        os.makedirs(os.path.dirname(export_path) or '.', exist_ok=True)
+        if manager.export_config(store.load(relative_path), export_path):
+            count += 1
+    return count
+
+
+if __name__ == '__main__':
+    # 测试代码：导入配置目录，再导出到临时目录并逐个比较
+    import filecmp
+    import tempfile
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    config_dir = os.path.join(os.path.dirname(script_dir), 'clientconfig')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = SqliteConfigStore(os.path.join(tmp_dir, 'configs.db'))
+        print(f"导入 {import_json(store, config_dir)} 个配置")
+        print(f"统计: {store.stats()}")
+        export_dir = os.path.join(tmp_dir, 'export')
+        print(f"导出 {export_json(store, export_dir)} 个配置")
+        for relative_path in store.files():
+            json_path = os.path.splitext(relative_path)[0] + '.json'
+            same = filecmp.cmp(os.path.join(config_dir, json_path), os.path.join(export_dir, json_path),
+                               shallow=False)
+            print(f"  {relative_path}: {'一致' if same else '不一致'}")
+        store.close()
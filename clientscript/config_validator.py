@@ -0,0 +1,341 @@
+"""
+配置验证引擎模块
+"""
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set
+
+from dnet_parser import DnetFile, ScanDelta
+from config_manager import C2SConfig, ConfigManager
+from config_store import SqliteConfigStore
+
+
+# 诊断代码
+C2S_NOT_FOUND = 'C2S_NOT_FOUND'  # 配置的C2S不存在于对应的.dnet文件中
+S2C_NOT_FOUND = 'S2C_NOT_FOUND'  # 配置的S2C响应不存在于任何.dnet文件中
+
+# 并行验证的最小配置数，配置较少时进程启动开销大于收益
+PARALLEL_MIN_CONFIGS = 64
+
+
+class Diagnostic(NamedTuple):
+    """单条验证结果"""
+    file: str  # .dnet文件相对路径
+    c2s: str  # C2S协议名称
+    response_index: Optional[int]  # 响应在mapping.responses中的下标，C2S本身的问题为None
+    code: str  # 诊断代码（C2S_NOT_FOUND / S2C_NOT_FOUND）
+    message: str  # 可读的描述
+
+
+class SymbolTable:
+    """
+    验证所需的协议符号表，每次扫描构建一次，刷新时按增量结果更新
+    - 相对路径 -> 该文件的C2S名称集合
+    - 所有文件的S2C名称（带引用计数，便于增量移除）
+    """
+
+    def __init__(self, dnet_files: Iterable[DnetFile] = ()):
+        self.c2s_names: Dict[str, FrozenSet[str]] = {}
+        self.s2c_counts: Counter = Counter()
+        self._s2c_by_file: Dict[str, List[str]] = {}
+        self.rebuild(dnet_files)
+
+    def rebuild(self, dnet_files: Iterable[DnetFile]):
+        """根据文件列表重建符号表"""
+        self.c2s_names = {}
+        self.s2c_counts = Counter()
+        self._s2c_by_file = {}
+        for dnet in dnet_files:
+            self.add_file(dnet)
+
+    def add_file(self, dnet: DnetFile):
+        """添加（或替换）单个文件"""
+        self.remove_file(dnet.relative_path)
+        self.c2s_names[dnet.relative_path] = frozenset(p.name for p in dnet.c2s_list)
+        s2c = [p.name for p in dnet.s2c_list]
+        self._s2c_by_file[dnet.relative_path] = s2c
+        self.s2c_counts.update(s2c)
+
+    def remove_file(self, relative_path: str):
+        """移除单个文件"""
+        self.c2s_names.pop(relative_path, None)
+        for name in self._s2c_by_file.pop(relative_path, ()):
+            self.s2c_counts[name] -= 1
+            if self.s2c_counts[name] <= 0:
+                del self.s2c_counts[name]
+
+    def apply_delta(self, delta: ScanDelta) -> Set[str]:
+        """根据增量扫描结果更新，返回新出现或消失的S2C名称"""
+        before = set(self.s2c_counts)
+        for dnet in delta.removed:
+            self.remove_file(dnet.relative_path)
+        for dnet in delta.modified + delta.added:
+            self.add_file(dnet)
+        return before.symmetric_difference(self.s2c_counts)
+
+    def has_c2s(self, relative_path: str, name: str) -> bool:
+        return name in self.c2s_names.get(relative_path, ())
+
+    def has_s2c(self, name: str) -> bool:
+        return name in self.s2c_counts
+
+    def files(self) -> List[str]:
+        """所有文件的相对路径（排序）"""
+        return sorted(self.c2s_names)
+
+    def copy(self) -> 'SymbolTable':
+        """副本（后台验证使用，之后主线程的增量更新不影响副本）"""
+        table = SymbolTable()
+        table.c2s_names = dict(self.c2s_names)
+        table.s2c_counts = Counter(self.s2c_counts)
+        table._s2c_by_file = dict(self._s2c_by_file)
+        return table
+
+
+def check_config(relative_path: str, config: C2SConfig, symbols: SymbolTable) -> List[Diagnostic]:
+    """验证单个配置"""
+    diagnostics = []
+    file_name = os.path.basename(relative_path)
+
+    for c2s_name, mapping in config.c2s_mappings.items():
+        # 检查C2S是否存在于dnet文件中
+        if not symbols.has_c2s(relative_path, c2s_name):
+            diagnostics.append(Diagnostic(
+                relative_path, c2s_name, None, C2S_NOT_FOUND,
+                f"C2S协议 '{c2s_name}' 不存在于 {file_name} 中"))
+
+        # 检查配置的S2C是否存在
+        for i, resp in enumerate(mapping.responses):
+            if not symbols.has_s2c(resp.protocol):
+                diagnostics.append(Diagnostic(
+                    relative_path, c2s_name, i, S2C_NOT_FOUND,
+                    f"C2S '{c2s_name}' 配置的S2C '{resp.protocol}' 不存在于任何.dnet文件中"))
+
+    return diagnostics
+
+
+class ValidationEngine:
+    """
+    项目级配置验证引擎
+    - 符号表只构建一次，所有配置共用
+    - validate_all() 可使用进程池并行验证
+    - apply_delta() / revalidate() 只重新验证受变化影响的配置
+    - start_validate_all() 在后台线程验证所有配置（界面使用，见ValidationJob）
+    结果保存在results中: .dnet相对路径 -> [Diagnostic]（没有配置或没有问题的文件不出现）
+    """
+
+    def __init__(self, config_manager: ConfigManager, dnet_files: Iterable[DnetFile] = ()):
+        self.config_manager = config_manager
+        self.symbols = SymbolTable(dnet_files)
+        self.results: Dict[str, List[Diagnostic]] = {}
+        # 符号表版本，重建或增量更新时递增，用于丢弃按旧符号表得到的后台验证结果
+        self._generation = 0
+        # 后台验证期间在主线程单独验证过的文件，记录后台结果时保留这些文件较新的结果
+        self._validated_during_job: Set[str] = set()
+
+    def rebuild(self, dnet_files: Iterable[DnetFile]):
+        """重建符号表，清空之前的验证结果"""
+        self.symbols.rebuild(dnet_files)
+        self.results = {}
+        self._generation += 1
+
+    def validate(self, relative_path: str, config: Optional[C2SConfig] = None) -> List[Diagnostic]:
+        """验证单个配置（config为None时读取已保存的配置）并记录结果"""
+        if config is None:
+            config = self.config_manager.peek_config(relative_path)
+        diagnostics = check_config(relative_path, config, self.symbols) if config else []
+        self._record(relative_path, diagnostics)
+        self._validated_during_job.add(relative_path)
+        return diagnostics
+
+    def validate_all(self, parallel: bool = False,
+                     max_workers: Optional[int] = None) -> Dict[str, List[Diagnostic]]:
+        """验证所有已保存的配置"""
+        paths = self.symbols.files()
+        if parallel and len(paths) >= PARALLEL_MIN_CONFIGS:
+            results = self._validate_parallel(paths, max_workers)
+        else:
+            results = [self._check_saved(p) for p in paths]
+
+        self.results = {}
+        for relative_path, diagnostics in zip(paths, results):
+            self._record(relative_path, diagnostics)
+        return self.results
+
+    def start_validate_all(self, parallel: bool = False,
+                           max_workers: Optional[int] = None) -> 'ValidationJob':
+        """在后台线程验证所有已保存的配置，立即返回；完成后调用finish_validate_all()记录结果"""
+        self._validated_during_job = set()
+        job = ValidationJob(self, parallel, max_workers)
+        job.start()
+        return job
+
+    def finish_validate_all(self, job: 'ValidationJob') -> bool:
+        """
+        记录已完成的后台验证结果（在主线程调用）
+        验证失败或验证期间符号表已变化（重新加载、刷新）时丢弃结果，返回False
+        """
+        if job.results is None or job.generation != self._generation:
+            return False
+        results = dict(job.results)
+        for relative_path in self._validated_during_job:
+            if relative_path in self.results:
+                results[relative_path] = self.results[relative_path]
+            else:
+                results.pop(relative_path, None)
+        self.results = results
+        return True
+
+    def revalidate(self, relative_paths: Iterable[str]) -> Set[str]:
+        """重新验证指定的配置（已不存在的.dnet文件清除其结果），返回涉及的文件"""
+        affected = set()
+        for relative_path in relative_paths:
+            affected.add(relative_path)
+            if relative_path in self.symbols.c2s_names:
+                self.validate(relative_path)
+            else:
+                self.results.pop(relative_path, None)
+                self._validated_during_job.add(relative_path)
+        return affected
+
+    def apply_delta(self, delta: ScanDelta) -> Set[str]:
+        """
+        根据增量扫描结果更新符号表并重新验证受影响的配置：
+        - 变化的.dnet文件自身的配置（C2S可能增删）
+        - 引用了新出现或消失的S2C的配置（通过ConfigManager的反向触发索引查找）
+        返回重新验证的文件
+        """
+        changed_s2c = self.symbols.apply_delta(delta)
+        self._generation += 1
+        affected = {d.relative_path for d in delta.added + delta.modified + delta.removed}
+        for name in changed_s2c:
+            for ref in self.config_manager.find_triggers(name):
+                affected.add(ref.dnet_file)
+        return self.revalidate(sorted(affected))
+
+    def diagnostics(self) -> List[Diagnostic]:
+        """所有验证结果（按文件排序）"""
+        result = []
+        for relative_path in sorted(self.results):
+            result.extend(self.results[relative_path])
+        return result
+
+    def _check_saved(self, relative_path: str) -> List[Diagnostic]:
+        """验证已保存的配置（不记录结果）"""
+        config = self.config_manager.peek_config(relative_path)
+        return check_config(relative_path, config, self.symbols) if config else []
+
+    def _record(self, relative_path: str, diagnostics: List[Diagnostic]):
+        if diagnostics:
+            self.results[relative_path] = diagnostics
+        else:
+            self.results.pop(relative_path, None)
+
+    def _validate_parallel(self, paths: List[str],
+                           max_workers: Optional[int]) -> List[List[Diagnostic]]:
+        """使用进程池验证，结果顺序与paths一致；进程池不可用时退回串行"""
+        workers = max_workers or os.cpu_count() or 1
+        if workers <= 1:
+            return [self._check_saved(p) for p in paths]
+
+        # 每个进程分到若干批任务，减少进程间通信次数；符号表只在进程启动时传递一次
+        chunksize = max(1, len(paths) // (workers * 4))
+        manager = self.config_manager
+        # 子进程从磁盘读取配置，先等待后台保存写完（结果留给界面的poll_saves()处理）
+        manager.wait_saves()
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(manager.proto_root, manager.config_root, self.symbols,
+                                               manager.store.db_path if manager.store else None)) as executor:
+                return list(executor.map(_validate_worker, paths, chunksize=chunksize))
+        except (OSError, BrokenProcessPool) as e:
+            print(f"并行验证失败，改为串行验证: {e}")
+            return [self._check_saved(p) for p in paths]
+
+
+class ValidationJob:
+    """
+    后台验证所有已保存的配置（由ValidationEngine.start_validate_all()创建并启动）
+    - 验证线程使用自己的ConfigManager从磁盘读取配置，不与主线程共享配置缓存和数据库连接；
+      符号表使用启动时的副本，并行验证时由验证线程启动进程池
+    - 主线程定时检查 is_done()，完成后调用 ValidationEngine.finish_validate_all() 记录结果
+    """
+
+    def __init__(self, engine: ValidationEngine, parallel: bool = False, max_workers: Optional[int] = None):
+        manager = engine.config_manager
+        self.generation = engine._generation  # 启动时的符号表版本
+        self.parallel = parallel
+        self.max_workers = max_workers
+        self.results: Optional[Dict[str, List[Diagnostic]]] = None  # 验证结果，失败时为None
+        self.error: Optional[str] = None  # 验证失败的原因
+        self._symbols = engine.symbols.copy()
+        self._wait_saves = manager.wait_saves
+        self._roots = (manager.proto_root, manager.config_root, manager.store.db_path if manager.store else None)
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="ValidationJob", daemon=True)
+        self._thread.start()
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def is_done(self) -> bool:
+        """验证线程已结束"""
+        return self._thread is not None and not self._thread.is_alive()
+
+    def _run(self):
+        try:
+            # 从磁盘读取配置，先等待主线程提交的后台保存写完
+            self._wait_saves()
+            proto_root, config_root, db_path = self._roots
+            store = SqliteConfigStore(db_path) if db_path else None
+            manager = ConfigManager(proto_root, config_root, store=store)
+            try:
+                engine = ValidationEngine(manager)
+                engine.symbols = self._symbols
+                self.results = engine.validate_all(self.parallel, self.max_workers)
+            finally:
+                manager.close()
+        except Exception as e:
+            self.error = str(e)
+
+
+# 子进程中的验证上下文（由_init_worker设置）
+_worker_manager: Optional[ConfigManager] = None
+_worker_symbols: Optional[SymbolTable] = None
+
+
+def _init_worker(proto_root: str, config_root: str, symbols: SymbolTable, db_path: Optional[str]):
+    """进程池初始化函数（使用数据库时每个进程打开自己的连接）"""
+    global _worker_manager, _worker_symbols
+    store = SqliteConfigStore(db_path) if db_path else None
+    _worker_manager = ConfigManager(proto_root, config_root, store=store)
+    _worker_symbols = symbols
+
+
+def _validate_worker(relative_path: str) -> List[Diagnostic]:
+    """进程池任务：在子进程中读取并验证单个配置（必须是模块级函数才能被pickle）"""
+    config = _worker_manager.peek_config(relative_path)
+    return check_config(relative_path, config, _worker_symbols) if config else []
+
+
+if __name__ == '__main__':
+    # 测试代码
+    from dnet_parser import DnetParser
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    root_dir = os.path.dirname(script_dir)
+    proto_dir = os.path.join(root_dir, 'proto')
+    config_dir = os.path.join(root_dir, 'clientconfig')
+
+    dnet_files = DnetParser().scan_directory(proto_dir)
+    engine = ValidationEngine(ConfigManager(proto_dir, config_dir), dnet_files)
+    engine.validate_all()
+    print(f"验证 {len(dnet_files)} 个文件，发现 {len(engine.diagnostics())} 个问题")
+    for d in engine.diagnostics():
+        print(f"  [{d.file}] {d.code} {d.c2s}#{d.response_index}: {d.message}")
@@ -0,0 +1,129 @@
+"""
+配置文件后台写入模块
+"""
+import json
+import os
+import queue
+import threading
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+
+class SaveResult(NamedTuple):
+    """一次写入的结果（由写入线程放入结果队列）"""
+    key: str  # 提交时的标识（ConfigManager中为.dnet相对路径）
+    path: str  # 写入的文件路径
+    seq: int  # 提交序号，同一文件的后续提交序号更大
+    stamp: Optional[Tuple[int, int]]  # 写入后的(文件大小, 修改时间)，失败时为None
+    error: Optional[str]  # 失败原因，成功时为None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def write_json_atomic(path: str, data, **dump_kwargs) -> os.stat_result:
+    """原子写入JSON文件（见write_text_atomic）"""
+    return write_text_atomic(path, json.dumps(data, **dump_kwargs))
+
+
+def write_text_atomic(path: str, text: Union[str, List[str]]) -> os.stat_result:
+    """
+    写入文本文件（text可以是依次写出的片段列表）：先写同目录下的临时文件并刷到磁盘，再替换目标文件
+    写入过程中崩溃只会留下临时文件，原文件保持完整
+    """
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            if isinstance(text, str):
+                f.write(text)
+            else:
+                f.writelines(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return os.stat(path)
+
+
+class ConfigWriter:
+    """
+    后台写入线程
+    - submit() 只登记待写入的文本（或文本片段列表），立即返回
+    - 同一文件在写入前多次提交时只写最后一次
+    - 写入结果放入线程安全的队列，由主线程调用 poll() 取出
+    """
+
+    def __init__(self):
+        self._pending: "OrderedDict[str, Tuple[str, int, Union[str, List[str]]]]" = OrderedDict()
+        self._results: "queue.Queue[SaveResult]" = queue.Queue()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, key: str, path: str, seq: int, text: Union[str, List[str]]):
+        """提交写入任务（片段列表提交后不能再修改）"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("写入线程已关闭")
+            self._pending[path] = (key, seq, text)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ConfigWriter", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def poll(self) -> List[SaveResult]:
+        """取出所有已完成的写入结果（不阻塞）"""
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待所有已提交的任务写完，超时返回False"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """写完剩余任务后结束线程"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                path, (key, seq, text) = self._pending.popitem(last=False)
+                self._busy = True
+
+            try:
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                st = write_text_atomic(path, text)
+                result = SaveResult(key, path, seq, (st.st_size, st.st_mtime_ns), None)
+            except Exception as e:
+                result = SaveResult(key, path, seq, None, str(e))
+
+            # 先放入结果再清除忙碌标记，flush()返回时结果一定已在队列中
+            self._results.put(result)
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+协议配置工具 - 命令行入口（无需图形界面，用于构建流水线）
+
+用法:
+    python dnet_cli.py scan [--json]
+    python dnet_cli.py validate [--json] [--output FILE]
+    python dnet_cli.py export --output DIR
+    python dnet_cli.py db-import --config-db FILE
+    python dnet_cli.py db-export --config-db FILE
+
+通用参数:
+    --proto-dir DIR     协议目录（默认为上级目录的proto）
+    --config-dir DIR    配置目录（默认为上级目录的clientconfig）
+    --config-db FILE    使用SQLite配置数据库代替配置目录（db-import/db-export为导入导出的数据库）
+    --workers N         并行进程数（默认CPU核数）
+    --no-cache          不使用解析缓存
+
+退出码: 0 成功；1 验证发现问题；2 参数或目录错误
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+# 将脚本目录添加到路径
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path:
+    sys.path.insert(0, script_dir)
+
+from typing import List, Optional
+
+from dnet_parser import DnetParser, DnetFile, Field
+from parse_cache import ParseCache, CACHE_FILE_NAME
+from config_manager import ConfigManager
+from config_store import SqliteConfigStore, import_json, export_json
+from config_validator import ValidationEngine
+from opcode_table import OpcodeTable
+
+
+EXIT_OK = 0
+EXIT_DIAGNOSTICS = 1
+EXIT_ERROR = 2
+
+
+def _base_path() -> str:
+    """脚本所在目录（打包后为exe所在目录），与GUI的解析缓存位置一致"""
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return script_dir
+
+
+def _default_root() -> str:
+    base_path = _base_path()
+    return base_path if getattr(sys, 'frozen', False) else os.path.dirname(base_path)
+
+
+def fields_to_list(fields: List[Field]) -> list:
+    """字段列表转换为可序列化的结构（forlist的元素字段放在children中）"""
+    result = []
+    for f in fields:
+        item = {"name": f.name, "type": f.type_info, "description": f.description}
+        if f.children is not None:
+            item["children"] = fields_to_list(f.children)
+        result.append(item)
+    return result
+
+
+def catalog_to_dict(dnet_files: List[DnetFile]) -> dict:
+    """协议目录转换为可序列化的结构"""
+    def protocols(items):
+        return [{"index": p.index, "name": p.name, "description": p.description,
+                 "opcode": list(p.opcode), "fields": fields_to_list(p.fields)} for p in items]
+
+    return {
+        "files": [
+            {
+                "relative_path": d.relative_path,
+                "version": d.version,
+                "description": d.description,
+                "c2s_module": d.c2s_module,
+                "s2c_module": d.s2c_module,
+                "c2s": protocols(d.c2s_list),
+                "s2c": protocols(d.s2c_list),
+            }
+            for d in dnet_files
+        ]
+    }
+
+
+def _scan(args) -> Optional[List[DnetFile]]:
+    """扫描协议目录（并行 + 解析缓存）"""
+    if not os.path.isdir(args.proto_dir):
+        print(f"协议目录不存在: {args.proto_dir}", file=sys.stderr)
+        return None
+    cache = None if args.no_cache else ParseCache(os.path.join(_base_path(), CACHE_FILE_NAME))
+    return DnetParser().scan_directory(args.proto_dir, parallel=True,
+                                       max_workers=args.workers, cache=cache)
+
+
+def _config_manager(args) -> Optional[ConfigManager]:
+    """创建配置管理器（指定--config-db时使用数据库），数据库或配置目录不存在时返回None"""
+    if args.config_db:
+        if not os.path.isfile(args.config_db):
+            print(f"配置数据库不存在: {args.config_db}", file=sys.stderr)
+            return None
+        return ConfigManager(args.proto_dir, args.config_dir, store=SqliteConfigStore(args.config_db))
+    if not os.path.isdir(args.config_dir):
+        print(f"配置目录不存在: {args.config_dir}", file=sys.stderr)
+        return None
+    return ConfigManager(args.proto_dir, args.config_dir)
+
+
+def _write_json(data: dict, output: Optional[str]):
+    """输出JSON到文件或标准输出"""
+    text = json.dumps(data, ensure_ascii=False, indent=2)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+def cmd_scan(args) -> int:
+    """扫描协议目录并输出统计（协议数、协议号冲突）"""
+    start = time.perf_counter()
+    dnet_files = _scan(args)
+    if dnet_files is None:
+        return EXIT_ERROR
+    elapsed = time.perf_counter() - start
+
+    table = OpcodeTable(dnet_files)
+    c2s_count = sum(len(d.c2s_list) for d in dnet_files)
+    s2c_count = sum(len(d.s2c_list) for d in dnet_files)
+    collisions = [
+        {"opcode": str(c.key), "protocols": [{"file": r.dnet.relative_path, "name": r.protocol.name}
+                                             for r in c.refs]}
+        for c in table.collisions
+    ]
+
+    if args.json:
+        _write_json({"files": len(dnet_files), "c2s": c2s_count, "s2c": s2c_count,
+                     "opcode_collisions": collisions, "elapsed": round(elapsed, 3)}, args.output)
+    else:
+        print(f"扫描完成: {len(dnet_files)} 个文件, C2S {c2s_count} 个, S2C {s2c_count} 个, "
+              f"耗时 {elapsed:.2f}s")
+        for c in collisions:
+            names = ", ".join(f"{p['name']}({p['file']})" for p in c["protocols"])
+            print(f"  协议号冲突 {c['opcode']}: {names}")
+    return EXIT_OK
+
+
+def cmd_validate(args) -> int:
+    """验证所有配置，发现问题时退出码为1"""
+    start = time.perf_counter()
+    dnet_files = _scan(args)
+    if dnet_files is None:
+        return EXIT_ERROR
+
+    manager = _config_manager(args)
+    if manager is None:
+        return EXIT_ERROR
+    engine = ValidationEngine(manager, dnet_files)
+    engine.validate_all(parallel=True, max_workers=args.workers)
+    diagnostics = engine.diagnostics()
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        _write_json({
+            "files": len(dnet_files),
+            "diagnostics": [d._asdict() for d in diagnostics],
+            "elapsed": round(elapsed, 3),
+        }, args.output)
+    else:
+        for d in diagnostics:
+            print(f"[{d.file}] {d.code}: {d.message}")
+        print(f"验证完成: {len(dnet_files)} 个文件, {len(diagnostics)} 个问题, 耗时 {elapsed:.2f}s")
+    return EXIT_DIAGNOSTICS if diagnostics else EXIT_OK
+
+
+def cmd_export(args) -> int:
+    """导出协议目录（catalog.json）和所有配置（configs/下与配置目录相同的结构）"""
+    dnet_files = _scan(args)
+    if dnet_files is None:
+        return EXIT_ERROR
+
+    manager = _config_manager(args)
+    if manager is None:
+        return EXIT_ERROR
+
+    os.makedirs(args.output, exist_ok=True)
+    _write_json(catalog_to_dict(dnet_files), os.path.join(args.output, 'catalog.json'))
+
+    exported = 0
+    failed = 0
+    for dnet in dnet_files:
+        config = manager.peek_config(dnet.relative_path)
+        if config is None:
+            continue
+        export_path = os.path.join(args.output, 'configs', os.path.splitext(dnet.relative_path)[0] + '.json')
+        os.makedirs(os.path.dirname(export_path), exist_ok=True)
+        if manager.export_config(config, export_path):
+            exported += 1
+        else:
+            failed += 1
+
+    print(f"导出完成: {len(dnet_files)} 个协议文件, {exported} 个配置 -> {args.output}")
+    return EXIT_ERROR if failed else EXIT_OK
+
+
+def cmd_db_import(args) -> int:
+    """把配置目录中的JSON配置导入数据库"""
+    if not os.path.isdir(args.config_dir):
+        print(f"配置目录不存在: {args.config_dir}", file=sys.stderr)
+        return EXIT_ERROR
+    store = SqliteConfigStore(args.config_db)
+    count = import_json(store, args.config_dir)
+    store.close()
+    print(f"导入完成: {count} 个配置 -> {args.config_db}")
+    return EXIT_OK
+
+
+def cmd_db_export(args) -> int:
+    """把数据库中的配置导出到配置目录（JSON格式与工具保存的文件相同）"""
+    if not os.path.isfile(args.config_db):
+        print(f"配置数据库不存在: {args.config_db}", file=sys.stderr)
+        return EXIT_ERROR
+    store = SqliteConfigStore(args.config_db)
+    count = export_json(store, args.config_dir)
+    store.close()
+    print(f"导出完成: {count} 个配置 -> {args.config_dir}")
+    return EXIT_OK
+
+
+def main(argv=None) -> int:
+    root_dir = _default_root()
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--proto-dir", default=os.path.join(root_dir, 'proto'), help="协议目录")
+    common.add_argument("--config-dir", default=os.path.join(root_dir, 'clientconfig'), help="配置目录")
+    common.add_argument("--config-db", default=None, help="SQLite配置数据库（代替配置目录）")
+    common.add_argument("--workers", type=int, default=None, help="并行进程数（默认CPU核数）")
+    common.add_argument("--no-cache", action="store_true", help="不使用解析缓存")
+
+    arg_parser = argparse.ArgumentParser(description="协议配置工具命令行")
+    sub = arg_parser.add_subparsers(dest="command")
+    sub.required = True
+
+    scan_cmd = sub.add_parser("scan", parents=[common], help="扫描协议目录")
+    scan_cmd.add_argument("--json", action="store_true", help="输出JSON")
+    scan_cmd.add_argument("--output", help="JSON输出文件（默认标准输出）")
+    scan_cmd.set_defaults(func=cmd_scan)
+
+    validate_cmd = sub.add_parser("validate", parents=[common], help="验证所有配置")
+    validate_cmd.add_argument("--json", action="store_true", help="输出JSON报告")
+    validate_cmd.add_argument("--output", help="JSON报告输出文件（默认标准输出）")
+    validate_cmd.set_defaults(func=cmd_validate)
+
+    export_cmd = sub.add_parser("export", parents=[common], help="导出协议目录和配置")
+    export_cmd.add_argument("--output", required=True, help="导出目录")
+    export_cmd.set_defaults(func=cmd_export)
+
+    db_import_cmd = sub.add_parser("db-import", parents=[common], help="把配置目录导入SQLite数据库")
+    db_import_cmd.set_defaults(func=cmd_db_import)
+
+    db_export_cmd = sub.add_parser("db-export", parents=[common], help="把SQLite数据库导出为配置目录")
+    db_export_cmd.set_defaults(func=cmd_db_export)
+
+    args = arg_parser.parse_args(argv)
+    if args.command in ("db-import", "db-export") and not args.config_db:
+        arg_parser.error(f"{args.command} 需要 --config-db")
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    # 打包后并行解析的子进程需要此调用才能正确启动
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,691 @@
+"""
+协议二进制编解码模块
+
+根据字段的类型描述（Field.type_info）把每个协议编译成专用的编码/解码函数：
+- 1/2/4/8  有符号整数，连续的定长字段合并为一个预编译的struct格式
+- 2p       2字节长度前缀 + 原始字节（bytes）
+- 2ps      2字节长度前缀 + UTF-8字符串（str）
+- forlist  2字节元素个数 + 逐个元素（元素字段按同样规则编码），解码为字典列表
+"""
+import re
+import struct
+from array import array
+from operator import itemgetter
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from dnet_parser import DnetFile, Field, Protocol, FORLIST_TYPE
+
+
+# 默认字节序（struct格式前缀：'<' 小端，'>' / '!' 大端）
+DEFAULT_BYTE_ORDER = '<'
+
+# forlist元素个数前缀的宽度（字节，无符号）
+FORLIST_COUNT_WIDTH = 2
+
+# 整数宽度 -> struct格式字符
+_INT_FORMATS = {1: 'b', 2: 'h', 4: 'i', 8: 'q'}
+
+# 长度前缀宽度 -> struct格式字符（长度无符号）
+_PREFIX_FORMATS = {1: 'B', 2: 'H', 4: 'I'}
+
+_TYPE_RE = re.compile(r'(\d+)(ps|p)?$')
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+class CodecError(ValueError):
+    """类型描述无效或数据无法编解码"""
+
+
+class FieldType(NamedTuple):
+    """字段的线上类型"""
+    kind: str  # 'int'、'bytes'、'str' 或 'list'
+    width: int  # 整数宽度、长度前缀宽度或元素个数前缀宽度（字节）
+
+
+def parse_type(type_info: str) -> FieldType:
+    """解析字段类型描述，如 '4' -> ('int', 4)，'2ps' -> ('str', 2)"""
+    if type_info == FORLIST_TYPE:
+        return FieldType('list', FORLIST_COUNT_WIDTH)
+
+    m = _TYPE_RE.match(type_info.strip())
+    if not m:
+        raise CodecError(f"无法识别的字段类型: {type_info}")
+
+    width = int(m.group(1))
+    suffix = m.group(2)
+    if suffix is None:
+        if width not in _INT_FORMATS:
+            raise CodecError(f"不支持的整数宽度: {type_info}")
+        return FieldType('int', width)
+
+    if width not in _PREFIX_FORMATS:
+        raise CodecError(f"不支持的长度前缀宽度: {type_info}")
+    return FieldType('str' if suffix == 'ps' else 'bytes', width)
+
+
+def _array_typecode(width: int) -> str:
+    """整数宽度对应的array类型码（不同平台上'i'/'l'的宽度不同，按itemsize查找）"""
+    for typecode in 'bhilq':
+        if array(typecode).itemsize == width:
+            return typecode
+    raise CodecError(f"当前平台不支持 {width} 字节整数数组")
+
+
+# 解码步骤: (buf, offset, values) -> 新的offset，解码出的值按字段顺序追加到values
+DecodeStep = Callable[[Buffer, int, list], int]
+# 编码步骤: (values, parts) -> None
+EncodeStep = Callable[[dict, list], None]
+
+
+def _fixed_run_steps(byte_order: str, names: List[str],
+                     formats: List[str]) -> Tuple[DecodeStep, EncodeStep, struct.Struct]:
+    """连续定长字段：一次struct调用处理整段"""
+    packer = struct.Struct(byte_order + ''.join(formats))
+    unpack_from = packer.unpack_from
+    pack = packer.pack
+    size = packer.size
+    names = tuple(names)
+
+    def decode(buf, offset, out):
+        out.extend(unpack_from(buf, offset))
+        return offset + size
+
+    if len(names) == 1:
+        name = names[0]
+
+        def encode(values, parts):
+            parts.append(pack(values[name]))
+    else:
+        getter = itemgetter(*names)
+
+        def encode(values, parts):
+            parts.append(pack(*getter(values)))
+
+    return decode, encode, packer
+
+
+def _var_steps(byte_order: str, name: str, field_type: FieldType) -> Tuple[DecodeStep, EncodeStep]:
+    """长度前缀字段"""
+    prefix = struct.Struct(byte_order + _PREFIX_FORMATS[field_type.width])
+    unpack_prefix = prefix.unpack_from
+    pack_prefix = prefix.pack
+    prefix_size = prefix.size
+    max_length = (1 << (8 * field_type.width)) - 1
+    is_str = field_type.kind == 'str'
+
+    def decode(buf, offset, out):
+        length = unpack_prefix(buf, offset)[0]
+        start = offset + prefix_size
+        end = start + length
+        if end > len(buf):
+            raise CodecError(f"字段 {name} 长度越界: 需要 {length} 字节")
+        raw = bytes(buf[start:end])
+        out.append(raw.decode('utf-8') if is_str else raw)
+        return end
+
+    def encode(values, parts):
+        value = values[name]
+        raw = value.encode('utf-8') if isinstance(value, str) else bytes(value)
+        if len(raw) > max_length:
+            raise CodecError(f"字段 {name} 过长: {len(raw)} 字节")
+        parts.append(pack_prefix(len(raw)))
+        parts.append(raw)
+
+    return decode, encode
+
+
+def _list_steps(byte_order: str, list_field: Field, field_type: FieldType,
+                bulk_lists: bool) -> Tuple[DecodeStep, EncodeStep]:
+    """
+    forlist字段：元素个数前缀 + 元素
+    元素全部为定长整数时整段处理（struct.iter_unpack）；bulk_lists=True时进一步解码为array：
+    - 单字段元素（如 iCharID,2）解码为一个array
+    - 多字段元素解码为 字段名 -> array 的列字典
+    """
+    name = list_field.name
+    count_struct = struct.Struct(byte_order + _PREFIX_FORMATS[field_type.width])
+    unpack_count = count_struct.unpack_from
+    pack_count = count_struct.pack
+    count_size = count_struct.size
+    max_count = (1 << (8 * field_type.width)) - 1
+
+    children = list_field.children or []
+    element = _FieldsCodec(children, byte_order, bulk_lists)
+    element_struct = element.fixed_struct
+    names = element.names
+
+    def pack_checked_count(count):
+        if count > max_count:
+            raise CodecError(f"字段 {name} 元素过多: {count}")
+        return pack_count(count)
+
+    # ---------- 元素不定长：逐个元素编解码 ----------
+    if element_struct is None or not names:
+        element_decode = element.decode_from
+        element_encode = element.encode_into
+
+        def decode(buf, offset, out):
+            count = unpack_count(buf, offset)[0]
+            offset += count_size
+            items = []
+            for _ in range(count):
+                item, offset = element_decode(buf, offset)
+                items.append(item)
+            out.append(items)
+            return offset
+
+        def encode(values, parts):
+            items = values[name]
+            parts.append(pack_checked_count(len(items)))
+            for item in items:
+                element_encode(item, parts)
+
+        return decode, encode
+
+    # ---------- 元素定长：整段处理 ----------
+    size = element_struct.size
+    iter_unpack = element_struct.iter_unpack
+    pack = element_struct.pack
+    getter = itemgetter(*names)
+    single = len(names) == 1
+    first_name = names[0]
+
+    def slice_items(buf, offset):
+        count = unpack_count(buf, offset)[0]
+        start = offset + count_size
+        end = start + count * size
+        if end > len(buf):
+            raise CodecError(f"字段 {name} 长度越界: 需要 {count} 个元素")
+        return buf[start:end], end
+
+    def encode_items(items, parts):
+        parts.append(pack_checked_count(len(items)))
+        if single:
+            parts.extend(pack(item[first_name]) for item in items)
+        else:
+            parts.extend(pack(*getter(item)) for item in items)
+
+    if not bulk_lists:
+        if single:
+            def decode(buf, offset, out):
+                chunk, end = slice_items(buf, offset)
+                out.append([{first_name: value} for (value,) in iter_unpack(chunk)])
+                return end
+        else:
+            def decode(buf, offset, out):
+                chunk, end = slice_items(buf, offset)
+                out.append([dict(zip(names, values)) for values in iter_unpack(chunk)])
+                return end
+
+        def encode(values, parts):
+            encode_items(values[name], parts)
+
+        return decode, encode
+
+    # ---------- 批量模式：解码为array ----------
+    widths = [parse_type(f.type_info).width for f in children]
+    typecodes = [_array_typecode(width) for width in widths]
+    swap = struct.pack(byte_order + 'h', 1) != array('h', [1]).tobytes()
+    stride = len(names)
+
+    if len(set(widths)) == 1:
+        # 所有元素字段等宽：整段读入一个array，按步长切出各列（全部在C层完成）
+        typecode = typecodes[0]
+
+        def decode_flat(chunk):
+            flat = array(typecode)
+            flat.frombytes(chunk)
+            if swap:
+                flat.byteswap()
+            return flat
+
+        def encode_flat(flat, parts):
+            if swap:
+                flat = array(typecode, flat)
+                flat.byteswap()
+            parts.append(flat.tobytes())
+
+        if single:
+            def decode(buf, offset, out):
+                chunk, end = slice_items(buf, offset)
+                out.append(decode_flat(chunk))
+                return end
+
+            def encode(values, parts):
+                items = values[name]
+                if not isinstance(items, array):
+                    encode_items(items, parts)
+                    return
+                parts.append(pack_checked_count(len(items)))
+                encode_flat(items if items.typecode == typecode else array(typecode, items), parts)
+        else:
+            def decode(buf, offset, out):
+                chunk, end = slice_items(buf, offset)
+                flat = decode_flat(chunk)
+                out.append({n: flat[i::stride] for i, n in enumerate(names)})
+                return end
+
+            def encode(values, parts):
+                items = values[name]
+                if not isinstance(items, dict):
+                    encode_items(items, parts)
+                    return
+                count = len(items[first_name])
+                parts.append(pack_checked_count(count))
+                flat = array(typecode, [0]) * (count * stride)
+                for i, n in enumerate(names):
+                    column = items[n]
+                    if not (isinstance(column, array) and column.typecode == typecode):
+                        column = array(typecode, column)
+                    flat[i::stride] = column
+                encode_flat(flat, parts)
+
+        return decode, encode
+
+    # 元素字段宽度不同：整段解包后转置为列
+    def decode(buf, offset, out):
+        chunk, end = slice_items(buf, offset)
+        rows = list(iter_unpack(chunk))
+        columns = zip(*rows) if rows else [()] * stride
+        out.append({n: array(t, c) for n, t, c in zip(names, typecodes, columns)})
+        return end
+
+    def encode(values, parts):
+        items = values[name]
+        if not isinstance(items, dict):
+            encode_items(items, parts)
+            return
+        columns = [items[n] for n in names]
+        parts.append(pack_checked_count(len(columns[0])))
+        parts.extend(pack(*row) for row in zip(*columns))
+
+    return decode, encode
+
+
+class _FieldsCodec:
+    """编译后的字段序列（协议的字段，或forlist的元素字段）"""
+
+    def __init__(self, fields: List[Field], byte_order: str, bulk_lists: bool):
+        self.byte_order = byte_order
+        self.bulk_lists = bulk_lists
+        self.names: Tuple[str, ...] = tuple(f.name for f in fields)
+        # 所有字段都是定长整数时的整体struct，否则为None
+        self.fixed_struct: Optional[struct.Struct] = None
+
+        self._decode_steps: List[DecodeStep] = []
+        self._encode_steps: List[EncodeStep] = []
+        self._compile(fields)
+
+    def _compile(self, fields: List[Field]):
+        """把字段序列编译为解码/编码步骤"""
+        run_names: List[str] = []
+        run_formats: List[str] = []
+        last_struct = None
+
+        def flush_run():
+            nonlocal last_struct
+            if run_names:
+                decode, encode, last_struct = _fixed_run_steps(self.byte_order, run_names, run_formats)
+                self._decode_steps.append(decode)
+                self._encode_steps.append(encode)
+                run_names.clear()
+                run_formats.clear()
+
+        has_var = False
+        for f in fields:
+            field_type = parse_type(f.type_info)
+            if field_type.kind == 'int':
+                run_names.append(f.name)
+                run_formats.append(_INT_FORMATS[field_type.width])
+                continue
+            flush_run()
+            has_var = True
+            if field_type.kind == 'list':
+                decode, encode = _list_steps(self.byte_order, f, field_type, self.bulk_lists)
+            else:
+                decode, encode = _var_steps(self.byte_order, f.name, field_type)
+            self._decode_steps.append(decode)
+            self._encode_steps.append(encode)
+        flush_run()
+
+        if not fields:
+            self.fixed_struct = struct.Struct(self.byte_order)
+        elif not has_var:
+            self.fixed_struct = last_struct
+
+    def decode_from(self, data: Buffer, offset: int = 0) -> Tuple[Dict[str, object], int]:
+        if self.fixed_struct is not None:
+            packer = self.fixed_struct
+            return dict(zip(self.names, packer.unpack_from(data, offset))), offset + packer.size
+        out = []
+        for step in self._decode_steps:
+            offset = step(data, offset, out)
+        return dict(zip(self.names, out)), offset
+
+    def encode_into(self, values: Dict[str, object], parts: list):
+        for step in self._encode_steps:
+            step(values, parts)
+
+
+class ProtocolCodec:
+    """
+    单个协议的编解码器（构造时编译，之后重复使用）
+    bulk_lists=True时，元素为定长整数的forlist解码为array（见_list_steps），编码时两种形式都接受
+    """
+
+    def __init__(self, protocol: Protocol, byte_order: str = DEFAULT_BYTE_ORDER,
+                 bulk_lists: bool = False):
+        self.protocol = protocol
+        self.byte_order = byte_order
+        self._fields = _FieldsCodec(protocol.fields, byte_order, bulk_lists)
+        self.names: Tuple[str, ...] = self._fields.names
+        # 全部字段定长时的消息长度，否则为None
+        fixed_struct = self._fields.fixed_struct
+        self.fixed_size = fixed_struct.size if fixed_struct is not None else None
+
+    def decode_from(self, data: Buffer, offset: int = 0) -> Tuple[Dict[str, object], int]:
+        """从offset处解码一条消息，返回(字段字典, 消息结束位置)"""
+        try:
+            return self._fields.decode_from(data, offset)
+        except (struct.error, UnicodeDecodeError) as e:
+            raise CodecError(f"解码 {self.protocol.name} 失败: {e}") from e
+
+    def decode(self, data: Buffer, offset: int = 0) -> Dict[str, object]:
+        """解码一条消息"""
+        return self.decode_from(data, offset)[0]
+
+    def encode(self, values: Dict[str, object]) -> bytes:
+        """编码一条消息，values为 字段名 -> 值（forlist字段的值为字典列表）"""
+        parts = []
+        try:
+            self._fields.encode_into(values, parts)
+        except CodecError:
+            raise
+        except KeyError as e:
+            raise CodecError(f"编码 {self.protocol.name} 失败: 缺少字段 {e}") from e
+        except (struct.error, TypeError, ValueError, OverflowError) as e:
+            raise CodecError(f"编码 {self.protocol.name} 失败: {e}") from e
+        return b''.join(parts)
+
+
+def compile_file(dnet: DnetFile, byte_order: str = DEFAULT_BYTE_ORDER,
+                 bulk_lists: bool = False) -> Dict[Tuple[str, str], ProtocolCodec]:
+    """编译文件中的所有协议，返回 (方向, 协议名) -> ProtocolCodec"""
+    codecs = {}
+    for direction, protocols in (('C2S', dnet.c2s_list), ('S2C', dnet.s2c_list)):
+        for protocol in protocols:
+            codecs[(direction, protocol.name)] = ProtocolCodec(protocol, byte_order, bulk_lists)
+    return codecs
+
+
+# ==================== 懒解码视图 ====================
+
+class _ViewLayout:
+    """
+    视图类的字段布局（编译时计算）
+    每个字段的起始位置表示为 (锚点, 偏移)：锚点为前一个变长字段的序号（-1表示消息起点），
+    偏移为锚点之后定长字段的总宽度。变长字段之前的字段位置在编译时即可确定
+    """
+
+    def __init__(self, fields: List[Field], byte_order: str):
+        self.names: Tuple[str, ...] = tuple(f.name for f in fields)
+        self.kinds: Dict[str, str] = {}
+        # 整数字段: 字段名 -> (锚点, 偏移, struct)
+        self.int_fields: Dict[str, Tuple[int, int, struct.Struct]] = {}
+        # 变长字段: (字段名, 类型, 与前一个变长字段结束位置的偏移, 长度/个数前缀struct, 元素视图类)
+        self.var_fields: List[Tuple[str, str, int, struct.Struct, Optional[type]]] = []
+        self.var_index: Dict[str, int] = {}
+        anchor = -1
+        delta = 0
+        for f in fields:
+            if f.name.startswith('_') or f.name in _VIEW_MEMBERS:
+                raise CodecError(f"字段名 {f.name} 与视图类的成员冲突，不能生成懒解码视图")
+            field_type = parse_type(f.type_info)
+            self.kinds[f.name] = field_type.kind
+            if field_type.kind == 'int':
+                packer = struct.Struct(byte_order + _INT_FORMATS[field_type.width])
+                self.int_fields[f.name] = (anchor, delta, packer)
+                delta += packer.size
+                continue
+            prefix = struct.Struct(byte_order + _PREFIX_FORMATS[field_type.width])
+            element_cls = None
+            if field_type.kind == 'list':
+                element_cls = _make_view_class(f.name + 'Item', f.children or [], byte_order)
+            self.var_index[f.name] = len(self.var_fields)
+            self.var_fields.append((f.name, field_type.kind, delta, prefix, element_cls))
+            anchor = len(self.var_fields) - 1
+            delta = 0
+        # 消息结束位置（最后一个变长字段之后还有delta字节定长字段）
+        self.tail = (anchor, delta)
+        self.fixed_size = delta if anchor < 0 else None
+
+
+class MessageView:
+    """
+    消息的懒解码视图：包装packet的memoryview，访问字段时才解码该字段
+    - 整数字段的位置在编译时预先计算（变长字段之后的字段位置在首次需要时计算并缓存）
+    - 2p字段返回memoryview切片（不复制），2ps字段返回解码后的str
+    - forlist字段返回ListView，元素同样是懒解码视图
+    由view_class()按协议生成子类，每个字段对应一个同名属性
+    """
+    __slots__ = ('_buf', '_base', '_ends')
+    _layout: _ViewLayout
+
+    def __init__(self, data: Buffer, offset: int = 0):
+        self._buf = data if type(data) is memoryview else memoryview(data)
+        self._base = offset
+        self._ends: List[int] = []  # 已计算出的变长字段结束位置
+
+    def _var_end(self, index: int) -> int:
+        """第index个变长字段的结束位置（按顺序计算并缓存）"""
+        ends = self._ends
+        buf = self._buf
+        var_fields = self._layout.var_fields
+        while len(ends) <= index:
+            j = len(ends)
+            name, kind, delta, prefix, element_cls = var_fields[j]
+            start = (ends[j - 1] if j else self._base) + delta
+            try:
+                count = prefix.unpack_from(buf, start)[0]
+            except struct.error as e:
+                raise CodecError(f"读取字段 {name} 失败: {e}") from e
+            body = start + prefix.size
+            if kind != 'list':
+                end = body + count
+            elif element_cls._layout.fixed_size is not None:
+                end = body + count * element_cls._layout.fixed_size
+            else:
+                end = body
+                for _ in range(count):
+                    end = element_cls(buf, end)._end()
+            if end > len(buf):
+                raise CodecError(f"字段 {name} 长度越界")
+            ends.append(end)
+        return ends[index]
+
+    def _var_body(self, index: int) -> Tuple[int, int]:
+        """第index个变长字段的 (内容起始位置, 长度或元素个数)"""
+        _, _, delta, prefix, _ = self._layout.var_fields[index]
+        start = (self._var_end(index - 1) if index else self._base) + delta
+        return start + prefix.size, prefix.unpack_from(self._buf, start)[0]
+
+    def _end(self) -> int:
+        anchor, delta = self._layout.tail
+        if anchor < 0:
+            return self._base + delta
+        return self._var_end(anchor) + delta
+
+    @property
+    def nbytes(self) -> int:
+        """消息的字节长度"""
+        return self._end() - self._base
+
+    def raw(self, name: str) -> memoryview:
+        """字段的原始字节（memoryview切片，不复制）"""
+        layout = self._layout
+        if name in layout.int_fields:
+            anchor, delta, packer = layout.int_fields[name]
+            start = self._base + delta if anchor < 0 else self._var_end(anchor) + delta
+            return self._buf[start:start + packer.size]
+        index = layout.var_index[name]
+        body, _ = self._var_body(index)
+        return self._buf[body:self._var_end(index)]
+
+    def __getitem__(self, name: str):
+        if name not in self._layout.kinds:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def to_dict(self) -> Dict[str, object]:
+        """完整解码为字典（与ProtocolCodec.decode的结果相同）"""
+        result = {}
+        for name in self._layout.names:
+            value = getattr(self, name)
+            kind = self._layout.kinds[name]
+            if kind == 'bytes':
+                value = bytes(value)
+            elif kind == 'list':
+                value = [item.to_dict() for item in value]
+            result[name] = value
+        return result
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.nbytes} bytes>"
+
+
+# 视图类自身的成员名，字段名不能与其相同（以下划线开头的字段名同样保留给内部使用）
+_VIEW_MEMBERS = frozenset(name for name in dir(MessageView) if not name.startswith('_'))
+
+
+class ListView:
+    """forlist字段的懒解码视图，元素为MessageView"""
+    __slots__ = ('_buf', '_start', '_count', '_element_cls', '_offsets')
+
+    def __init__(self, buf: memoryview, start: int, count: int, element_cls: type):
+        self._buf = buf
+        self._start = start
+        self._count = count
+        self._element_cls = element_cls
+        self._offsets: Optional[List[int]] = None  # 变长元素的起始位置（首次随机访问时计算）
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> MessageView:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("forlist索引越界")
+        element_cls = self._element_cls
+        size = element_cls._layout.fixed_size
+        if size is not None:
+            return element_cls(self._buf, self._start + index * size)
+        if self._offsets is None:
+            offsets = []
+            offset = self._start
+            for _ in range(self._count):
+                offsets.append(offset)
+                offset = element_cls(self._buf, offset)._end()
+            self._offsets = offsets
+        return element_cls(self._buf, self._offsets[index])
+
+    def __iter__(self):
+        element_cls = self._element_cls
+        offset = self._start
+        for _ in range(self._count):
+            item = element_cls(self._buf, offset)
+            yield item
+            offset = item._end()
+
+    def __repr__(self) -> str:
+        return f"<ListView {self._count} items>"
+
+
+def _int_property(name: str, anchor: int, delta: int, packer: struct.Struct) -> property:
+    unpack_from = packer.unpack_from
+    if anchor < 0:
+        def getter(self):
+            try:
+                return unpack_from(self._buf, self._base + delta)[0]
+            except struct.error as e:
+                raise CodecError(f"读取字段 {name} 失败: {e}") from e
+    else:
+        def getter(self):
+            ends = self._ends
+            end = ends[anchor] if anchor < len(ends) else self._var_end(anchor)
+            try:
+                return unpack_from(self._buf, end + delta)[0]
+            except struct.error as e:
+                raise CodecError(f"读取字段 {name} 失败: {e}") from e
+    return property(getter)
+
+
+def _var_property(name: str, index: int, kind: str, element_cls: Optional[type]) -> property:
+    def getter(self):
+        try:
+            body, count = self._var_body(index)
+        except struct.error as e:
+            raise CodecError(f"读取字段 {name} 失败: {e}") from e
+        if kind == 'list':
+            return ListView(self._buf, body, count, element_cls)
+        if body + count > len(self._buf):
+            raise CodecError(f"字段 {name} 长度越界: 需要 {count} 字节")
+        value = self._buf[body:body + count]
+        if kind == 'str':
+            try:
+                return str(value, 'utf-8')
+            except UnicodeDecodeError as e:
+                raise CodecError(f"读取字段 {name} 失败: {e}") from e
+        return value
+    return property(getter)
+
+
+def _make_view_class(class_name: str, fields: List[Field], byte_order: str) -> type:
+    layout = _ViewLayout(fields, byte_order)
+    namespace = {'__slots__': (), '_layout': layout}
+    for name, (anchor, delta, packer) in layout.int_fields.items():
+        namespace[name] = _int_property(name, anchor, delta, packer)
+    for name, index in layout.var_index.items():
+        _, kind, _, _, element_cls = layout.var_fields[index]
+        namespace[name] = _var_property(name, index, kind, element_cls)
+    return type(class_name, (MessageView,), namespace)
+
+
+def view_class(protocol: Protocol, byte_order: str = DEFAULT_BYTE_ORDER) -> type:
+    """
+    按协议生成懒解码视图类，用法: view_class(protocol)(packet).iHeroID
+    字段名（包括forlist元素的字段）与视图成员（nbytes、raw、to_dict）相同或以下划线开头时抛出CodecError
+    """
+    return _make_view_class(protocol.name + 'View', protocol.fields, byte_order)
+
+
+if __name__ == '__main__':
+    # 测试代码
+    import os
+    from dnet_parser import DnetParser
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    proto_file = os.path.join(os.path.dirname(script_dir), 'proto', 'nethero.dnet')
+
+    dnet = DnetParser().parse_file(proto_file)
+    if dnet:
+        codecs = compile_file(dnet)
+        samples = {
+            ('S2C', 'S2CAddHero'): {"iHeroID": 1001, "sHeroName": "测试英雄"},
+            ('S2C', 'S2CUpdateHero'): {"iHeroID": 1001, "sHeroName": "测试英雄",
+                                       "characterList": [{"iCharID": 1}, {"iCharID": 2}]},
+            ('C2S', 'C2SUpdateHeroName'): {"iHeroID": 1001, "iNewName": b"\x01\x02"},
+        }
+        for key, values in samples.items():
+            codec = codecs[key]
+            data = codec.encode(values)
+            print(f"{key[1]}: {data.hex()} -> {codec.decode(data)}")
+
+        bulk = ProtocolCodec(codecs[('S2C', 'S2CUpdateHero')].protocol, bulk_lists=True)
+        data = bulk.encode(samples[('S2C', 'S2CUpdateHero')])
+        print(f"S2CUpdateHero (bulk_lists): {bulk.decode(data)}")
+
+        hero_view = view_class(bulk.protocol)(data)
+        print(f"S2CUpdateHero (view): iHeroID={hero_view.iHeroID}, "
+              f"characterList[1].iCharID={hero_view.characterList[1].iCharID}, {hero_view.nbytes} 字节")
@@ -3,27 +3,46 @@
 """
 import os
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
 
 
-@dataclass
+# Python 3.10+ 使用__slots__数据类：目录中的字段对象数量可达数十万，去掉每个实例的__dict__可显著节省内存
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+_intern = sys.intern
+
+
+# forlist字段的类型描述
+FORLIST_TYPE = 'forlist'
+
+
+@dataclass(**_SLOTS)
 class Field:
     """协议字段"""
     name: str
     type_info: str
     description: str
+    children: Optional[List['Field']] = None  # forlist的元素字段，普通字段为None
 
+    def is_list(self) -> bool:
+        return self.children is not None
 
-@dataclass
+
+@dataclass(**_SLOTS)
 class Protocol:
     """单个协议"""
     name: str
     description: str
     fields: List[Field] = field(default_factory=list)
+    index: int = 0  # 段落内的协议序号（1:S2CAddHero:... 中的1）
+    opcode: Tuple[int, ...] = ()  # 所属段落的协议号（GS2C:0xd1:0x1: 为 (0xd1, 0x1)）
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class DnetFile:
     """解析后的.dnet文件"""
     file_path: str
@@ -35,6 +54,8 @@ class DnetFile:
     version: str = ""
     c2s_list: List[Protocol] = field(default_factory=list)
     s2c_list: List[Protocol] = field(default_factory=list)
+    c2s_opcode: Tuple[int, ...] = ()  # C2GS段落的协议号
+    s2c_opcode: Tuple[int, ...] = ()  # GS2C段落的协议号
 
     def has_c2s(self) -> bool:
         return len(self.c2s_list) > 0
@@ -43,17 +64,197 @@ class DnetFile:
         return len(self.s2c_list) > 0
 
 
+@dataclass
+class ScanDelta:
+    """两次扫描之间的变化"""
+    files: List[DnetFile]  # 扫描后的完整文件列表（按相对路径排序）
+    added: List[DnetFile] = field(default_factory=list)
+    removed: List[DnetFile] = field(default_factory=list)  # 上次扫描的旧对象
+    modified: List[DnetFile] = field(default_factory=list)  # 重新解析后的新对象
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.modified)
+
+
+# 解析器版本号：解析规则或数据结构变化时递增，使磁盘上的解析缓存失效
+PARSER_VERSION = 4
+
+# 并行解析的最小文件数，文件较少时进程启动开销大于收益，直接串行解析
+PARALLEL_MIN_FILES = 64
+
+# 分批扫描（后台加载）时每批的文件数
+SCAN_BATCH_SIZE = 200
+
+# 行分类规则表：(行类型, 正则)，按优先级排列，合并为一个预编译正则，每行只匹配一次
+# 优先级与旧版逐条startswith/re.match的判断顺序保持一致
+_LINE_RULES = (
+    ('header', r'(?P<hkey>VERSION|DESC|CMODULE|SMODULE)(?:[：:]\s*(?P<hval>.+))?'),
+    ('section', r'(?P<sdir>GS2C|C2GS):(?P<sops>.*)'),
+    ('forlist', r'forlist\s+(?P<lname>[A-Za-z_][A-Za-z0-9_]*)\s*(?::(?P<ldesc>.*))?$'),
+    ('protocol', r'(?P<pidx>\d+):(?P<pname>[A-Za-z0-9_]+):(?P<pdesc>.+)$'),
+    ('field', r'(?P<fname>[a-zA-Z_][a-zA-Z0-9_]*),(?P<ftype>[^,]+),(?P<fdesc>.+)$'),
+)
+
+_LINE_RE = re.compile('|'.join(f'(?P<{kind}>{pattern})' for kind, pattern in _LINE_RULES))
+
+# 头部关键字 -> DnetFile属性
+_HEADER_ATTRS = {
+    'VERSION': 'version',
+    'DESC': 'description',
+    'CMODULE': 'c2s_module',
+    'SMODULE': 's2c_module',
+}
+
+# 段落标记 -> 协议方向
+_SECTION_DIRECTIONS = {
+    'GS2C': 'S2C',
+    'C2GS': 'C2S',
+}
+
+
+class HeaderEvent(NamedTuple):
+    """头部信息事件（VERSION/DESC/CMODULE/SMODULE）"""
+    key: str
+    value: str
+
+
+class SectionEvent(NamedTuple):
+    """段落开始事件"""
+    direction: str  # 'C2S' 或 'S2C'
+    opcode: Tuple[int, ...] = ()  # 段落协议号（主协议号, 子协议号）
+
+
+class ProtocolEvent(NamedTuple):
+    """协议定义事件"""
+    index: int
+    name: str
+    description: str
+
+
+class FieldEvent(NamedTuple):
+    """字段事件（属于最近一个ProtocolEvent，或最内层未结束的ForlistEvent）"""
+    name: str
+    type_info: str
+    description: str
+
+
+class ForlistEvent(NamedTuple):
+    """forlist开始事件，之后缩进更深的字段属于该列表的元素"""
+    name: str
+    description: str
+
+
+class ForlistEndEvent(NamedTuple):
+    """forlist结束事件（与ForlistEvent一一对应）"""
+
+
+Event = Union[HeaderEvent, SectionEvent, ProtocolEvent, FieldEvent, ForlistEvent, ForlistEndEvent]
+
+_FORLIST_END = ForlistEndEvent()
+
+
+def iter_line_events(lines: Iterable[str]) -> Iterator[Event]:
+    """
+    逐行分类并产生解析事件（单次预编译正则匹配的状态机）
+    只产生有效事件：段落外的协议行、协议外的字段行不会产生事件
+    forlist按缩进嵌套：缩进比forlist行更深的字段属于该列表，缩进回退时产生ForlistEndEvent
+    """
+    match_line = _LINE_RE.match
+    in_section = False
+    in_protocol = False
+    forlist_indents: List[int] = []  # 未结束的forlist行的缩进（由外到内）
+
+    for line in lines:
+        line_stripped = line.strip()
+
+        # 跳过空行和注释
+        if not line_stripped or line_stripped[0] == '#':
+            continue
+
+        m = match_line(line_stripped)
+        kind = m.lastgroup if m else None
+
+        # 缩进回退到forlist行及以外时结束该forlist
+        if forlist_indents:
+            indent = len(line) - len(line.lstrip())
+            while forlist_indents and indent <= forlist_indents[-1]:
+                forlist_indents.pop()
+                yield _FORLIST_END
+
+        # 协议和字段行（最常见，优先判断）
+        if kind == 'field' or kind == 'protocol' or kind is None:
+            # 字段（iHeroID,4,英雄ID）
+            if kind == 'field':
+                if in_protocol:
+                    yield FieldEvent(*m.group('fname', 'ftype', 'fdesc'))
+
+            # 协议定义（1:C2SUpdateHeroName:更新英雄名称）
+            elif kind == 'protocol' and in_section:
+                in_protocol = True
+                while forlist_indents:
+                    forlist_indents.pop()
+                    yield _FORLIST_END
+                index, name, desc = m.group('pidx', 'pname', 'pdesc')
+                yield ProtocolEvent(int(index), name, desc)
+            continue
+
+        # 头部信息（VERSION/DESC/CMODULE/SMODULE），缺少值时忽略该行
+        if kind == 'header':
+            value = m.group('hval')
+            if value:
+                yield HeaderEvent(m.group('hkey'), value.strip())
+
+        # 段落开始：GS2C为S2C协议，C2GS为C2S协议
+        elif kind == 'section':
+            in_section = True
+            in_protocol = False
+            while forlist_indents:
+                forlist_indents.pop()
+                yield _FORLIST_END
+            yield SectionEvent(_SECTION_DIRECTIONS[m.group('sdir')], parse_opcode(m.group('sops')))
+
+        # forlist开始（forlist characterList:），协议外的forlist忽略
+        elif kind == 'forlist' and in_protocol:
+            forlist_indents.append(len(line) - len(line.lstrip()))
+            yield ForlistEvent(m.group('lname'), (m.group('ldesc') or '').strip())
+
+    # 文件结束时关闭所有未结束的forlist
+    for _ in forlist_indents:
+        yield _FORLIST_END
+
+
+def parse_opcode(text: str) -> Tuple[int, ...]:
+    """解析段落头中的协议号（如 "0xd1:0x1:" -> (0xd1, 0x1)），无法识别的部分忽略"""
+    opcode = []
+    for part in text.split(':'):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            opcode.append(int(part, 0))
+        except ValueError:
+            break
+    return tuple(opcode)
+
+
+def iter_events(file_path: str) -> Iterator[Event]:
+    """流式读取.dnet文件并逐个产生解析事件，内存占用与文件大小无关"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        yield from iter_line_events(f)
+
+
 class DnetParser:
     """解析.dnet协议文件（新格式）"""
 
+    def __init__(self):
+        # 上次扫描时各文件的(大小, 修改时间)，用于增量重新扫描
+        self._stamps: Dict[str, Tuple[int, int]] = {}
+
     def parse_file(self, file_path: str, proto_root: str = "") -> Optional[DnetFile]:
         """解析单个.dnet文件"""
         if not os.path.exists(file_path):
             return None
 
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
         file_name = os.path.basename(file_path)
         if proto_root:
             relative_path = os.path.relpath(file_path, proto_root)
@@ -68,103 +269,198 @@ class DnetParser:
             c2s_module="",
             s2c_module=""
         )
+        with open(file_path, 'r', encoding='utf-8') as f:
+            self.build(dnet, iter_line_events(f))
+        return dnet
 
-        lines = content.split('\n')
-        current_section = None  # 'C2S' or 'S2C'
-        current_protocol = None
-        in_forlist = False  # 是否在forlist块中
-
-        for line in lines:
-            line_stripped = line.strip()
-
-            # 跳过空行和注释
-            if not line_stripped or line_stripped.startswith('#'):
-                continue
-
-            # 解析头部信息 - VERSION
-            if line_stripped.startswith('VERSION'):
-                match = re.match(r'VERSION[：:]\s*(.+)', line_stripped)
-                if match:
-                    dnet.version = match.group(1).strip()
-                continue
-
-            # 解析头部信息 - DESC
-            if line_stripped.startswith('DESC'):
-                match = re.match(r'DESC[：:]\s*(.+)', line_stripped)
-                if match:
-                    dnet.description = match.group(1).strip()
-                continue
-
-            # 解析头部信息 - CMODULE (C2S模块)
-            if line_stripped.startswith('CMODULE'):
-                match = re.match(r'CMODULE[：:]\s*(.+)', line_stripped)
-                if match:
-                    dnet.c2s_module = match.group(1).strip()
-                continue
-
-            # 解析头部信息 - SMODULE (S2C模块)
-            if line_stripped.startswith('SMODULE'):
-                match = re.match(r'SMODULE[：:]\s*(.+)', line_stripped)
-                if match:
-                    dnet.s2c_module = match.group(1).strip()
-                continue
-
-            # 解析GS2C段落开始（S2C协议）
-            if line_stripped.startswith('GS2C:'):
-                current_section = 'S2C'
-                current_protocol = None
-                in_forlist = False
-                continue
+    def build(self, dnet: DnetFile, events: Iterable) -> DnetFile:
+        """
+        根据解析事件填充DnetFile
+        字段名、类型和描述大量重复（如iHeroID,4,英雄ID），统一驻留为同一个字符串对象
+        （与intern_strings驻留的字符串一致：头部信息、协议名称和描述、字段）
+        """
+        current_list = dnet.c2s_list
+        current_opcode = ()
+        fields = None  # 当前协议（或最内层forlist）的字段列表
+        outer_fields = []  # 外层字段列表栈，进入forlist时压栈
+
+        for event in events:
+            event_type = type(event)
+            if event_type is FieldEvent:
+                name, type_info, description = event
+                fields.append(Field(_intern(name), _intern(type_info), _intern(description)))
+            elif event_type is ProtocolEvent:
+                protocol = Protocol(_intern(event.name), _intern(event.description),
+                                    index=event.index, opcode=current_opcode)
+                fields = protocol.fields
+                current_list.append(protocol)
+            elif event_type is ForlistEvent:
+                list_field = Field(_intern(event.name), FORLIST_TYPE, _intern(event.description), [])
+                fields.append(list_field)
+                outer_fields.append(fields)
+                fields = list_field.children
+            elif event_type is ForlistEndEvent:
+                fields = outer_fields.pop()
+            elif event_type is SectionEvent:
+                current_opcode = event.opcode
+                if event.direction == 'C2S':
+                    current_list = dnet.c2s_list
+                    if not dnet.c2s_opcode:
+                        dnet.c2s_opcode = current_opcode
+                else:
+                    current_list = dnet.s2c_list
+                    if not dnet.s2c_opcode:
+                        dnet.s2c_opcode = current_opcode
+            elif event_type is HeaderEvent:
+                setattr(dnet, _HEADER_ATTRS[event.key], _intern(event.value))
+        return dnet
 
-            # 解析C2GS段落开始（C2S协议）
-            if line_stripped.startswith('C2GS:'):
-                current_section = 'C2S'
-                current_protocol = None
-                in_forlist = False
+    def scan_directory(self, proto_dir: str, parallel: bool = False,
+                       max_workers: Optional[int] = None, cache=None) -> List[DnetFile]:
+        """
+        递归扫描proto目录下所有.dnet文件
+        parallel=True时使用进程池并行解析，文件数较少时自动退回串行
+        cache为ParseCache时只重新解析指纹变化的文件，并在扫描结束后写回缓存
+        """
+        return self.rescan(proto_dir, [], parallel, max_workers, cache).files
+
+    def rescan(self, proto_dir: str, previous: List[DnetFile], parallel: bool = False,
+               max_workers: Optional[int] = None, cache=None) -> ScanDelta:
+        """
+        增量重新扫描：previous为本解析器上次扫描的结果
+        大小和修改时间未变化的文件直接沿用旧对象，只解析新增和变化的文件
+        """
+        file_paths = self.collect_files(proto_dir)
+        previous_by_path = {d.file_path: d for d in previous}
+
+        stamps: Dict[str, Tuple[int, int]] = {}
+        kept: List[DnetFile] = []
+        resolved: List[Tuple[str, DnetFile]] = []  # 需要与旧对象比较的新结果
+        misses = []  # (路径, stat结果)
+        for file_path in file_paths:
+            try:
+                st = os.stat(file_path)
+            except OSError:
                 continue
+            stamp = (st.st_size, st.st_mtime_ns)
+            stamps[file_path] = stamp
 
-            # 解析forlist开始（嵌套结构，暂时跳过内部字段）
-            if line_stripped.startswith('forlist '):
-                in_forlist = True
+            old = previous_by_path.get(file_path)
+            if old is not None and self._stamps.get(file_path) == stamp:
+                kept.append(old)
                 continue
 
-            # forlist内部的字段（缩进更深），暂时跳过
-            if in_forlist and line.startswith('\t\t\t'):
-                continue
+            dnet = cache.lookup(file_path, st, proto_dir) if cache is not None else None
+            if dnet is not None:
+                resolved.append((file_path, dnet))
             else:
-                in_forlist = False
-
-            # 解析协议定义（新格式：1:C2SUpdateHeroName:更新英雄名称）
-            protocol_match = re.match(r'^(\d+):([A-Za-z0-9_]+):(.+)$', line_stripped)
-            if protocol_match and current_section:
-                protocol_name = protocol_match.group(2)
-                protocol_desc = protocol_match.group(3)
-                current_protocol = Protocol(
-                    name=protocol_name,
-                    description=protocol_desc
-                )
-                if current_section == 'C2S':
-                    dnet.c2s_list.append(current_protocol)
-                else:
-                    dnet.s2c_list.append(current_protocol)
-                continue
-
-            # 解析字段（新格式：iHeroID,4,英雄ID）
-            field_match = re.match(r'^([a-zA-Z_][a-zA-Z0-9_]*),([^,]+),(.+)$', line_stripped)
-            if field_match and current_protocol:
-                field_name = field_match.group(1)
-                field_type = field_match.group(2)
-                field_desc = field_match.group(3)
-                current_protocol.fields.append(Field(
-                    name=field_name,
-                    type_info=field_type,
-                    description=field_desc
-                ))
-
-        return dnet
-
-    def scan_directory(self, proto_dir: str) -> List[DnetFile]:
-        """递归扫描proto目录下所有.dnet文件"""
+                misses.append((file_path, st))
+
+        miss_paths = [file_path for file_path, _ in misses]
+        for (file_path, st), dnet in zip(misses, self.parse_files(miss_paths, proto_dir,
+                                                                  parallel, max_workers)):
+            if dnet:
+                if cache is not None:
+                    cache.store(file_path, st, proto_dir, dnet)
+                resolved.append((file_path, dnet))
+            else:
+                # 解析失败（期间被删除或无法读取）：不再是目录中的文件，原有的旧对象记为删除
+                del stamps[file_path]
+
+        delta = ScanDelta(files=kept)
+        for file_path, dnet in resolved:
+            old = previous_by_path.get(file_path)
+            if old is None:
+                delta.added.append(dnet)
+            elif dnet != old:
+                delta.modified.append(dnet)
+            else:
+                # 只是修改时间变化，内容没变，沿用旧对象
+                kept.append(old)
+        delta.removed = [d for path, d in previous_by_path.items() if path not in stamps]
+        delta.files = kept + delta.added + delta.modified
+        # 按相对路径排序
+        delta.files.sort(key=lambda x: x.relative_path)
+
+        if cache is not None:
+            cache.prune(file_paths)
+            cache.save()
+        self._stamps = stamps
+        return delta
+
+    def scan_batches(self, proto_dir: str, batch_size: int = SCAN_BATCH_SIZE, parallel: bool = False,
+                     max_workers: Optional[int] = None, cache=None,
+                     cancelled: Optional[Callable[[], bool]] = None
+                     ) -> Iterator[Tuple[int, int, List[DnetFile]]]:
+        """
+        分批扫描（用于后台加载）：按相对路径顺序逐批产出 (已处理文件数, 文件总数, 本批解析结果)
+        全部产出后与scan_directory()相同，写回缓存，之后可以用rescan()增量刷新
+        cancelled()返回True时在下一批之前停止，已产出的结果仍然有效（可用rescan()补全），但不写回缓存
+        """
+        file_paths = sorted(self.collect_files(proto_dir), key=lambda p: os.path.relpath(p, proto_dir))
+        total = len(file_paths)
+        workers = max_workers or os.cpu_count() or 1
+        use_pool = parallel and workers > 1 and total >= PARALLEL_MIN_FILES
+        executor = None  # 进程池在第一次需要解析时创建，所有批次共用
+        stamps: Dict[str, Tuple[int, int]] = {}
+        self._stamps = {}
+        try:
+            for start in range(0, total, batch_size):
+                if cancelled is not None and cancelled():
+                    return
+                chunk = file_paths[start:start + batch_size]
+                results: Dict[str, DnetFile] = {}
+                misses = []  # (路径, stat结果)
+                for file_path in chunk:
+                    try:
+                        st = os.stat(file_path)
+                    except OSError:
+                        continue
+                    stamps[file_path] = (st.st_size, st.st_mtime_ns)
+                    dnet = cache.lookup(file_path, st, proto_dir) if cache is not None else None
+                    if dnet is not None:
+                        results[file_path] = dnet
+                    else:
+                        misses.append((file_path, st))
+
+                miss_paths = [file_path for file_path, _ in misses]
+                parsed = None
+                if use_pool and len(miss_paths) > 1:
+                    try:
+                        if executor is None:
+                            executor = ProcessPoolExecutor(max_workers=workers)
+                        parsed = self._parse_in_pool(executor, miss_paths, proto_dir, workers)
+                    except (OSError, BrokenProcessPool) as e:
+                        print(f"并行解析失败，改为串行解析: {e}")
+                        use_pool = False
+                if parsed is None:
+                    parsed = [self.parse_file(p, proto_dir) for p in miss_paths]
+                for (file_path, st), dnet in zip(misses, parsed):
+                    if dnet:
+                        if cache is not None:
+                            cache.store(file_path, st, proto_dir, dnet)
+                        results[file_path] = dnet
+
+                yield start + len(chunk), total, [results[p] for p in chunk if p in results]
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            # 取消时也保留已扫描文件的时间戳，rescan()沿用已产出的结果
+            self._stamps = stamps
+
+        if cache is not None:
+            cache.prune(file_paths)
+            cache.save()
+
+    def parse_files(self, file_paths: List[str], proto_dir: str, parallel: bool = False,
+                    max_workers: Optional[int] = None) -> List[Optional[DnetFile]]:
+        """解析一批文件，结果顺序与file_paths一致"""
+        if parallel and len(file_paths) >= PARALLEL_MIN_FILES:
+            return self._parse_parallel(file_paths, proto_dir, max_workers)
+        return [self.parse_file(p, proto_dir) for p in file_paths]
+
+    def collect_files(self, proto_dir: str) -> List[str]:
+        """递归收集proto目录下所有.dnet文件路径"""
         result = []
 
         if not os.path.exists(proto_dir):
@@ -173,15 +469,76 @@ class DnetParser:
         for root, dirs, files in os.walk(proto_dir):
             for file in files:
                 if file.endswith('.dnet'):
-                    file_path = os.path.join(root, file)
-                    dnet = self.parse_file(file_path, proto_dir)
-                    if dnet:
-                        result.append(dnet)
-
-        # 按相对路径排序
-        result.sort(key=lambda x: x.relative_path)
+                    result.append(os.path.join(root, file))
         return result
 
+    def _parse_parallel(self, file_paths: List[str], proto_dir: str,
+                        max_workers: Optional[int]) -> List[Optional[DnetFile]]:
+        """使用进程池解析文件，结果顺序与file_paths一致；进程池不可用时退回串行"""
+        workers = max_workers or os.cpu_count() or 1
+        if workers <= 1:
+            return [self.parse_file(p, proto_dir) for p in file_paths]
+
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return self._parse_in_pool(executor, file_paths, proto_dir, workers)
+        except (OSError, BrokenProcessPool) as e:
+            print(f"并行解析失败，改为串行解析: {e}")
+            return [self.parse_file(p, proto_dir) for p in file_paths]
+
+    def _parse_in_pool(self, executor: ProcessPoolExecutor, file_paths: List[str], proto_dir: str,
+                       workers: int) -> List[Optional[DnetFile]]:
+        """在已创建的进程池中解析文件，结果顺序与file_paths一致"""
+        # 每个进程分到若干批任务，减少进程间通信次数
+        chunksize = max(1, len(file_paths) // (workers * 4))
+        results = list(executor.map(_parse_worker, file_paths,
+                                    [proto_dir] * len(file_paths),
+                                    chunksize=chunksize))
+
+        # 子进程返回的对象经过反序列化，字符串需要在本进程重新驻留
+        for dnet in results:
+            if dnet:
+                intern_strings(dnet)
+        return results
+
+
+def intern_strings(dnet: DnetFile) -> DnetFile:
+    """将DnetFile中重复出现的字符串替换为驻留字符串（用于反序列化得到的对象）"""
+    dnet.c2s_module = _intern(dnet.c2s_module)
+    dnet.s2c_module = _intern(dnet.s2c_module)
+    dnet.version = _intern(dnet.version)
+    dnet.description = _intern(dnet.description)
+    for protocol in dnet.c2s_list + dnet.s2c_list:
+        protocol.name = _intern(protocol.name)
+        protocol.description = _intern(protocol.description)
+        _intern_fields(protocol.fields)
+    return dnet
+
+
+def format_fields(fields: List[Field], indent: str = "  ") -> str:
+    """字段列表的文本表示（每行一个字段，forlist的元素字段缩进显示）"""
+    text = ""
+    for f in fields:
+        text += f"{indent}- {f.name} ({f.type_info}): {f.description}\n"
+        if f.children:
+            text += format_fields(f.children, indent + "    ")
+    return text
+
+
+def _intern_fields(fields: List[Field]):
+    """驻留字段（含forlist元素字段）中的字符串"""
+    for f in fields:
+        f.name = _intern(f.name)
+        f.type_info = _intern(f.type_info)
+        f.description = _intern(f.description)
+        if f.children:
+            _intern_fields(f.children)
+
+
+def _parse_worker(file_path: str, proto_root: str) -> Optional[DnetFile]:
+    """进程池任务：解析单个文件（需为模块级函数以便序列化）"""
+    return DnetParser().parse_file(file_path, proto_root)
+
 
 if __name__ == '__main__':
     # 测试代码
@@ -201,10 +558,8 @@ if __name__ == '__main__':
         print(f"C2S协议 ({len(dnet.c2s_list)}):")
         for p in dnet.c2s_list:
             print(f"  - {p.name}: {p.description}")
-            for f in p.fields:
-                print(f"      {f.name} ({f.type_info}): {f.description}")
+            print(format_fields(p.fields, "      "), end="")
         print(f"S2C协议 ({len(dnet.s2c_list)}):")
         for p in dnet.s2c_list:
             print(f"  - {p.name}: {p.description}")
-            for f in p.fields:
-                print(f"      {f.name} ({f.type_info}): {f.description}")
+            print(format_fields(p.fields, "      "), end="")
@@ -0,0 +1,290 @@
+"""
+全文索引模块（协议名、字段、描述和配置中的条件文本）
+"""
+import heapq
+import math
+import re
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from dnet_parser import DnetFile, Field, ScanDelta
+
+# 命中类型
+HIT_PROTOCOL = 'protocol'  # 协议名/协议描述
+HIT_FIELD = 'field'  # 字段名/字段类型/字段描述
+HIT_CONDITION = 'condition'  # C2S配置中S2C响应的条件
+HIT_TRIGGER = 'trigger'  # S2C自定义触发条件
+
+HIT_LABELS = {
+    HIT_PROTOCOL: "协议",
+    HIT_FIELD: "字段",
+    HIT_CONDITION: "条件",
+    HIT_TRIGGER: "触发",
+}
+
+# 各部分文本的权重（同一个词在名称中命中比在描述中命中排名靠前）
+PROTOCOL_NAME_WEIGHT = 4.0
+FIELD_NAME_WEIGHT = 3.0
+TYPE_WEIGHT = 2.0
+TRIGGER_NAME_WEIGHT = 1.5
+TEXT_WEIGHT = 1.0  # 描述、条件
+PART_WEIGHT = 0.5  # 驼峰/下划线拆分出的部分（iHeroID中的hero）相对完整词的权重
+PREFIX_WEIGHT = 0.6  # 前缀命中（查询hero命中heroid）相对完全命中的权重
+
+# 前缀展开：查询词展开为以它开头的索引词，最多展开这么多个
+PREFIX_EXPAND_LIMIT = 256
+
+# 默认返回的结果数
+SEARCH_LIMIT = 200
+
+_WORD_RE = re.compile(r'[A-Za-z0-9_]+|[\u3400-\u9fff]+')
+_PART_RE = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+')
+
+
+class TextHit(NamedTuple):
+    """一条可被搜索到的文本"""
+    kind: str  # HIT_PROTOCOL / HIT_FIELD / HIT_CONDITION / HIT_TRIGGER
+    dnet_file: str  # 所在.dnet文件的相对路径
+    direction: str  # 跳转目标协议的方向：'C2S' 或 'S2C'
+    protocol: str  # 跳转目标协议（字段所在协议、条件所在的C2S、触发条件所属的S2C）
+    text: str  # 显示文本
+
+
+def tokenize(text: str) -> Iterator[Tuple[str, bool]]:
+    """
+    分词，产出(小写词, 是否为完整的词)
+    - 英文数字按单词切分，驼峰/下划线/数字拆分出的部分也作为词（iHeroID -> iheroid, i, hero, id）
+    - 中文按相邻两字切分（英雄属性 -> 英雄, 雄属, 属性），单个汉字作为一个词
+    """
+    for word in _WORD_RE.findall(text):
+        if word[0] >= '\u3400':
+            if len(word) == 1:
+                yield word, True
+            for i in range(len(word) - 1):
+                yield word[i:i + 2], True
+            continue
+        yield word.lower(), True
+        parts = _PART_RE.findall(word)
+        if len(parts) > 1:
+            for part in parts:
+                yield part.lower(), False
+
+
+def _term_weights(parts: Iterable[Tuple[str, float]]) -> Dict[str, float]:
+    """文本各部分 -> 词的权重（同一个词取最高权重）"""
+    terms: Dict[str, float] = {}
+    for text, weight in parts:
+        if not text:
+            continue
+        for term, whole in tokenize(text):
+            w = weight if whole else weight * PART_WEIGHT
+            if w > terms.get(term, 0.0):
+                terms[term] = w
+    return terms
+
+
+def _walk_fields(fields: List[Field], prefix: str = "") -> Iterator[Tuple[str, Field]]:
+    """遍历字段（包括forlist的元素字段），产出(字段路径, 字段)"""
+    for f in fields:
+        path = f"{prefix}{f.name}"
+        yield path, f
+        if f.children:
+            yield from _walk_fields(f.children, path + ".")
+
+
+def _file_entries(dnet: DnetFile) -> Iterator[Tuple[TextHit, Dict[str, float]]]:
+    path = dnet.relative_path
+    for direction, protocols in (('C2S', dnet.c2s_list), ('S2C', dnet.s2c_list)):
+        for protocol in protocols:
+            yield (TextHit(HIT_PROTOCOL, path, direction, protocol.name,
+                           f"{protocol.name} - {protocol.description}"),
+                   _term_weights(((protocol.name, PROTOCOL_NAME_WEIGHT),
+                                  (protocol.description, TEXT_WEIGHT))))
+            for field_path, f in _walk_fields(protocol.fields):
+                yield (TextHit(HIT_FIELD, path, direction, protocol.name,
+                               f"{protocol.name}.{field_path} : {f.type_info} - {f.description}"),
+                       _term_weights(((f.name, FIELD_NAME_WEIGHT), (f.type_info, TYPE_WEIGHT),
+                                      (f.description, TEXT_WEIGHT))))
+
+
+def _config_entries(dnet_relative_path: str, config) -> Iterator[Tuple[TextHit, Dict[str, float]]]:
+    for c2s_name, mapping in config.c2s_mappings.items():
+        for resp in mapping.responses:
+            if resp.condition:
+                yield (TextHit(HIT_CONDITION, dnet_relative_path, 'C2S', c2s_name,
+                               f"{c2s_name} -> {resp.protocol}: {resp.condition}"),
+                       _term_weights(((resp.condition, TEXT_WEIGHT),)))
+    for s2c_name, trigger_config in config.s2c_triggers.items():
+        for trigger in trigger_config.custom_triggers:
+            yield (TextHit(HIT_TRIGGER, dnet_relative_path, 'S2C', s2c_name,
+                           f"{s2c_name} <- {trigger.name}: {trigger.condition}"),
+                   _term_weights(((trigger.name, TRIGGER_NAME_WEIGHT),
+                                  (trigger.condition, TEXT_WEIGHT))))
+
+
+class FullTextIndex:
+    """
+    倒排索引：词 -> {条目编号: 权重}
+    - 条目按来源分组（.dnet文件的协议、配置中的条件），重新解析或保存时只替换该来源的条目
+    - 查询的每个词都要命中（AND），词也可以是索引词的前缀；
+      按 权重 x IDF（越少见的词越重要）求和排序
+    """
+
+    def __init__(self):
+        self._entries: Dict[int, Tuple[TextHit, Dict[str, float]]] = {}
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._sources: Dict[Tuple[str, str], List[int]] = {}  # (来源类型, 相对路径) -> 条目编号
+        self._next_id = 0
+        self._sorted_terms: Optional[List[str]] = None  # 前缀查找用的有序词表，词表变化后重建
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ---- 更新 ----
+
+    def add_files(self, dnet_files: Iterable[DnetFile]):
+        """添加（或替换）.dnet文件中的协议和字段"""
+        for dnet in dnet_files:
+            self.replace_file(dnet)
+
+    def replace_file(self, dnet: DnetFile):
+        """替换.dnet文件的条目（只移除和添加该文件的条目，其他文件不受影响）"""
+        self._set_source(('dnet', dnet.relative_path), _file_entries(dnet))
+
+    def remove_file(self, relative_path: str):
+        self._set_source(('dnet', relative_path), ())
+
+    def clear_files(self):
+        """移除所有.dnet文件的条目（重新加载前调用，配置中的条件保留）"""
+        for key in [k for k in self._sources if k[0] == 'dnet']:
+            self._set_source(key, ())
+
+    def apply_delta(self, delta: ScanDelta):
+        """根据增量扫描结果更新，代价与变化的文件数成正比"""
+        for dnet in delta.removed:
+            self.remove_file(dnet.relative_path)
+        for dnet in delta.modified + delta.added:
+            self.replace_file(dnet)
+
+    def set_config(self, dnet_relative_path: str, config):
+        """替换配置（C2SConfig）中的条件文本，config为None时移除"""
+        entries = _config_entries(dnet_relative_path, config) if config is not None else ()
+        self._set_source(('config', dnet_relative_path), entries)
+
+    def remove_config(self, dnet_relative_path: str):
+        self._set_source(('config', dnet_relative_path), ())
+
+    def _set_source(self, key: Tuple[str, str], entries: Iterable[Tuple[TextHit, Dict[str, float]]]):
+        for entry_id in self._sources.pop(key, ()):
+            _, terms = self._entries.pop(entry_id)
+            for term in terms:
+                postings = self._postings[term]
+                del postings[entry_id]
+                if not postings:
+                    del self._postings[term]
+                    self._sorted_terms = None
+
+        ids = []
+        for hit, terms in entries:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (hit, terms)
+            for term, weight in terms.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    self._sorted_terms = None
+                postings[entry_id] = weight
+            ids.append(entry_id)
+        if ids:
+            self._sources[key] = ids
+
+    # ---- 查询 ----
+
+    def search(self, query: str, limit: Optional[int] = SEARCH_LIMIT) -> List[TextHit]:
+        """搜索，按相关度从高到低返回命中的条目"""
+        return [hit for _, hit in self.search_scored(query, limit)]
+
+    def search_scored(self, query: str, limit: Optional[int] = SEARCH_LIMIT) -> List[Tuple[float, TextHit]]:
+        """搜索，返回[(得分, 条目)]，得分相同时按加入索引的顺序（加载时按文件路径顺序加入）"""
+        terms = list(dict.fromkeys(term for term, whole in tokenize(query) if whole))
+        if not terms:
+            return []
+
+        scores: Optional[Dict[int, float]] = None
+        # 先处理命中条目最少的词，交集尽早变小
+        for term_scores in sorted((self._term_scores(term) for term in terms), key=len):
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {i: s + term_scores[i] for i, s in scores.items() if i in term_scores}
+            if not scores:
+                return []
+
+        entries = self._entries
+        if limit is None or len(scores) <= limit:
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        else:
+            # 只排序得分高于第limit名的条目，与第limit名同分的条目取编号最小的几个
+            threshold = heapq.nlargest(limit, scores.values())[-1]
+            ranked = sorted(((i, s) for i, s in scores.items() if s > threshold),
+                            key=lambda item: (-item[1], item[0]))
+            tied = [i for i, s in scores.items() if s == threshold]
+            ranked.extend((i, threshold) for i in heapq.nsmallest(limit - len(ranked), tied))
+        return [(score, entries[i][0]) for i, score in ranked]
+
+    def _term_scores(self, term: str) -> Dict[int, float]:
+        """单个查询词命中的条目 -> 得分（完全命中或前缀命中，同一条目取最高分）"""
+        total = len(self._entries)
+        scores: Dict[int, float] = {}
+        for matched in self._expand(term):
+            postings = self._postings[matched]
+            factor = math.log(1 + total / len(postings))
+            if matched != term:
+                factor *= PREFIX_WEIGHT
+            if not scores:
+                scores = {entry_id: weight * factor for entry_id, weight in postings.items()}
+                continue
+            for entry_id, weight in postings.items():
+                score = weight * factor
+                if score > scores.get(entry_id, 0.0):
+                    scores[entry_id] = score
+        return scores
+
+    def _expand(self, term: str) -> List[str]:
+        """查询词 -> 命中的索引词（自身和以它开头的词；单个英文字母或数字只做完全匹配）"""
+        matched = [term] if term in self._postings else []
+        if len(term) < 2 and term.isascii():
+            return matched
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        terms = self._sorted_terms
+        i = bisect_left(terms, term)
+        while i < len(terms) and len(matched) < PREFIX_EXPAND_LIMIT and terms[i].startswith(term):
+            if terms[i] != term:
+                matched.append(terms[i])
+            i += 1
+        return matched
+
+
+if __name__ == '__main__':
+    # 测试代码
+    import os
+    import sys
+    import time
+    from dnet_parser import DnetParser
+
+    proto_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), "..", "proto")
+    files = DnetParser().scan_directory(proto_dir)
+
+    start = time.perf_counter()
+    index = FullTextIndex()
+    index.add_files(files)
+    print(f"建立索引: {len(files)} 个文件, {len(index)} 条, {time.perf_counter() - start:.3f}s")
+
+    for query in sys.argv[2:] or ["hero", "iHeroID", "英雄", "int"]:
+        start = time.perf_counter()
+        results = index.search_scored(query, limit=5)
+        print(f"\n{query!r}: {(time.perf_counter() - start) * 1000:.2f}ms")
+        for score, hit in results:
+            print(f"  {score:6.2f} [{HIT_LABELS[hit.kind]}] {hit.text}  ({hit.dnet_file})")
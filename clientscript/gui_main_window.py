@@ -6,7 +6,8 @@ from tkinter import ttk, messagebox, filedialog
 import os
 import sys
 import json
-from typing import Dict, List, Optional
+import time
+from typing import Dict, List, Optional, Set, Tuple
 
 
 def get_base_path():
@@ -18,8 +19,34 @@ def get_base_path():
         # 开发环境运行
         return os.path.dirname(os.path.abspath(__file__))
 
-from dnet_parser import DnetParser, DnetFile, Protocol
-from config_manager import ConfigManager, C2SConfig, C2SMapping, S2CResponse, OrderGroup, S2CTrigger, S2CTriggerConfig
+from dnet_parser import DnetParser, DnetFile, Protocol, ScanDelta, format_fields
+from parse_cache import ParseCache, CACHE_FILE_NAME
+from catalog_index import CatalogIndex
+from catalog_loader import CatalogLoader, LoadBatch
+from config_validator import ValidationEngine, ValidationJob
+from config_store import SqliteConfigStore
+from undo_history import UndoHistory, C2S_SECTION, S2C_SECTION
+from virtual_list import VirtualListbox, VirtualTreeview
+from search_index import SearchIndex
+from fulltext_index import FullTextIndex, TextHit, HIT_LABELS, SEARCH_LIMIT
+from config_manager import ConfigManager, SUMMARY_FILE_NAME, C2SConfig, C2SMapping, S2CResponse, OrderGroup, S2CTrigger, S2CTriggerConfig
+
+
+# 后台保存结果的检查间隔（毫秒）
+SAVE_POLL_INTERVAL = 100
+
+# 文件树每一层目录的缩进（文件树是平铺的虚拟表格，层级用缩进表示）
+DNET_TREE_INDENT = "    "
+
+# 后台加载结果的检查间隔（毫秒），以及每次处理结果的时间上限（毫秒，超出部分留到下次）
+LOAD_POLL_INTERVAL = 30
+LOAD_TICK_MS = 40
+
+# 后台验证（验证所有配置）完成情况的检查间隔（毫秒）
+VALIDATE_POLL_INTERVAL = 100
+
+# 筛选框停止输入多久后才执行筛选（毫秒）
+FILTER_DEBOUNCE_MS = 150
 
 
 class ToolTip:
@@ -373,6 +400,107 @@ class OrderGroupEditDialog(tk.Toplevel):
         self.destroy()
 
 
+class QuickOpenDialog(tk.Toplevel):
+    """全文搜索对话框：输入关键字，按相关度列出命中的协议、字段和配置条件，选中后跳转"""
+
+    def __init__(self, parent, text_index: FullTextIndex):
+        super().__init__(parent)
+        self.text_index = text_index
+        self.result: Optional[TextHit] = None
+        self._hits: List[TextHit] = []
+        self._search_job = None
+
+        self.title("全文搜索")
+        self.geometry("720x420")
+        self.transient(parent)
+        self.grab_set()
+
+        self._create_widgets()
+        self._center_window()
+
+    def _create_widgets(self):
+        frame = ttk.Frame(self, padding=10)
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(frame, text="搜索协议名、字段名、字段类型、描述和配置条件（多个关键字用空格分隔）:").pack(anchor=tk.W, pady=5)
+        self.query_var = tk.StringVar()
+        self.query_var.trace("w", lambda *args: self._schedule_search())
+        query_entry = ttk.Entry(frame, textvariable=self.query_var)
+        query_entry.pack(fill=tk.X, pady=5)
+        query_entry.focus()
+
+        list_frame = ttk.Frame(frame)
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        self.result_list = VirtualListbox(list_frame, selectmode=tk.SINGLE, font=("Microsoft YaHei UI", 10))
+        result_scroll = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.result_list.yview)
+        self.result_list.configure(yscrollcommand=result_scroll.set)
+        self.result_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        result_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.result_list.bind("<Double-1>", lambda e: self._on_ok())
+
+        self.status_var = tk.StringVar(value="输入关键字开始搜索")
+        ttk.Label(frame, textvariable=self.status_var).pack(anchor=tk.W, pady=5)
+
+        # 输入框中按上下键移动结果列表的选中行
+        query_entry.bind("<Down>", lambda e: self._move_selection(1))
+        query_entry.bind("<Up>", lambda e: self._move_selection(-1))
+        self.bind("<Return>", lambda e: self._on_ok())
+        self.bind("<Escape>", lambda e: self._on_cancel())
+
+    def _center_window(self):
+        self.update_idletasks()
+        x = self.master.winfo_x() + (self.master.winfo_width() - self.winfo_width()) // 2
+        y = self.master.winfo_y() + (self.master.winfo_height() - self.winfo_height()) // 2
+        self.geometry(f"+{x}+{y}")
+
+    def _schedule_search(self):
+        """停止输入FILTER_DEBOUNCE_MS毫秒后再搜索"""
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(FILTER_DEBOUNCE_MS, self._search)
+
+    def _search(self):
+        self._search_job = None
+        start = time.perf_counter()
+        self._hits = self.text_index.search(self.query_var.get(), SEARCH_LIMIT)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        self.result_list.set_items([f"[{HIT_LABELS[hit.kind]}] {hit.text}    ({hit.dnet_file})"
+                                    for hit in self._hits])
+        if self._hits:
+            self.result_list.selection_set(0)
+        more = f"（只显示前 {SEARCH_LIMIT} 条）" if len(self._hits) >= SEARCH_LIMIT else ""
+        self.status_var.set(f"找到 {len(self._hits)} 条{more}，耗时 {elapsed:.1f}ms")
+
+    def _move_selection(self, delta: int):
+        if not self._hits:
+            return "break"
+        selection = self.result_list.curselection()
+        index = selection[0] + delta if selection else 0
+        index = max(0, min(index, len(self._hits) - 1))
+        self.result_list.selection_clear(0, tk.END)
+        self.result_list.selection_set(index)
+        self.result_list.see(index)
+        return "break"
+
+    def _on_ok(self):
+        if self._search_job is not None:
+            # 还没来得及搜索的输入先搜索一次
+            self.after_cancel(self._search_job)
+            self._search()
+        selection = self.result_list.curselection()
+        if not selection or selection[0] >= len(self._hits):
+            return
+        self.result = self._hits[selection[0]]
+        self.destroy()
+
+    def _on_cancel(self):
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+            self._search_job = None
+        self.destroy()
+
+
 # 保留旧名称以兼容
 ConditionDialog = ResponseEditDialog
 
@@ -520,24 +648,45 @@ class MainWindow(tk.Tk):
         settings = self._load_settings()
         self.proto_dir = settings.get('proto_dir', os.path.join(self.root_dir, 'proto'))
         self.config_dir = settings.get('config_dir', os.path.join(self.root_dir, 'clientconfig'))
+        # 可选：使用SQLite配置数据库代替配置目录（设置文件中的config_db，可用 dnet_cli.py db-import 生成）
+        self.config_db = settings.get('config_db', '')
 
-        # 初始化解析器和配置管理器
+        # 初始化解析器和配置管理器（解析缓存与设置文件放在同一目录）
         self.parser = DnetParser()
-        self.config_manager = ConfigManager(self.proto_dir, self.config_dir)
+        self.parse_cache = ParseCache(os.path.join(os.path.dirname(self.settings_file), CACHE_FILE_NAME))
+        self.summary_file = os.path.join(os.path.dirname(self.settings_file), SUMMARY_FILE_NAME)
+        self.config_manager = self._create_config_manager()
+        self.validation_engine = ValidationEngine(self.config_manager)
 
         # 数据
         self.dnet_files: List[DnetFile] = []
+        self.catalog_index = CatalogIndex()  # 协议目录索引（每次扫描后重建/增量更新）
+        self._catalog_loader: Optional[CatalogLoader] = None  # 正在进行的后台加载
+        self._validation_job: Optional[ValidationJob] = None  # 正在进行的后台验证
+        # 筛选用的搜索索引（每次加载时重建，加载过程中逐批追加）
+        self.dnet_search: SearchIndex[DnetFile] = SearchIndex()  # 文件树：相对路径
+        # 包含S2C的文件：显示文本，结果按相对路径排序
+        self.s2c_dnet_search: SearchIndex[DnetFile] = SearchIndex(order=lambda dnet: dnet.relative_path)
+        self._search_ids: Dict[str, int] = {}  # 相对路径 -> dnet_search中的编号
+        self._s2c_search_ids: Dict[str, int] = {}  # 相对路径 -> s2c_dnet_search中的编号
+        self._s2c_protocol_search: Dict[str, tuple] = {}  # 相对路径 -> (dnet, 该文件S2C协议的索引)
+        self._s2c_dnet_shown: List[DnetFile] = []  # S2C面板dnet列表当前显示的文件
+        self._s2c_mode_dnet_shown: List[DnetFile] = []  # S2C模式dnet列表当前显示的文件
+        self._debounce_jobs: Dict[str, str] = {}  # 等待执行的筛选
         self.current_dnet: Optional[DnetFile] = None
         self.current_c2s: Optional[Protocol] = None
         self.current_config: Optional[C2SConfig] = None
         self.current_s2c_dnet: Optional[DnetFile] = None  # 当前选中的S2C dnet文件
         self.modified = False
+        self._save_poll_scheduled = False
+        self._save_sections: Dict[int, str] = {}  # 后台保存序号 -> 发起保存的模式（C2S_SECTION/S2C_SECTION）
+        self.undo_history = UndoHistory()  # 撤销/重做历史（C2S模式和S2C模式共用）
 
         # 构建UI
         self._setup_menu()
         self._setup_main_frame()
 
-        # 加载数据
+        # 加载数据（后台线程解析，窗口先显示出来，结果分批填入）
         self._load_dnet_files()
 
         # 绑定快捷键
@@ -545,6 +694,7 @@ class MainWindow(tk.Tk):
         self.bind("<Control-z>", lambda e: self._undo())
         self.bind("<Control-y>", lambda e: self._redo())
         self.bind("<F5>", lambda e: self._refresh_dnet_files())
+        self.bind("<Control-p>", lambda e: self._show_quick_open())
 
         # 关闭窗口时检查保存
         self.protocol("WM_DELETE_WINDOW", self._on_close)
@@ -578,6 +728,8 @@ class MainWindow(tk.Tk):
                     settings['proto_dir'] = self._to_absolute_path(settings['proto_dir'])
                 if 'config_dir' in settings:
                     settings['config_dir'] = self._to_absolute_path(settings['config_dir'])
+                if settings.get('config_db'):
+                    settings['config_db'] = self._to_absolute_path(settings['config_db'])
                 return settings
             except Exception:
                 pass
@@ -589,12 +741,29 @@ class MainWindow(tk.Tk):
             'proto_dir': self._to_relative_path(self.proto_dir),
             'config_dir': self._to_relative_path(self.config_dir)
         }
+        if self.config_db:
+            settings['config_db'] = self._to_relative_path(self.config_db)
         try:
             with open(self.settings_file, 'w', encoding='utf-8') as f:
                 json.dump(settings, f, ensure_ascii=False, indent=2)
         except Exception as e:
             messagebox.showwarning("警告", f"保存设置失败: {e}")
 
+    def _create_config_manager(self) -> ConfigManager:
+        """
+        创建配置管理器（设置了config_db时使用数据库，打开失败时退回配置目录）
+        同时新建全文索引：协议部分由加载和刷新更新，配置中的条件由配置管理器在加载、保存时更新
+        """
+        store = None
+        if self.config_db:
+            try:
+                store = SqliteConfigStore(self.config_db)
+            except Exception as e:
+                messagebox.showwarning("警告", f"打开配置数据库失败，改用配置目录: {e}")
+        self.text_index = FullTextIndex()
+        return ConfigManager(self.proto_dir, self.config_dir, summary_path=self.summary_file, store=store,
+                             text_index=self.text_index)
+
     def _setup_style(self):
         """设置主题和样式"""
         style = ttk.Style()
@@ -669,6 +838,7 @@ class MainWindow(tk.Tk):
         # 工具菜单
         tools_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="工具", menu=tools_menu)
+        tools_menu.add_command(label="全文搜索 (Ctrl+P)", command=self._show_quick_open)
         tools_menu.add_command(label="验证所有配置", command=self._validate_all)
         tools_menu.add_command(label="刷新dnet文件列表", command=self._refresh_dnet_files)
 
@@ -703,6 +873,11 @@ class MainWindow(tk.Tk):
         status_label = ttk.Label(status_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
         status_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
 
+        # 加载进度（只在后台加载时显示）
+        self.load_progress = ttk.Progressbar(status_frame, length=160, mode="determinate")
+        self.load_cancel_button = ttk.Button(status_frame, text="取消加载", width=8,
+                                             command=self._cancel_catalog_load)
+
         # 中间：修改状态
         self.modified_var = tk.StringVar(value="")
         self.modified_label = ttk.Label(status_frame, textvariable=self.modified_var,
@@ -742,7 +917,7 @@ class MainWindow(tk.Tk):
         filter_row.pack(fill=tk.X, pady=(0, 3))
 
         self.filter_var = tk.StringVar()
-        self.filter_var.trace("w", lambda *args: self._filter_dnet_files())
+        self.filter_var.trace("w", lambda *args: self._debounce("dnet_tree", self._filter_dnet_files))
         filter_entry = ttk.Entry(filter_row, textvariable=self.filter_var, width=15)
         filter_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
 
@@ -758,12 +933,17 @@ class MainWindow(tk.Tk):
                                                  command=self._filter_dnet_files)
         configured_only_check.pack(side=tk.LEFT, padx=3)
 
-        self.dnet_tree = ttk.Treeview(dnet_frame, selectmode="browse", show="tree", height=8)
+        self.dnet_tree = VirtualTreeview(dnet_frame, selectmode="browse", show="tree", height=8)
+        self._dnet_tree_closed: Set[str] = set()  # 折叠的目录
         dnet_scroll = ttk.Scrollbar(dnet_frame, orient=tk.VERTICAL, command=self.dnet_tree.yview)
         self.dnet_tree.configure(yscrollcommand=dnet_scroll.set)
         self.dnet_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         dnet_scroll.pack(side=tk.RIGHT, fill=tk.Y)
         self.dnet_tree.bind("<<TreeviewSelect>>", self._on_dnet_selected)
+        self.dnet_tree.bind("<ButtonRelease-1>", self._on_dnet_tree_click)
+        self.dnet_tree.bind("<Return>", lambda e: self._on_dnet_tree_key(None))
+        self.dnet_tree.bind("<Left>", lambda e: self._on_dnet_tree_key(False))
+        self.dnet_tree.bind("<Right>", lambda e: self._on_dnet_tree_key(True))
 
         # 选择S2C协议面板（从右侧移到左侧）
         select_frame = ttk.LabelFrame(parent, text="选择S2C协议（双击添加到配置）", padding=5)
@@ -782,11 +962,11 @@ class MainWindow(tk.Tk):
         s2c_dnet_filter_row = ttk.Frame(s2c_dnet_frame)
         s2c_dnet_filter_row.pack(fill=tk.X, pady=(0, 3))
         self.s2c_dnet_filter_var = tk.StringVar()
-        self.s2c_dnet_filter_var.trace("w", lambda *args: self._filter_s2c_dnet_files())
+        self.s2c_dnet_filter_var.trace("w", lambda *args: self._debounce("s2c_dnet", self._filter_s2c_dnet_files))
         s2c_dnet_filter_entry = ttk.Entry(s2c_dnet_filter_row, textvariable=self.s2c_dnet_filter_var)
         s2c_dnet_filter_entry.pack(fill=tk.X, expand=True)
 
-        self.s2c_dnet_list = tk.Listbox(s2c_dnet_frame, selectmode=tk.SINGLE)
+        self.s2c_dnet_list = VirtualListbox(s2c_dnet_frame, selectmode=tk.SINGLE)
         s2c_dnet_scroll = ttk.Scrollbar(s2c_dnet_frame, orient=tk.VERTICAL, command=self.s2c_dnet_list.yview)
         self.s2c_dnet_list.configure(yscrollcommand=s2c_dnet_scroll.set)
         self.s2c_dnet_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -803,11 +983,11 @@ class MainWindow(tk.Tk):
         s2c_filter_row = ttk.Frame(s2c_list_frame)
         s2c_filter_row.pack(fill=tk.X, pady=(0, 3))
         self.s2c_filter_var = tk.StringVar()
-        self.s2c_filter_var.trace("w", lambda *args: self._filter_s2c_list())
+        self.s2c_filter_var.trace("w", lambda *args: self._debounce("s2c", self._filter_s2c_list))
         s2c_filter_entry = ttk.Entry(s2c_filter_row, textvariable=self.s2c_filter_var)
         s2c_filter_entry.pack(fill=tk.X, expand=True)
 
-        self.s2c_list = tk.Listbox(s2c_list_frame, selectmode=tk.SINGLE)
+        self.s2c_list = VirtualListbox(s2c_list_frame, selectmode=tk.SINGLE)
         s2c_scroll = ttk.Scrollbar(s2c_list_frame, orient=tk.VERTICAL, command=self.s2c_list.yview)
         self.s2c_list.configure(yscrollcommand=s2c_scroll.set)
         self.s2c_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -833,7 +1013,7 @@ class MainWindow(tk.Tk):
         c2s_frame = ttk.LabelFrame(parent, text="C2S协议列表", padding=5, style="Primary.TLabelframe")
         c2s_frame.pack(fill=tk.BOTH, padx=2, pady=2)
 
-        self.c2s_list = tk.Listbox(c2s_frame, selectmode=tk.SINGLE, font=("Microsoft YaHei UI", 10), height=11)
+        self.c2s_list = VirtualListbox(c2s_frame, selectmode=tk.SINGLE, font=("Microsoft YaHei UI", 10), height=11)
         c2s_scroll = ttk.Scrollbar(c2s_frame, orient=tk.VERTICAL, command=self.c2s_list.yview)
         self.c2s_list.configure(yscrollcommand=c2s_scroll.set)
         self.c2s_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -850,7 +1030,7 @@ class MainWindow(tk.Tk):
 
         # 配置列表
         columns = ("order", "protocol", "type", "count", "condition")
-        self.config_tree = ttk.Treeview(config_container, columns=columns, show="headings", height=8)
+        self.config_tree = VirtualTreeview(config_container, columns=columns, show="headings", height=8)
         self.config_tree.heading("order", text="顺序")
         self.config_tree.heading("protocol", text="协议名称")
         self.config_tree.heading("type", text="类型")
@@ -902,10 +1082,20 @@ class MainWindow(tk.Tk):
             self.modified_var.set("")
 
     def _set_modified(self, value: bool):
-        """设置修改状态并更新显示"""
+        """设置修改状态并更新显示（C2S模式下的编辑都作用于当前C2S的映射，同时标记为脏）"""
         self.modified = value
+        if value and self.current_config:
+            if self.current_c2s:
+                self.current_config.mark_dirty(c2s_name=self.current_c2s.name)
+            else:
+                self.current_config.mark_all_dirty()
         self._update_modified_status()
 
+    def _set_s2c_triggers_modified(self, s2c_name: str):
+        """S2C模式下修改了指定S2C的触发条件（标记为脏，分段保存时重新序列化）"""
+        self.s2c_mode_current_config.mark_dirty(s2c_name=s2c_name)
+        self.s2c_mode_triggers_modified = True
+
     def _update_stats(self):
         """更新统计信息"""
         if self.current_config:
@@ -916,90 +1106,430 @@ class MainWindow(tk.Tk):
             self.stats_var.set("C2S: 0 | S2C: 0")
 
     def _load_dnet_files(self):
-        """加载所有.dnet文件"""
-        self.dnet_files = self.parser.scan_directory(self.proto_dir)
-        self._populate_dnet_tree()
+        """在后台线程中加载所有.dnet文件，结果分批填入界面（加载过程中界面可以操作）"""
+        self._stop_catalog_load()
+        self.dnet_files = []
+        self.catalog_index.rebuild([])
+        self.validation_engine.rebuild([])
+        self.text_index.clear_files()
+        self._rebuild_search_indexes()
+        self._rebuild_dnet_tree()
         self._populate_s2c_dnet_list()
         # 初始化S2C模式的dnet列表
         if hasattr(self, 's2c_mode_dnet_list'):
             self._populate_s2c_mode_dnet_list()
-        self.status_var.set(f"已加载 {len(self.dnet_files)} 个dnet文件")
 
-    def _has_config(self, dnet: DnetFile) -> bool:
-        """检查dnet文件是否有配置"""
-        config = self.config_manager.load_config(dnet.relative_path)
-        if not config:
+        loader = CatalogLoader(self.parser, self.proto_dir, self.parse_cache)
+        self._catalog_loader = loader
+        self.load_progress.configure(value=0, maximum=1)
+        self.load_cancel_button.pack(side=tk.RIGHT, padx=1)
+        self.load_progress.pack(side=tk.RIGHT, padx=1)
+        self.status_var.set("正在加载dnet文件...")
+        loader.start()
+        self.after(LOAD_POLL_INTERVAL, self._poll_catalog_load, loader)
+
+    def _poll_catalog_load(self, loader: CatalogLoader):
+        """在主线程取出后台加载的结果，每次只处理一小段时间，避免界面卡顿"""
+        if loader is not self._catalog_loader:
+            return  # 已被新的加载取代
+
+        deadline = time.perf_counter() + LOAD_TICK_MS / 1000
+        while time.perf_counter() < deadline:
+            batches = loader.poll(1)
+            if not batches:
+                break
+            self._add_loaded_files(batches[0])
+
+        if loader.is_done():
+            self._finish_catalog_load(loader)
+        else:
+            self.after(LOAD_POLL_INTERVAL, self._poll_catalog_load, loader)
+
+    def _add_loaded_files(self, batch: LoadBatch):
+        """将一批加载结果追加到文件列表、索引和界面（各批按相对路径顺序到达，直接追加即有序）"""
+        files = batch.files
+        self.dnet_files.extend(files)
+        self.catalog_index.extend(files)
+        self.config_manager.index_trigger_files(d.relative_path for d in files)
+        self.text_index.add_files(files)
+        s2c_start = len(self.s2c_dnet_search)
+        self._extend_search_indexes(files)
+
+        self._append_dnet_tree_items(files)
+
+        # 只在本批新增的条目中筛选，追加到列表末尾
+        for listbox, filter_var, shown in (
+                (self.s2c_dnet_list, self.s2c_dnet_filter_var, self._s2c_dnet_shown),
+                (self.s2c_mode_dnet_list, self.s2c_mode_dnet_filter_var, self._s2c_mode_dnet_shown)):
+            ids = self.s2c_dnet_search.search(filter_var.get(), start=s2c_start)
+            if ids:
+                shown.extend(self.s2c_dnet_search.items[i] for i in ids)
+                listbox.insert(tk.END, *(self.s2c_dnet_search.texts[i] for i in ids))
+
+        self.load_progress.configure(value=batch.done, maximum=max(batch.total, 1))
+        self.status_var.set(f"正在加载dnet文件 {batch.done}/{batch.total}...")
+
+    def _finish_catalog_load(self, loader: CatalogLoader):
+        """加载结束（完成、取消或失败）后建立需要完整文件列表的索引"""
+        self._catalog_loader = None
+        self.load_progress.pack_forget()
+        self.load_cancel_button.pack_forget()
+
+        self.config_manager.prune_trigger_index({d.relative_path for d in self.dnet_files})
+        self.validation_engine.rebuild(self.dnet_files)
+        self.config_manager.save_summary()
+
+        if loader.error:
+            self.status_var.set(f"加载dnet文件失败: {loader.error}")
+        elif loader.cancelled:
+            self.status_var.set(f"已取消加载（已加载 {len(self.dnet_files)} 个dnet文件，按F5可继续加载）")
+        else:
+            self.status_var.set(f"已加载 {len(self.dnet_files)} 个dnet文件")
+
+    def _cancel_catalog_load(self):
+        """取消后台加载（当前批次解析完后停止，已加载的文件保留）"""
+        if self._catalog_loader is not None:
+            self._catalog_loader.cancel()
+            self.status_var.set("正在取消加载...")
+
+    def _stop_catalog_load(self):
+        """停止并丢弃正在进行的后台加载（重新加载或关闭窗口前调用，等待加载线程退出）"""
+        loader = self._catalog_loader
+        if loader is None:
+            return
+        self._catalog_loader = None
+        loader.cancel()
+        loader.join()
+        self.load_progress.pack_forget()
+        self.load_cancel_button.pack_forget()
+
+    def _warn_if_loading(self) -> bool:
+        """是否正在后台加载，加载中时提示用户稍后再试"""
+        if self._catalog_loader is None:
             return False
-        for mapping in config.c2s_mappings.values():
-            if mapping.responses:
-                return True
-        return False
+        messagebox.showinfo("提示", "dnet文件正在加载，请加载完成后再试")
+        return True
+
+    def _has_config(self, dnet: DnetFile) -> bool:
+        """检查dnet文件是否有配置（读取配置摘要，不加载完整配置）"""
+        return self.config_manager.is_configured(dnet.relative_path)
 
     def _get_configured_c2s_names(self, dnet: DnetFile) -> set:
         """获取已配置的C2S协议名称集合"""
-        config = self.config_manager.load_config(dnet.relative_path)
-        if not config:
+        summary = self.config_manager.config_summary(dnet.relative_path)
+        if not summary:
             return set()
-        return {name for name, mapping in config.c2s_mappings.items() if mapping.responses}
+        return set(summary.configured_c2s)
 
-    def _populate_dnet_tree(self):
-        """填充dnet文件树"""
-        self.dnet_tree.delete(*self.dnet_tree.get_children())
-
-        filter_text = self.filter_var.get().lower()
-        c2s_only = self.c2s_only_var.get()
-        configured_only = self.configured_only_var.get()
+    def _rebuild_dnet_tree(self):
+        """清空并按过滤条件重新填充dnet文件树（目录展开状态保留）"""
+        # 当前显示的文件: relative_path -> (dnet, 是否已配置)
+        self._dnet_tree_rows: Dict[str, Tuple[DnetFile, bool]] = {}
+        self._dnet_tree_file_rows: Dict[str, tuple] = {}  # relative_path -> (dnet, 是否已配置, 所在目录, 行)
+        self._dnet_tree_last = ""  # 已生成行的最后一个文件（后台加载时按顺序追加）
+        self._dnet_tree_tail: Tuple[Tuple[str, ...], bool] = ((), False)  # 最后一个文件所在目录及是否被折叠
 
         # 配置Treeview标签样式
         self.dnet_tree.tag_configure("configured", foreground="#228B22")
+        self._populate_dnet_tree()
 
-        # 构建目录树
-        dirs: Dict[str, str] = {}  # path -> tree_id
-
-        for dnet in self.dnet_files:
-            # 应用过滤
+    def _populate_dnet_tree(self):
+        """
+        按过滤条件更新dnet文件树：文件树是虚拟表格，目录和文件都是平铺的行（按层级缩进），
+        重新生成行数据后控件只更新可见行，节点ID固定，选中状态和滚动位置保留
+        """
+        self._dnet_tree_rows = {dnet.relative_path: (dnet, has_config)
+                                for dnet, has_config in self._dnet_tree_shown()}
+        self._layout_dnet_tree()
+
+    def _dnet_tree_shown(self) -> List[Tuple[DnetFile, bool]]:
+        """按过滤条件应显示在文件树中的文件及是否已配置"""
+        shown = []
+        search = self.dnet_search
+        for i in search.search(self.filter_var.get()):
+            dnet = search.items[i]
+            has_config = self._dnet_tree_filter(dnet, check_text=False)
+            if has_config is not None:
+                shown.append((dnet, has_config))
+        return shown
+
+    def _dnet_tree_filter(self, dnet: DnetFile, check_text: bool = True) -> Optional[bool]:
+        """
+        应用文件树过滤条件：不显示返回None，否则返回是否已配置
+        check_text=False时不检查筛选文本（调用方已通过搜索索引筛选过）
+        """
+        # 先做不需要读取配置的判断
+        if check_text:
+            filter_text = self.filter_var.get().lower()
             if filter_text and filter_text not in dnet.relative_path.lower():
-                continue
-            if c2s_only and not dnet.has_c2s():
-                continue
-
-            # 检查是否有配置
-            has_config = self._has_config(dnet)
-            if configured_only and not has_config:
-                continue
-
-            # 获取目录路径
-            dir_path = os.path.dirname(dnet.relative_path)
-
-            # 创建目录节点
-            parent = ""
-            if dir_path:
-                parts = dir_path.replace("\\", "/").split("/")
-                current_path = ""
-                for part in parts:
-                    current_path = os.path.join(current_path, part) if current_path else part
-                    if current_path not in dirs:
-                        dirs[current_path] = self.dnet_tree.insert(parent, "end", text=part, open=True)
-                    parent = dirs[current_path]
-
-            # 添加文件节点（已配置的显示绿色标记）
-            if has_config:
-                display_text = f"● {dnet.file_name} - {dnet.description}"
-                self.dnet_tree.insert(parent, "end", text=display_text, values=(dnet.relative_path,), tags=("configured",))
+                return None
+        if self.c2s_only_var.get() and not dnet.has_c2s():
+            return None
+
+        # 检查是否有配置
+        has_config = self._has_config(dnet)
+        if self.configured_only_var.get() and not has_config:
+            return None
+        return has_config
+
+    def _layout_dnet_tree(self):
+        """由当前显示的文件重新生成文件树的全部行（只在内存中生成，控件只创建可见行）"""
+        entries = sorted(self._dnet_tree_rows.values(), key=lambda entry: entry[0].relative_path)
+        self._dnet_tree_tail = ((), False)
+        self.dnet_tree.set_rows(self._dnet_tree_layout(entries))
+        self._dnet_tree_last = entries[-1][0].relative_path if entries else ""
+
+    def _dnet_tree_layout(self, entries: List[Tuple[DnetFile, bool]]) -> List[Tuple[str, dict]]:
+        """
+        将按相对路径排序的文件转换为文件树的行：进入新目录时先生成目录行，折叠的目录中的内容不生成行
+        接着_dnet_tree_tail（上一个文件所在目录）生成，分批追加时不重复生成目录行
+        """
+        rows = []
+        closed = self._dnet_tree_closed
+        last_parts, hidden = self._dnet_tree_tail
+        last_directory = None
+        for dnet, has_config in entries:
+            directory, row = self._dnet_tree_file_row(dnet, has_config)
+            if directory != last_directory:
+                last_directory = directory
+                parts = tuple(directory.replace("\\", "/").split("/")) if directory else ()
+                common = 0
+                while common < min(len(parts), len(last_parts)) and parts[common] == last_parts[common]:
+                    common += 1
+                hidden = False
+                dir_path = ""
+                for depth, part in enumerate(parts):
+                    dir_path = os.path.join(dir_path, part) if dir_path else part
+                    if depth >= common and not hidden:
+                        rows.append(self._dnet_tree_dir_row(dir_path, depth))
+                    hidden = hidden or dir_path in closed
+                last_parts = parts
+            if not hidden:
+                rows.append(row)
+        self._dnet_tree_tail = (last_parts, hidden)
+        return rows
+
+    def _dnet_tree_dir_row(self, dir_path: str, depth: int) -> Tuple[str, dict]:
+        """目录行（展开/折叠标记按目录层级缩进）"""
+        marker = "▸" if dir_path in self._dnet_tree_closed else "▾"
+        name = os.path.basename(dir_path)
+        return f"dir:{dir_path}", {'text': f"{DNET_TREE_INDENT * depth}{marker} {name}"}
+
+    def _dnet_tree_file_row(self, dnet: DnetFile, has_config: bool) -> Tuple[str, Tuple[str, dict]]:
+        """
+        文件所在目录和文件行（已配置的显示绿色标记），节点ID由相对路径决定，同一文件在过滤、刷新前后保持不变
+        生成的行按文件缓存，筛选时重新排列行不必重新生成文字
+        """
+        cached = self._dnet_tree_file_rows.get(dnet.relative_path)
+        if cached is not None and cached[0] is dnet and cached[1] == has_config:
+            return cached[2], cached[3]
+        directory = os.path.dirname(dnet.relative_path)
+        indent = DNET_TREE_INDENT * (directory.replace("\\", "/").count("/") + 1 if directory else 0)
+        mark, tags = ("● ", ("configured",)) if has_config else ("", ())
+        row = (f"file:{dnet.relative_path}", {'text': f"{indent}{mark}{dnet.file_name} - {dnet.description}",
+                                              'values': (dnet.relative_path,), 'tags': tags})
+        self._dnet_tree_file_rows[dnet.relative_path] = (dnet, has_config, directory, row)
+        return directory, row
+
+    def _append_dnet_tree_items(self, dnet_files: List[DnetFile]):
+        """
+        后台加载时追加一批文件（各批按相对路径顺序到达）：排在已有文件之后时只在末尾追加行，
+        否则重新生成全部行
+        """
+        entries = []
+        for dnet in dnet_files:
+            has_config = self._dnet_tree_filter(dnet)
+            if has_config is not None:
+                self._dnet_tree_rows[dnet.relative_path] = (dnet, has_config)
+                entries.append((dnet, has_config))
+        if not entries:
+            return
+        if entries[0][0].relative_path <= self._dnet_tree_last:
+            self._layout_dnet_tree()
+            return
+        for iid, options in self._dnet_tree_layout(entries):
+            self.dnet_tree.insert("", tk.END, iid=iid, **options)
+        self._dnet_tree_last = entries[-1][0].relative_path
+
+    def _sync_dnet_tree_item(self, dnet: DnetFile):
+        """按过滤条件更新单个文件的行（文件重新解析或配置标记变化后调用），只是文字变化时只更新这一行"""
+        has_config = self._dnet_tree_filter(dnet)
+        row = self._dnet_tree_rows.get(dnet.relative_path)
+        if has_config is None:
+            if row is not None:
+                del self._dnet_tree_rows[dnet.relative_path]
+                self._layout_dnet_tree()
+        elif row is None:
+            self._dnet_tree_rows[dnet.relative_path] = (dnet, has_config)
+            self._layout_dnet_tree()
+        elif row[0] is not dnet or row[1] != has_config:
+            self._dnet_tree_rows[dnet.relative_path] = (dnet, has_config)
+            iid, options = self._dnet_tree_file_row(dnet, has_config)[1]
+            if self.dnet_tree.exists(iid):  # 在折叠的目录中时没有对应的行
+                self.dnet_tree.item(iid, **options)
+
+    def _on_dnet_tree_click(self, event):
+        """单击目录行时展开/折叠目录"""
+        iid = self.dnet_tree.identify_row(event.y)
+        if iid.startswith("dir:"):
+            self._toggle_dnet_tree_dir(iid[len("dir:"):])
+
+    def _on_dnet_tree_key(self, expand: Optional[bool]):
+        """键盘展开/折叠选中的目录（expand为None时切换）"""
+        selection = self.dnet_tree.selection()
+        if selection and selection[0].startswith("dir:"):
+            dir_path = selection[0][len("dir:"):]
+            if expand is None or expand == (dir_path in self._dnet_tree_closed):
+                self._toggle_dnet_tree_dir(dir_path)
+        return "break"
+
+    def _toggle_dnet_tree_dir(self, dir_path: str):
+        if dir_path in self._dnet_tree_closed:
+            self._dnet_tree_closed.discard(dir_path)
+        else:
+            self._dnet_tree_closed.add(dir_path)
+        self._layout_dnet_tree()
+
+    def _apply_dnet_delta(self, delta: ScanDelta):
+        """按增量结果只更新受影响的文件树节点和S2C列表"""
+        rows = self._dnet_tree_rows
+        for dnet in delta.removed:
+            rows.pop(dnet.relative_path, None)
+        for dnet in delta.modified + delta.added:
+            # 描述可能变化，重新生成行后控件只更新文字变化的可见行
+            has_config = self._dnet_tree_filter(dnet)
+            if has_config is None:
+                rows.pop(dnet.relative_path, None)
             else:
-                display_text = f"{dnet.file_name} - {dnet.description}"
-                self.dnet_tree.insert(parent, "end", text=display_text, values=(dnet.relative_path,))
+                rows[dnet.relative_path] = (dnet, has_config)
+        self._layout_dnet_tree()
+
+        self._update_search_indexes(delta)
+        self._sync_listbox(self.s2c_dnet_list, self._s2c_dnet_display_texts(
+            self.s2c_dnet_filter_var.get(), self._s2c_dnet_shown))
+        self._sync_listbox(self.s2c_mode_dnet_list, self._s2c_dnet_display_texts(
+            self.s2c_mode_dnet_filter_var.get(), self._s2c_mode_dnet_shown))
+
+        # 当前选中的文件被删除或修改时，更新对应面板
+        changed = {d.relative_path: d for d in delta.modified}
+        removed = {d.relative_path for d in delta.removed}
+
+        if self.current_dnet:
+            path = self.current_dnet.relative_path
+            if path in removed:
+                self.current_dnet = None
+                self.current_c2s = None
+                self.current_config = None
+                self.c2s_list.delete(0, tk.END)
+                self._clear_c2s_detail()
+                self._clear_config_tree()
+                self._set_modified(False)
+            elif path in changed:
+                self.current_dnet = changed[path]
+                if self.current_c2s:
+                    self.current_c2s = next((c for c in self.current_dnet.c2s_list
+                                             if c.name == self.current_c2s.name), None)
+                self._refresh_c2s_list_marks()
+
+        if self.current_s2c_dnet:
+            path = self.current_s2c_dnet.relative_path
+            if path in removed:
+                self.current_s2c_dnet = None
+                self.s2c_list.delete(0, tk.END)
+            elif path in changed:
+                self.current_s2c_dnet = changed[path]
+                self._populate_s2c_list(self.current_s2c_dnet)
+
+        if self.s2c_mode_current_dnet:
+            path = self.s2c_mode_current_dnet.relative_path
+            if path in removed:
+                self.s2c_mode_current_dnet = None
+                self.s2c_mode_current_s2c = None
+                self.s2c_mode_protocol_list.delete(0, tk.END)
+                self._clear_s2c_mode_triggers()
+            elif path in changed:
+                self.s2c_mode_current_dnet = changed[path]
+                self._populate_s2c_mode_protocol_list(self.s2c_mode_current_dnet)
+
+    def _rebuild_search_indexes(self):
+        """按当前文件列表重建筛选用的搜索索引"""
+        self.dnet_search = SearchIndex()
+        # F5新增的文件追加到索引末尾，列表仍按相对路径显示
+        self.s2c_dnet_search = SearchIndex(order=lambda dnet: dnet.relative_path)
+        self._search_ids = {}
+        self._s2c_search_ids = {}
+        self._s2c_protocol_search = {}
+        self._extend_search_indexes(self.dnet_files)
+
+    def _extend_search_indexes(self, dnet_files: List[DnetFile]):
+        """将文件追加到搜索索引（与dnet_files保持相同顺序）"""
+        for dnet in dnet_files:
+            self._search_ids[dnet.relative_path] = self.dnet_search.add(dnet.relative_path, dnet)
+            if dnet.has_s2c():
+                self._s2c_search_ids[dnet.relative_path] = self.s2c_dnet_search.add(
+                    self._s2c_dnet_text(dnet), dnet)
+
+    def _update_search_indexes(self, delta: ScanDelta):
+        """按增量扫描结果只更新变化的文件的索引条目（代价与变化的文件数成正比）"""
+        for dnet in delta.removed:
+            path = dnet.relative_path
+            self.dnet_search.remove(self._search_ids.pop(path))
+            s2c_id = self._s2c_search_ids.pop(path, None)
+            if s2c_id is not None:
+                self.s2c_dnet_search.remove(s2c_id)
+            self._s2c_protocol_search.pop(path, None)
+        for dnet in delta.modified:
+            path = dnet.relative_path
+            self.dnet_search.replace(self._search_ids[path], path, dnet)
+            s2c_id = self._s2c_search_ids.get(path)
+            if not dnet.has_s2c():
+                if s2c_id is not None:
+                    self.s2c_dnet_search.remove(self._s2c_search_ids.pop(path))
+            elif s2c_id is None:
+                self._s2c_search_ids[path] = self.s2c_dnet_search.add(self._s2c_dnet_text(dnet), dnet)
+            else:
+                self.s2c_dnet_search.replace(s2c_id, self._s2c_dnet_text(dnet), dnet)
+        self._extend_search_indexes(delta.added)
+
+    @staticmethod
+    def _s2c_dnet_text(dnet: DnetFile) -> str:
+        return f"{dnet.relative_path} - {dnet.description}"
+
+    def _s2c_protocol_index(self, dnet: DnetFile) -> SearchIndex:
+        """dnet文件中S2C协议的搜索索引（第一次筛选该文件时建立，文件重新解析后重建）"""
+        cached = self._s2c_protocol_search.get(dnet.relative_path)
+        if cached is not None and cached[0] is dnet:
+            return cached[1]
+        index = SearchIndex((f"{s2c.name} - {s2c.description}", s2c) for s2c in dnet.s2c_list)
+        self._s2c_protocol_search[dnet.relative_path] = (dnet, index)
+        return index
+
+    def _s2c_dnet_display_texts(self, filter_text: str, shown: List[DnetFile]) -> List[str]:
+        """包含S2C的dnet文件列表的显示文本（应用筛选），筛选出的文件写入shown"""
+        search = self.s2c_dnet_search
+        ids = search.filter(filter_text)
+        shown[:] = [search.items[i] for i in ids]
+        return [search.texts[i] for i in ids]
+
+    def _debounce(self, key: str, callback):
+        """延迟执行筛选：连续输入时只在停止输入FILTER_DEBOUNCE_MS毫秒后执行一次"""
+        job = self._debounce_jobs.pop(key, None)
+        if job is not None:
+            self.after_cancel(job)
+        self._debounce_jobs[key] = self.after(FILTER_DEBOUNCE_MS, self._run_debounced, key, callback)
+
+    def _run_debounced(self, key: str, callback):
+        self._debounce_jobs.pop(key, None)
+        callback()
+
+    def _sync_listbox(self, listbox: VirtualListbox, texts: List[str]):
+        """将列表内容更新为texts，保留选中行和滚动位置（虚拟列表只重建可见行）"""
+        listbox.set_items(texts, keep_selection=True)
 
     def _populate_s2c_dnet_list(self):
         """填充包含S2C的dnet文件列表"""
-        self.s2c_dnet_list.delete(0, tk.END)
-        filter_text = self.s2c_dnet_filter_var.get().lower()
-        for dnet in self.dnet_files:
-            if dnet.has_s2c():
-                display_text = f"{dnet.relative_path} - {dnet.description}"
-                if filter_text and filter_text not in display_text.lower():
-                    continue
-                self.s2c_dnet_list.insert(tk.END, display_text)
+        self.s2c_dnet_list.set_items(self._s2c_dnet_display_texts(
+            self.s2c_dnet_filter_var.get(), self._s2c_dnet_shown))
 
     def _filter_s2c_dnet_files(self):
         """筛选S2C dnet文件列表"""
@@ -1019,9 +1549,26 @@ class MainWindow(tk.Tk):
         self._populate_dnet_tree()
 
     def _refresh_dnet_files(self):
-        """刷新dnet文件列表"""
-        self._load_dnet_files()
-        messagebox.showinfo("刷新", "dnet文件列表已刷新")
+        """刷新dnet文件列表（只重新解析新增和变化的文件）"""
+        if self._warn_if_loading():
+            return
+        delta = self.parser.rescan(self.proto_dir, self.dnet_files, parallel=True,
+                                   cache=self.parse_cache)
+        self.dnet_files = delta.files
+        # 只同步变化的文件对应的配置（重新校验摘要、更新反向触发索引），代价与变化的文件数成正比
+        changed = [d.relative_path for d in delta.added + delta.modified]
+        self.config_manager.refresh_summaries(changed)
+        self.config_manager.index_trigger_files(changed)
+        self.config_manager.unindex_trigger_files(d.relative_path for d in delta.removed)
+        if not delta.is_empty():
+            self.catalog_index.apply_delta(delta)
+            self.validation_engine.apply_delta(delta)
+            self.text_index.apply_delta(delta)
+            self._apply_dnet_delta(delta)
+        self.config_manager.save_summary()
+        self.status_var.set(f"已加载 {len(self.dnet_files)} 个dnet文件")
+        messagebox.showinfo("刷新", f"dnet文件列表已刷新\n\n新增 {len(delta.added)} 个，"
+                                  f"删除 {len(delta.removed)} 个，修改 {len(delta.modified)} 个")
 
     def _on_dnet_selected(self, event):
         """选择dnet文件时"""
@@ -1035,10 +1582,13 @@ class MainWindow(tk.Tk):
             return
 
         relative_path = values[0]
-        dnet = next((d for d in self.dnet_files if d.relative_path == relative_path), None)
+        dnet = self.catalog_index.get_file(relative_path)
         if not dnet:
             return
+        self._open_c2s_dnet(dnet)
 
+    def _open_c2s_dnet(self, dnet: DnetFile):
+        """在C2S模式中打开dnet文件（加载配置、填充C2S列表并选中第一个C2S）"""
         # 检查是否需要保存
         if self.modified:
             if messagebox.askyesno("保存", "当前配置已修改，是否保存？"):
@@ -1053,14 +1603,7 @@ class MainWindow(tk.Tk):
             self.current_config = self.config_manager.create_empty_config(dnet)
 
         # 更新C2S列表（已配置的显示绿色标记）
-        self.c2s_list.delete(0, tk.END)
-        configured_c2s = self._get_configured_c2s_names(dnet)
-        for c2s in dnet.c2s_list:
-            if c2s.name in configured_c2s:
-                self.c2s_list.insert(tk.END, f"● {c2s.name} - {c2s.description}")
-                self.c2s_list.itemconfig(tk.END, fg="#228B22")
-            else:
-                self.c2s_list.insert(tk.END, f"{c2s.name} - {c2s.description}")
+        self._fill_c2s_list(dnet, self._get_configured_c2s_names(dnet))
 
         # 清空详情和配置
         self._clear_c2s_detail()
@@ -1077,7 +1620,7 @@ class MainWindow(tk.Tk):
         self.status_var.set(f"已选择: {dnet.relative_path}")
 
     def _refresh_c2s_list_marks(self):
-        """刷新C2S列表的配置标记"""
+        """刷新C2S列表的配置标记（只重绘标记变化的行，保留选中项和滚动位置）"""
         if not self.current_dnet:
             return
 
@@ -1089,18 +1632,44 @@ class MainWindow(tk.Tk):
                          if mapping.responses} if self.current_config else set()
 
         # 更新列表
-        self.c2s_list.delete(0, tk.END)
-        for c2s in self.current_dnet.c2s_list:
-            if c2s.name in configured_c2s:
-                self.c2s_list.insert(tk.END, f"● {c2s.name} - {c2s.description}")
-                self.c2s_list.itemconfig(tk.END, fg="#228B22")
-            else:
-                self.c2s_list.insert(tk.END, f"{c2s.name} - {c2s.description}")
+        texts, options = self._c2s_list_rows(self.current_dnet, configured_c2s)
+        self._reconcile_listbox(self.c2s_list, texts, options)
 
-        # 恢复选中项
-        if current_selection:
+        # 恢复选中项（协议列表变化后整体替换时，按行号恢复）
+        if current_selection and not self.c2s_list.curselection():
             self.c2s_list.selection_set(current_selection[0])
 
+    def _fill_c2s_list(self, dnet: DnetFile, configured_c2s: set):
+        """填充C2S列表（已配置的显示绿色标记），只创建可见行"""
+        self.c2s_list.set_items(*self._c2s_list_rows(dnet, configured_c2s))
+
+    @staticmethod
+    def _c2s_list_rows(dnet: DnetFile, configured_c2s: set) -> Tuple[List[str], List[Optional[dict]]]:
+        """C2S列表每行的显示文本和itemconfig选项"""
+        texts = []
+        options = []
+        for c2s in dnet.c2s_list:
+            if c2s.name in configured_c2s:
+                texts.append(f"● {c2s.name} - {c2s.description}")
+                options.append({"fg": "#228B22"})
+            else:
+                texts.append(f"{c2s.name} - {c2s.description}")
+                options.append(None)
+        return texts, options
+
+    @staticmethod
+    def _reconcile_listbox(listbox: VirtualListbox, texts: List[str], options: List[Optional[dict]]):
+        """
+        将列表更新为texts/options：行数不变时只重绘内容或选项变化的行，
+        行数变化时整体替换（按文本保留选中行和滚动位置）
+        """
+        if listbox.size() != len(texts):
+            listbox.set_items(texts, options, keep_selection=True)
+            return
+        for row, (text, option) in enumerate(zip(texts, options)):
+            if listbox.get(row) != text or listbox.itemconfigure(row) != (option or {}):
+                listbox.set_item(row, text, option)
+
     def _on_c2s_selected(self, event):
         """选择C2S协议时"""
         selection = self.c2s_list.curselection()
@@ -1121,8 +1690,7 @@ class MainWindow(tk.Tk):
         text = f"协议名称: {protocol.name}\n"
         text += f"描述: {protocol.description}\n"
         text += f"\n字段列表:\n"
-        for field in protocol.fields:
-            text += f"  - {field.name} ({field.type_info}): {field.description}\n"
+        text += format_fields(protocol.fields)
 
         self.c2s_detail_text.insert("1.0", text)
         self.c2s_detail_text.config(state=tk.DISABLED)
@@ -1173,18 +1741,18 @@ class MainWindow(tk.Tk):
                 group_colors[resp.order_group] = color_palette[color_idx % len(color_palette)]
                 color_idx += 1
 
-            item_id = self.config_tree.insert("", tk.END, values=(
-                order_display, resp.protocol, resp.type, resp.count, resp.condition
-            ))
-
             # 设置行标签（顺序组优先，否则用交替行）
             if resp.order_group and resp.order_group in group_colors:
                 self.config_tree.tag_configure(f"group_{resp.order_group}",
                                                 background=group_colors[resp.order_group])
-                self.config_tree.item(item_id, tags=(f"group_{resp.order_group}",))
+                row_tag = f"group_{resp.order_group}"
             else:
                 row_tag = "oddrow" if idx % 2 == 0 else "evenrow"
-                self.config_tree.item(item_id, tags=(row_tag,))
+
+            # 虚拟表格只保存行数据，可见行才创建到控件中
+            self.config_tree.insert("", tk.END, values=(
+                order_display, resp.protocol, resp.type, resp.count, resp.condition
+            ), tags=(row_tag,))
 
         self._update_stats()
 
@@ -1199,33 +1767,19 @@ class MainWindow(tk.Tk):
             return
 
         index = selection[0]
-        # 找到对应的dnet文件（应用相同的筛选条件）
-        filter_text = self.s2c_dnet_filter_var.get().lower()
-        s2c_dnet_files = []
-        for d in self.dnet_files:
-            if d.has_s2c():
-                display_text = f"{d.relative_path} - {d.description}"
-                if filter_text and filter_text not in display_text.lower():
-                    continue
-                s2c_dnet_files.append(d)
-
-        if index < len(s2c_dnet_files):
-            dnet = s2c_dnet_files[index]
+        # 找到对应的dnet文件（列表填充时记录的筛选结果）
+        if index < len(self._s2c_dnet_shown):
+            dnet = self._s2c_dnet_shown[index]
             self.current_s2c_dnet = dnet  # 保存当前选中的S2C dnet
             self._populate_s2c_list(dnet)
 
     def _populate_s2c_list(self, dnet: DnetFile):
         """填充S2C协议列表"""
-        self.s2c_list.delete(0, tk.END)
-        filter_text = self.s2c_filter_var.get().lower()
+        search = self._s2c_protocol_index(dnet)
+        ids = search.filter(self.s2c_filter_var.get())
         # 保存筛选后的S2C列表
-        self._filtered_s2c_list = []
-        for s2c in dnet.s2c_list:
-            display_text = f"{s2c.name} - {s2c.description}"
-            if filter_text and filter_text not in display_text.lower():
-                continue
-            self._filtered_s2c_list.append(s2c)
-            self.s2c_list.insert(tk.END, display_text)
+        self._filtered_s2c_list = [search.items[i] for i in ids]
+        self.s2c_list.set_items([search.texts[i] for i in ids])
 
     def _on_s2c_selected(self, event):
         """选择S2C协议时"""
@@ -1249,8 +1803,7 @@ class MainWindow(tk.Tk):
         text = f"协议名称: {protocol.name}\n"
         text += f"描述: {protocol.description}\n"
         text += f"\n字段列表:\n"
-        for field in protocol.fields:
-            text += f"  - {field.name} ({field.type_info}): {field.description}\n"
+        text += format_fields(protocol.fields)
 
         self.s2c_detail_text.insert("1.0", text)
         self.s2c_detail_text.config(state=tk.DISABLED)
@@ -1282,6 +1835,7 @@ class MainWindow(tk.Tk):
             return
 
         c2s_name = self.current_c2s.name
+        self._record_undo(C2S_SECTION, c2s_name, "添加响应")
         if c2s_name not in self.current_config.c2s_mappings:
             self.current_config.c2s_mappings[c2s_name] = C2SMapping(
                 description=self.current_c2s.description
@@ -1325,6 +1879,7 @@ class MainWindow(tk.Tk):
             return
 
         # 交换顺序
+        self._record_undo(C2S_SECTION, c2s_name, "上移响应")
         mapping.responses[index], mapping.responses[index - 1] = \
             mapping.responses[index - 1], mapping.responses[index]
 
@@ -1354,6 +1909,7 @@ class MainWindow(tk.Tk):
             return
 
         # 交换顺序
+        self._record_undo(C2S_SECTION, c2s_name, "下移响应")
         mapping.responses[index], mapping.responses[index + 1] = \
             mapping.responses[index + 1], mapping.responses[index]
 
@@ -1399,37 +1955,27 @@ class MainWindow(tk.Tk):
         protocol_name = values[1]  # 协议名称在第二列
 
         # 查找该S2C所属的dnet文件
-        target_dnet = None
-        target_s2c = None
-        for dnet in self.dnet_files:
-            for s2c in dnet.s2c_list:
-                if s2c.name == protocol_name:
-                    target_dnet = dnet
-                    target_s2c = s2c
-                    break
-            if target_dnet:
-                break
-
-        if not target_dnet or not target_s2c:
+        ref = self.catalog_index.find(protocol_name, 'S2C')
+        if not ref:
             messagebox.showwarning("提示", f"未找到S2C协议: {protocol_name}")
             return
+        target_dnet = ref.dnet
+        target_s2c = ref.protocol
+
+        self._select_in_s2c_mode(target_dnet, target_s2c)
+        self.status_var.set(f"已跳转到S2C: {protocol_name}")
 
+    def _select_in_s2c_mode(self, target_dnet: DnetFile, target_s2c: Protocol):
+        """切换到S2C模式并选中指定的S2C协议（文件被S2C模式的筛选条件隐藏时只切换）"""
         # 切换到S2C模式Tab
         self.mode_notebook.select(1)  # S2C模式是第二个Tab
 
         # 在dnet文件列表中选中对应文件
-        filter_text = self.s2c_mode_dnet_filter_var.get().lower()
         dnet_index = -1
-        idx = 0
-        for d in self.dnet_files:
-            if d.has_s2c():
-                display_text = f"{d.relative_path} - {d.description}"
-                if filter_text and filter_text not in display_text.lower():
-                    continue
-                if d.relative_path == target_dnet.relative_path:
-                    dnet_index = idx
-                    break
-                idx += 1
+        for i, d in enumerate(self._s2c_mode_dnet_shown):
+            if d.relative_path == target_dnet.relative_path:
+                dnet_index = i
+                break
 
         if dnet_index >= 0:
             self.s2c_mode_dnet_list.selection_clear(0, tk.END)
@@ -1444,7 +1990,6 @@ class MainWindow(tk.Tk):
             self._populate_s2c_mode_protocol_list(target_dnet)
 
             # 在S2C协议列表中选中对应协议
-            s2c_filter_text = self.s2c_mode_protocol_filter_var.get().lower()
             s2c_index = -1
             for i, s2c in enumerate(self.s2c_mode_filtered_s2c_list):
                 if s2c.name == target_s2c.name:
@@ -1461,7 +2006,34 @@ class MainWindow(tk.Tk):
                 self._show_s2c_mode_detail(target_s2c)
                 self._load_s2c_triggers(target_s2c.name)
 
-        self.status_var.set(f"已跳转到S2C: {protocol_name}")
+    def _show_quick_open(self):
+        """全文搜索（Ctrl+P），选中结果后跳转到对应的协议"""
+        dialog = QuickOpenDialog(self, self.text_index)
+        self.wait_window(dialog)
+        if dialog.result:
+            self._open_text_hit(dialog.result)
+
+    def _open_text_hit(self, hit: TextHit):
+        """跳转到搜索结果：C2S协议和条件在C2S模式中打开，S2C协议和触发条件在S2C模式中打开"""
+        ref = self.catalog_index.find_in_file(hit.dnet_file, hit.protocol, hit.direction)
+        if not ref:
+            messagebox.showwarning("提示", f"未找到协议: {hit.protocol}")
+            return
+
+        if hit.direction == 'S2C':
+            self._select_in_s2c_mode(ref.dnet, ref.protocol)
+        else:
+            self.mode_notebook.select(0)
+            self._open_c2s_dnet(ref.dnet)
+            index = next((i for i, c2s in enumerate(ref.dnet.c2s_list) if c2s.name == hit.protocol), -1)
+            if index >= 0:
+                self.c2s_list.selection_clear(0, tk.END)
+                self.c2s_list.selection_set(index)
+                self.c2s_list.see(index)
+                self.current_c2s = ref.dnet.c2s_list[index]
+                self._show_c2s_detail(self.current_c2s)
+                self._load_c2s_config()
+        self.status_var.set(f"已跳转到: {hit.protocol} ({hit.dnet_file})")
 
     def _edit_selected_response(self):
         """编辑选中的响应"""
@@ -1494,11 +2066,9 @@ class MainWindow(tk.Tk):
         protocol_name = values[1]  # 协议名称在第二列
 
         # 在所有dnet文件中查找该协议
-        for dnet in self.dnet_files:
-            for s2c in dnet.s2c_list:
-                if s2c.name == protocol_name:
-                    self._show_s2c_detail(s2c)
-                    return
+        ref = self.catalog_index.find(protocol_name, 'S2C')
+        if ref:
+            self._show_s2c_detail(ref.protocol)
 
     def _on_config_double_click(self, event):
         """双击配置项，弹出对话框编辑类型和条件"""
@@ -1529,6 +2099,8 @@ class MainWindow(tk.Tk):
         self.wait_window(dialog)
 
         if dialog.result:
+            if self.current_c2s:
+                self._record_undo(C2S_SECTION, self.current_c2s.name, "编辑响应")
             response.type = dialog.result["type"]
             response.condition = dialog.result["condition"]
             response.count = dialog.result["count"]
@@ -1584,16 +2156,16 @@ class MainWindow(tk.Tk):
             messagebox.showinfo("提示", "该响应没有设置顺序组")
             return
 
-        # 查找或创建顺序组
+        # 查找顺序组，不存在时确认后才创建（取消不留下空组和撤销记录）
         group = next((g for g in mapping.order_groups if g.name == response.order_group), None)
-        if not group:
-            group = OrderGroup(name=response.order_group, description="")
-            mapping.order_groups.append(group)
-
-        dialog = OrderGroupEditDialog(self, group)
+        dialog = OrderGroupEditDialog(self, group or OrderGroup(name=response.order_group, description=""))
         self.wait_window(dialog)
 
         if dialog.result:
+            self._record_undo(C2S_SECTION, c2s_name, "编辑顺序组")
+            if not group:
+                group = OrderGroup(name=response.order_group, description="")
+                mapping.order_groups.append(group)
             group.description = dialog.result["description"]
             self._set_modified(True)
             self._load_c2s_config()  # 刷新显示
@@ -1633,6 +2205,7 @@ class MainWindow(tk.Tk):
         if not mapping or index >= len(mapping.responses):
             return
 
+        self._record_undo(C2S_SECTION, c2s_name, "删除响应")
         del mapping.responses[index]
         self._update_response_orders(mapping)
         self._load_c2s_config()
@@ -1646,35 +2219,88 @@ class MainWindow(tk.Tk):
             messagebox.showwarning("提示", "没有可保存的配置")
             return
 
-        # 验证配置
-        warnings = self.config_manager.validate_config(
-            self.current_config, self.current_dnet, self.dnet_files
-        )
+        # 验证配置（后台加载完成前符号表不完整，跳过验证）
+        diagnostics = [] if self._catalog_loader is not None else \
+            self.validation_engine.validate(self.current_dnet.relative_path, self.current_config)
+        warnings = [d.message for d in diagnostics]
         if warnings:
             msg = "配置存在以下警告：\n\n" + "\n".join(warnings) + "\n\n是否继续保存？"
             if not messagebox.askyesno("验证警告", msg):
                 return
 
-        if self.config_manager.save_config(self.current_dnet.relative_path, self.current_config):
-            self._set_modified(False)
-            self.status_var.set("配置已保存")
-            # 刷新标记显示
-            self._refresh_c2s_list_marks()
-            self._populate_dnet_tree()
-            messagebox.showinfo("保存成功", "配置已成功保存")
-        else:
-            messagebox.showerror("保存失败", "配置保存失败，请检查文件权限")
+        # 后台写入，写完之前读取的就是提交的内容，标记可以立即刷新
+        seq = self.config_manager.save_config_async(self.current_dnet.relative_path, self.current_config)
+        self._save_sections[seq] = C2S_SECTION
+        self._set_modified(False)
+        self.status_var.set("正在保存配置...")
+        # 刷新标记显示（只更新标记变化的行和当前文件的节点）
+        self._refresh_c2s_list_marks()
+        self._sync_dnet_tree_item(self.current_dnet)
+        self._schedule_save_poll()
+
+    def _schedule_save_poll(self):
+        """有后台保存时定时检查写入结果"""
+        if not self._save_poll_scheduled:
+            self._save_poll_scheduled = True
+            self.after(SAVE_POLL_INTERVAL, self._poll_saves)
+
+    def _poll_saves(self):
+        """在主线程处理后台保存的结果"""
+        self._save_poll_scheduled = False
+        failed = []
+        for result in self.config_manager.poll_saves():
+            section = self._save_sections.pop(result.seq, C2S_SECTION)
+            if result.ok:
+                self.status_var.set(f"已保存: {os.path.basename(result.path)}")
+                continue
+            failed.append(f"{result.path}: {result.error}")
+            # 发起保存的模式仍在编辑该文件时重新标记为已修改，避免切换文件时丢失修改
+            # 未写入的修改范围不确定，整体标记为脏
+            if section == S2C_SECTION:
+                if self.s2c_mode_current_dnet and self.s2c_mode_current_dnet.relative_path == result.key:
+                    self.s2c_mode_current_config.mark_all_dirty()
+                    self.s2c_mode_triggers_modified = True
+            elif self.current_dnet and self.current_dnet.relative_path == result.key:
+                self.current_config.mark_all_dirty()
+                self.modified = True
+                self._update_modified_status()
+
+        if failed:
+            self.status_var.set("保存失败")
+            messagebox.showerror("保存失败", "以下配置保存失败，请检查文件权限：\n\n" + "\n".join(failed))
+
+        if self.config_manager.has_pending_saves():
+            self._schedule_save_poll()
 
     def _validate_all(self):
-        """验证所有配置"""
-        all_warnings = []
+        """在后台线程验证所有配置，完成后显示结果（验证过程中界面可以操作）"""
+        if self._warn_if_loading():
+            return
+        if self._validation_job is None:
+            job = self.validation_engine.start_validate_all(parallel=True)
+            self._validation_job = job
+            self.after(VALIDATE_POLL_INTERVAL, self._poll_validation, job)
+        self.status_var.set("正在验证所有配置...")
+
+    def _poll_validation(self, job: ValidationJob):
+        """在主线程检查后台验证是否完成，完成后记录并显示结果"""
+        if job is not self._validation_job:
+            return  # 已切换目录，结果作废
+        if not job.is_done():
+            self.after(VALIDATE_POLL_INTERVAL, self._poll_validation, job)
+            return
+        self._validation_job = None
 
-        for dnet in self.dnet_files:
-            config = self.config_manager.load_config(dnet.relative_path)
-            if config:
-                warnings = self.config_manager.validate_config(config, dnet, self.dnet_files)
-                for w in warnings:
-                    all_warnings.append(f"[{dnet.relative_path}] {w}")
+        if job.error:
+            self.status_var.set("验证失败")
+            messagebox.showerror("验证失败", f"验证配置失败: {job.error}")
+            return
+        if not self.validation_engine.finish_validate_all(job):
+            self.status_var.set("验证期间dnet文件已变化，请重新验证")
+            return
+
+        self.status_var.set("验证完成")
+        all_warnings = [f"[{d.file}] {d.message}" for d in self.validation_engine.diagnostics()]
 
         if all_warnings:
             msg = "发现以下问题：\n\n" + "\n".join(all_warnings[:20])
@@ -1684,13 +2310,53 @@ class MainWindow(tk.Tk):
         else:
             messagebox.showinfo("验证结果", "所有配置验证通过")
 
+    def _record_undo(self, section: str, name: str, label: str):
+        """修改之前记录撤销历史（只保存将被修改的C2S映射或S2C触发条件）"""
+        config = self.current_config if section == C2S_SECTION else self.s2c_mode_current_config
+        if not config:
+            return
+        # 已切换文件的旧配置不能再撤销，顺便释放其记录
+        self.undo_history.prune((self.current_config, self.s2c_mode_current_config))
+        self.undo_history.record(config, section, name, label)
+
     def _undo(self):
-        """撤销（待实现）"""
-        messagebox.showinfo("提示", "撤销功能尚未实现")
+        """撤销"""
+        record = self.undo_history.undo((self.current_config, self.s2c_mode_current_config))
+        if record is None:
+            self.status_var.set("没有可撤销的操作")
+            return
+        self._show_history_record(record)
+        self.status_var.set(f"已撤销: {record.label}")
 
     def _redo(self):
-        """重做（待实现）"""
-        messagebox.showinfo("提示", "重做功能尚未实现")
+        """重做"""
+        record = self.undo_history.redo((self.current_config, self.s2c_mode_current_config))
+        if record is None:
+            self.status_var.set("没有可重做的操作")
+            return
+        self._show_history_record(record)
+        self.status_var.set(f"已重做: {record.label}")
+
+    def _show_history_record(self, record):
+        """撤销/重做后刷新修改状态和对应的显示（脏标记已由撤销历史设置）"""
+        if record.section == C2S_SECTION:
+            self.modified = True
+            self._update_modified_status()
+            # 切换到被修改的C2S
+            index = next((i for i, c in enumerate(self.current_dnet.c2s_list) if c.name == record.name), -1)
+            if index >= 0:
+                self.mode_notebook.select(0)
+                self.c2s_list.selection_clear(0, tk.END)
+                self.c2s_list.selection_set(index)
+                self.c2s_list.see(index)
+                self.current_c2s = self.current_dnet.c2s_list[index]
+                self._show_c2s_detail(self.current_c2s)
+            self._load_c2s_config()
+        else:
+            self._set_s2c_triggers_modified(record.name)
+            self.mode_notebook.select(1)
+            if self.s2c_mode_current_s2c and self.s2c_mode_current_s2c.name == record.name:
+                self._load_s2c_triggers(record.name)
 
     def _show_settings(self):
         """显示设置目录对话框"""
@@ -1711,7 +2377,12 @@ class MainWindow(tk.Tk):
                 # 更新目录
                 self.proto_dir = new_proto
                 self.config_dir = new_config
-                self.config_manager = ConfigManager(self.proto_dir, self.config_dir)
+                self.config_manager.close()
+                self._poll_saves()
+                self.config_manager.save_summary()
+                self.config_manager = self._create_config_manager()
+                self.validation_engine = ValidationEngine(self.config_manager)
+                self._validation_job = None
 
                 # 保存设置到本地
                 self._save_settings()
@@ -1743,6 +2414,7 @@ class MainWindow(tk.Tk):
 - Ctrl+S: 保存配置
 - Ctrl+Z: 撤销
 - Ctrl+Y: 重做
+- Ctrl+P: 全文搜索（协议、字段、描述、配置条件）
 """
         messagebox.showinfo("使用说明", help_text)
 
@@ -1779,12 +2451,12 @@ class MainWindow(tk.Tk):
         filter_row.pack(fill=tk.X, pady=(0, 3))
 
         self.s2c_mode_dnet_filter_var = tk.StringVar()
-        self.s2c_mode_dnet_filter_var.trace("w", lambda *args: self._filter_s2c_mode_dnet_files())
+        self.s2c_mode_dnet_filter_var.trace("w", lambda *args: self._debounce("s2c_mode_dnet", self._filter_s2c_mode_dnet_files))
         filter_entry = ttk.Entry(filter_row, textvariable=self.s2c_mode_dnet_filter_var)
         filter_entry.pack(fill=tk.X, expand=True)
 
         # dnet文件列表
-        self.s2c_mode_dnet_list = tk.Listbox(dnet_frame, selectmode=tk.SINGLE)
+        self.s2c_mode_dnet_list = VirtualListbox(dnet_frame, selectmode=tk.SINGLE)
         dnet_scroll = ttk.Scrollbar(dnet_frame, orient=tk.VERTICAL, command=self.s2c_mode_dnet_list.yview)
         self.s2c_mode_dnet_list.configure(yscrollcommand=dnet_scroll.set)
         self.s2c_mode_dnet_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -1842,12 +2514,12 @@ class MainWindow(tk.Tk):
         s2c_filter_row.pack(fill=tk.X, pady=(0, 3))
 
         self.s2c_mode_protocol_filter_var = tk.StringVar()
-        self.s2c_mode_protocol_filter_var.trace("w", lambda *args: self._filter_s2c_mode_protocol_list())
+        self.s2c_mode_protocol_filter_var.trace("w", lambda *args: self._debounce("s2c_mode_protocol", self._filter_s2c_mode_protocol_list))
         s2c_filter_entry = ttk.Entry(s2c_filter_row, textvariable=self.s2c_mode_protocol_filter_var)
         s2c_filter_entry.pack(fill=tk.X, expand=True)
 
         # S2C协议列表
-        self.s2c_mode_protocol_list = tk.Listbox(s2c_frame, selectmode=tk.SINGLE, font=("Microsoft YaHei UI", 10), height=10)
+        self.s2c_mode_protocol_list = VirtualListbox(s2c_frame, selectmode=tk.SINGLE, font=("Microsoft YaHei UI", 10), height=10)
         s2c_scroll = ttk.Scrollbar(s2c_frame, orient=tk.VERTICAL, command=self.s2c_mode_protocol_list.yview)
         self.s2c_mode_protocol_list.configure(yscrollcommand=s2c_scroll.set)
         self.s2c_mode_protocol_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -1902,14 +2574,8 @@ class MainWindow(tk.Tk):
 
     def _populate_s2c_mode_dnet_list(self):
         """填充S2C模式的dnet文件列表"""
-        self.s2c_mode_dnet_list.delete(0, tk.END)
-        filter_text = self.s2c_mode_dnet_filter_var.get().lower()
-        for dnet in self.dnet_files:
-            if dnet.has_s2c():
-                display_text = f"{dnet.relative_path} - {dnet.description}"
-                if filter_text and filter_text not in display_text.lower():
-                    continue
-                self.s2c_mode_dnet_list.insert(tk.END, display_text)
+        self.s2c_mode_dnet_list.set_items(self._s2c_dnet_display_texts(
+            self.s2c_mode_dnet_filter_var.get(), self._s2c_mode_dnet_shown))
 
     def _filter_s2c_mode_dnet_files(self):
         """筛选S2C模式的dnet文件列表"""
@@ -1937,17 +2603,8 @@ class MainWindow(tk.Tk):
                 self._save_s2c_triggers()
 
         index = selection[0]
-        filter_text = self.s2c_mode_dnet_filter_var.get().lower()
-        s2c_dnet_files = []
-        for d in self.dnet_files:
-            if d.has_s2c():
-                display_text = f"{d.relative_path} - {d.description}"
-                if filter_text and filter_text not in display_text.lower():
-                    continue
-                s2c_dnet_files.append(d)
-
-        if index < len(s2c_dnet_files):
-            dnet = s2c_dnet_files[index]
+        if index < len(self._s2c_mode_dnet_shown):
+            dnet = self._s2c_mode_dnet_shown[index]
             self.s2c_mode_current_dnet = dnet
             self.s2c_mode_current_s2c = None
             # 加载该dnet文件的配置
@@ -1959,15 +2616,10 @@ class MainWindow(tk.Tk):
 
     def _populate_s2c_mode_protocol_list(self, dnet: DnetFile):
         """填充S2C模式的协议列表"""
-        self.s2c_mode_protocol_list.delete(0, tk.END)
-        filter_text = self.s2c_mode_protocol_filter_var.get().lower()
-        self.s2c_mode_filtered_s2c_list = []
-        for s2c in dnet.s2c_list:
-            display_text = f"{s2c.name} - {s2c.description}"
-            if filter_text and filter_text not in display_text.lower():
-                continue
-            self.s2c_mode_filtered_s2c_list.append(s2c)
-            self.s2c_mode_protocol_list.insert(tk.END, display_text)
+        search = self._s2c_protocol_index(dnet)
+        ids = search.filter(self.s2c_mode_protocol_filter_var.get())
+        self.s2c_mode_filtered_s2c_list = [search.items[i] for i in ids]
+        self.s2c_mode_protocol_list.set_items([search.texts[i] for i in ids])
 
     def _on_s2c_mode_protocol_selected(self, event):
         """S2C模式：选择S2C协议"""
@@ -1995,8 +2647,7 @@ class MainWindow(tk.Tk):
         text = f"协议名称: {protocol.name}\n"
         text += f"描述: {protocol.description}\n"
         text += f"\n字段列表:\n"
-        for field in protocol.fields:
-            text += f"  - {field.name} ({field.type_info}): {field.description}\n"
+        text += format_fields(protocol.fields)
 
         self.s2c_mode_detail_text.insert("1.0", text)
         self.s2c_mode_detail_text.config(state=tk.DISABLED)
@@ -2035,22 +2686,16 @@ class MainWindow(tk.Tk):
                 ))
 
     def _find_c2s_triggers_for_s2c(self, s2c_name: str) -> List[dict]:
-        """遍历所有C2S配置，找出触发指定S2C的C2S"""
+        """通过反向触发索引找出触发指定S2C的C2S"""
         triggers = []
-        for dnet in self.dnet_files:
-            config = self.config_manager.load_config(dnet.relative_path)
-            if not config:
-                continue
-            for c2s_name, mapping in config.c2s_mappings.items():
-                for resp in mapping.responses:
-                    if resp.protocol == s2c_name:
-                        triggers.append({
-                            "c2s_name": c2s_name,
-                            "dnet_file": dnet.relative_path,
-                            "type": resp.type,
-                            "count": resp.count,
-                            "condition": resp.condition
-                        })
+        for ref in self.config_manager.find_triggers(s2c_name):
+            triggers.append({
+                "c2s_name": ref.c2s_name,
+                "dnet_file": ref.dnet_file,
+                "type": ref.response.type,
+                "count": ref.response.count,
+                "condition": ref.response.condition
+            })
         return triggers
 
     def _on_s2c_mode_c2s_trigger_selected(self, event):
@@ -2068,12 +2713,9 @@ class MainWindow(tk.Tk):
         dnet_file = values[1]
 
         # 查找C2S协议详情
-        for dnet in self.dnet_files:
-            if dnet.relative_path == dnet_file:
-                for c2s in dnet.c2s_list:
-                    if c2s.name == c2s_name:
-                        self._show_s2c_mode_trigger_detail_c2s(c2s, dnet_file)
-                        return
+        ref = self.catalog_index.find_in_file(dnet_file, c2s_name, 'C2S')
+        if ref:
+            self._show_s2c_mode_trigger_detail_c2s(ref.protocol, dnet_file)
 
     def _show_s2c_mode_trigger_detail_c2s(self, c2s: Protocol, dnet_file: str):
         """显示C2S触发项的详情"""
@@ -2084,8 +2726,7 @@ class MainWindow(tk.Tk):
         text += f"所属文件: {dnet_file}\n"
         text += f"描述: {c2s.description}\n"
         text += f"\n字段列表:\n"
-        for field in c2s.fields:
-            text += f"  - {field.name} ({field.type_info}): {field.description}\n"
+        text += format_fields(c2s.fields)
 
         self.s2c_mode_trigger_detail_text.insert("1.0", text)
         self.s2c_mode_trigger_detail_text.config(state=tk.DISABLED)
@@ -2101,6 +2742,7 @@ class MainWindow(tk.Tk):
 
         if dialog.result:
             s2c_name = self.s2c_mode_current_s2c.name
+            self._record_undo(S2C_SECTION, s2c_name, "添加触发条件")
             if s2c_name not in self.s2c_mode_current_config.s2c_triggers:
                 self.s2c_mode_current_config.s2c_triggers[s2c_name] = S2CTriggerConfig()
 
@@ -2115,7 +2757,7 @@ class MainWindow(tk.Tk):
 
             # 刷新列表
             self._load_s2c_triggers(s2c_name)
-            self.s2c_mode_triggers_modified = True
+            self._set_s2c_triggers_modified(s2c_name)
             self.status_var.set(f"已添加触发条件: {trigger.name}")
 
     def _remove_s2c_custom_trigger(self):
@@ -2138,9 +2780,10 @@ class MainWindow(tk.Tk):
         if s2c_name in self.s2c_mode_current_config.s2c_triggers:
             triggers = self.s2c_mode_current_config.s2c_triggers[s2c_name].custom_triggers
             if index < len(triggers):
+                self._record_undo(S2C_SECTION, s2c_name, "删除触发条件")
                 del triggers[index]
                 self._load_s2c_triggers(s2c_name)
-                self.s2c_mode_triggers_modified = True
+                self._set_s2c_triggers_modified(s2c_name)
                 self.status_var.set("已删除触发条件")
 
     def _on_s2c_mode_custom_trigger_double_click(self, event):
@@ -2164,13 +2807,14 @@ class MainWindow(tk.Tk):
         self.wait_window(dialog)
 
         if dialog.result:
+            self._record_undo(S2C_SECTION, s2c_name, "编辑触发条件")
             trigger.name = dialog.result["name"]
             trigger.type = dialog.result["type"]
             trigger.condition = dialog.result["condition"]
             trigger.count = dialog.result["count"]
             trigger.ordered = dialog.result["ordered"]
             self._load_s2c_triggers(s2c_name)
-            self.s2c_mode_triggers_modified = True
+            self._set_s2c_triggers_modified(s2c_name)
             self.status_var.set(f"已更新触发条件: {trigger.name}")
 
     def _save_s2c_triggers(self):
@@ -2179,12 +2823,12 @@ class MainWindow(tk.Tk):
             messagebox.showwarning("提示", "没有可保存的配置")
             return
 
-        if self.config_manager.save_config(self.s2c_mode_current_dnet.relative_path, self.s2c_mode_current_config):
-            self.s2c_mode_triggers_modified = False
-            self.status_var.set("S2C触发条件已保存")
-            messagebox.showinfo("保存成功", "S2C触发条件已成功保存")
-        else:
-            messagebox.showerror("保存失败", "保存失败，请检查文件权限")
+        seq = self.config_manager.save_config_async(self.s2c_mode_current_dnet.relative_path,
+                                                    self.s2c_mode_current_config)
+        self._save_sections[seq] = S2C_SECTION
+        self.s2c_mode_triggers_modified = False
+        self.status_var.set("正在保存S2C触发条件...")
+        self._schedule_save_poll()
 
     def _on_close(self):
         """关闭窗口"""
@@ -2195,6 +2839,11 @@ class MainWindow(tk.Tk):
             if result:  # Yes
                 self._save_config()
 
+        # 停止后台加载，等待后台保存写完
+        self._stop_catalog_load()
+        self.config_manager.close()
+        self._poll_saves()
+        self.config_manager.save_summary()
         self.destroy()
 
 
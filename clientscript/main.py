@@ -5,6 +5,7 @@
 """
 import sys
 import os
+import multiprocessing
 
 # 将脚本目录添加到路径
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -20,4 +21,6 @@ def main():
 
 
 if __name__ == '__main__':
+    # 打包后并行解析的子进程需要此调用才能正确启动
+    multiprocessing.freeze_support()
     main()
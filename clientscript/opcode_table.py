@@ -0,0 +1,117 @@
+"""
+协议号分发表模块
+"""
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from dnet_parser import DnetFile
+from catalog_index import ProtocolRef
+
+
+class OpcodeKey(NamedTuple):
+    """协议号：方向 + 段落主协议号 + 子协议号 + 段落内序号"""
+    direction: str  # 'C2S' 或 'S2C'
+    main_id: int
+    sub_id: Optional[int]  # 段落头没有子协议号时为None（如 C2GS:0xd1:）
+    index: int
+
+    def __str__(self) -> str:
+        parts = [f"0x{self.main_id:x}"]
+        if self.sub_id is not None:
+            parts.append(f"0x{self.sub_id:x}")
+        return f"{self.direction}:{':'.join(parts)}:{self.index}"
+
+
+class OpcodeCollision(NamedTuple):
+    """协议号冲突：多个协议使用了同一个协议号"""
+    key: OpcodeKey
+    refs: List[ProtocolRef]
+
+
+def opcode_key(ref: ProtocolRef) -> Optional[OpcodeKey]:
+    """计算协议的协议号，段落头没有协议号时返回None"""
+    opcode = ref.protocol.opcode
+    if not opcode:
+        return None
+    sub_id = opcode[1] if len(opcode) > 1 else None
+    return OpcodeKey(ref.direction, opcode[0], sub_id, ref.protocol.index)
+
+
+class OpcodeTable:
+    """
+    协议号 -> 协议 的分发表
+    - lookup() 按完整协议号O(1)查找
+    - group() 返回某个段落按序号直接下标访问的稠密数组
+    - collisions 记录所有协议号冲突（跨文件或同一文件内重复）
+    """
+
+    def __init__(self, dnet_files: Iterable[DnetFile] = ()):
+        self._table: Dict[OpcodeKey, ProtocolRef] = {}
+        self._groups: Dict[Tuple[str, int, Optional[int]], List[Optional[ProtocolRef]]] = {}
+        self.collisions: List[OpcodeCollision] = []
+        self.rebuild(dnet_files)
+
+    def rebuild(self, dnet_files: Iterable[DnetFile]):
+        """根据文件列表重建分发表（按相对路径顺序，冲突时保留先出现的协议）"""
+        self._table = {}
+        self._groups = {}
+        conflicts: Dict[OpcodeKey, List[ProtocolRef]] = {}
+
+        for dnet in sorted(dnet_files, key=lambda d: d.relative_path):
+            for direction, protocols in (('C2S', dnet.c2s_list), ('S2C', dnet.s2c_list)):
+                for protocol in protocols:
+                    ref = ProtocolRef(dnet, protocol, direction)
+                    key = opcode_key(ref)
+                    if key is None:
+                        continue
+                    existing = self._table.get(key)
+                    if existing is not None:
+                        conflicts.setdefault(key, [existing]).append(ref)
+                        continue
+                    self._table[key] = ref
+
+                    group = self._groups.setdefault((direction, key.main_id, key.sub_id), [])
+                    if key.index >= len(group):
+                        group.extend([None] * (key.index + 1 - len(group)))
+                    group[key.index] = ref
+
+        self.collisions = [OpcodeCollision(key, refs) for key, refs in conflicts.items()]
+
+    def lookup(self, direction: str, main_id: int, sub_id: Optional[int],
+               index: int) -> Optional[ProtocolRef]:
+        """按协议号查找协议"""
+        return self._table.get(OpcodeKey(direction, main_id, sub_id, index))
+
+    def group(self, direction: str, main_id: int,
+              sub_id: Optional[int] = None) -> List[Optional[ProtocolRef]]:
+        """返回段落的稠密分发数组，下标为段落内序号，空位为None"""
+        return self._groups.get((direction, main_id, sub_id), [])
+
+    def items(self) -> List[Tuple[OpcodeKey, ProtocolRef]]:
+        """所有协议号（按方向、主协议号、子协议号、序号排序）"""
+        return sorted(self._table.items(),
+                      key=lambda kv: (kv[0].direction, kv[0].main_id,
+                                      -1 if kv[0].sub_id is None else kv[0].sub_id, kv[0].index))
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+
+if __name__ == '__main__':
+    # 测试代码
+    import os
+    from dnet_parser import DnetParser
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    proto_dir = os.path.join(os.path.dirname(script_dir), 'proto')
+
+    table = OpcodeTable(DnetParser().scan_directory(proto_dir))
+    print(f"协议号数量: {len(table)}")
+    for key, ref in table.items():
+        print(f"  {key} -> {ref.protocol.name} ({ref.dnet.relative_path})")
+    if table.collisions:
+        print("协议号冲突:")
+        for collision in table.collisions:
+            names = ", ".join(f"{r.protocol.name}({r.dnet.relative_path})" for r in collision.refs)
+            print(f"  {collision.key}: {names}")
+    else:
+        print("无协议号冲突")
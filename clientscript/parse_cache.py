@@ -0,0 +1,168 @@
+"""
+.dnet解析结果磁盘缓存模块
+"""
+import hashlib
+import os
+import pickle
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from dnet_parser import DnetFile, PARSER_VERSION
+
+
+# 缓存文件名（与gui_settings.json放在同一目录）
+CACHE_FILE_NAME = 'dnet_parse_cache.pkl'
+
+# 缓存文件格式版本，缓存结构变化时递增
+CACHE_FORMAT = 1
+
+
+class CacheEntry(NamedTuple):
+    """单个文件的缓存项"""
+    size: int
+    mtime_ns: int
+    digest: str
+    proto_root: str
+    dnet: DnetFile
+
+
+def file_digest(file_path: str) -> str:
+    """计算文件内容哈希"""
+    with open(file_path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+class ParseCache:
+    """按文件指纹（路径、大小、修改时间、内容哈希）缓存解析结果"""
+
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+        self._entries: Dict[str, CacheEntry] = {}
+        self._loaded = False
+        self._dirty = False
+
+    def load(self) -> bool:
+        """从磁盘加载缓存，格式或解析器版本不一致时丢弃旧缓存"""
+        self._loaded = True
+        self._entries = {}
+        if not os.path.exists(self.cache_path):
+            return False
+
+        try:
+            with open(self.cache_path, 'rb') as f:
+                data = pickle.load(f)
+        except Exception as e:
+            # 缓存损坏或数据类结构已变化，直接丢弃
+            print(f"加载解析缓存失败: {self.cache_path}, 错误: {e}")
+            return False
+
+        if (not isinstance(data, dict)
+                or data.get("format") != CACHE_FORMAT
+                or data.get("parser_version") != PARSER_VERSION):
+            self._dirty = True
+            return False
+
+        self._entries = data.get("entries", {})
+        return True
+
+    def save(self) -> bool:
+        """写回磁盘（先写临时文件再替换，避免中途崩溃损坏缓存）"""
+        if not self._dirty:
+            return True
+
+        data = {
+            "format": CACHE_FORMAT,
+            "parser_version": PARSER_VERSION,
+            "entries": self._entries,
+        }
+        tmp_path = self.cache_path + '.tmp'
+        try:
+            cache_dir = os.path.dirname(self.cache_path)
+            if cache_dir and not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_path)
+            self._dirty = False
+            return True
+        except Exception as e:
+            print(f"保存解析缓存失败: {self.cache_path}, 错误: {e}")
+            return False
+
+    def lookup(self, file_path: str, st: os.stat_result, proto_root: str) -> Optional[DnetFile]:
+        """查找未变化文件的解析结果，文件已变化或不在缓存中时返回None"""
+        if not self._loaded:
+            self.load()
+
+        entry = self._entries.get(file_path)
+        if entry is None or entry.proto_root != proto_root or entry.size != st.st_size:
+            return None
+
+        if entry.mtime_ns == st.st_mtime_ns:
+            return entry.dnet
+
+        # 修改时间变化但大小相同（如git checkout），比较内容哈希
+        try:
+            digest = file_digest(file_path)
+        except OSError:
+            return None
+        if digest != entry.digest:
+            return None
+
+        self._entries[file_path] = entry._replace(mtime_ns=st.st_mtime_ns)
+        self._dirty = True
+        return entry.dnet
+
+    def store(self, file_path: str, st: os.stat_result, proto_root: str, dnet: DnetFile):
+        """
+        记录文件的解析结果，st为解析前取得的文件状态
+        计算哈希后重新检查文件状态，解析之后文件又被修改时不缓存（哈希与解析结果可能对应不同的内容）
+        """
+        if not self._loaded:
+            self.load()
+
+        try:
+            digest = file_digest(file_path)
+            current = os.stat(file_path)
+        except OSError:
+            return
+        if (current.st_size, current.st_mtime_ns) != (st.st_size, st.st_mtime_ns):
+            return
+        self._entries[file_path] = CacheEntry(st.st_size, st.st_mtime_ns, digest, proto_root, dnet)
+        self._dirty = True
+
+    def prune(self, live_paths: Iterable[str]):
+        """移除已不存在的文件的缓存项"""
+        live = set(live_paths)
+        stale = [path for path in self._entries if path not in live]
+        for path in stale:
+            del self._entries[path]
+        if stale:
+            self._dirty = True
+
+    def clear(self):
+        """清空缓存"""
+        self._entries = {}
+        self._loaded = True
+        self._dirty = True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+if __name__ == '__main__':
+    # 测试代码
+    import tempfile
+    import time
+    from dnet_parser import DnetParser
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    proto_dir = os.path.join(os.path.dirname(script_dir), 'proto')
+    cache_path = os.path.join(tempfile.mkdtemp(), CACHE_FILE_NAME)
+
+    parser = DnetParser()
+    for attempt in ("冷启动", "热启动"):
+        cache = ParseCache(cache_path)
+        start = time.perf_counter()
+        dnet_files = parser.scan_directory(proto_dir, cache=cache)
+        elapsed = time.perf_counter() - start
+        print(f"{attempt}: {len(dnet_files)} 个文件, 缓存 {len(cache)} 项, 耗时 {elapsed * 1000:.1f}ms")
@@ -0,0 +1,234 @@
+"""
+搜索索引模块（列表筛选、快速查找）
+"""
+import re
+from array import array
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Generic, Iterable, List, Optional, Set, Tuple, TypeVar
+
+T = TypeVar('T')
+
+# 倒排索引的字符组长度（三字母组）
+NGRAM = 3
+
+
+def _ngrams(key: str) -> set:
+    return {key[i:i + NGRAM] for i in range(len(key) - NGRAM + 1)}
+
+
+class SearchIndex(Generic[T]):
+    """
+    子串/模糊搜索索引，条目按添加顺序编号，搜索结果保持添加顺序
+    （指定order时按order(对象)排序，只有条目不按此顺序添加后才需要排序）
+    - 显示文本添加时转为小写保存，筛选时不再逐个转换
+    - 三字母组倒排索引：长度>=3的查询只检查其中最少见的三字母组所在的条目
+    - 新查询包含上一次的查询时（继续输入），只在上一次的结果中查找
+    - remove()/replace()只更新该条目（编号不变），增量刷新时不必重建索引
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, T]] = (), order: Optional[Callable[[T], Any]] = None):
+        self.texts: List[str] = []  # 显示文本
+        self.items: List[Optional[T]] = []  # 对应的对象（已删除的条目为None）
+        self._keys: List[str] = []  # 小写的显示文本（已删除的条目为空串，不会被非空查询匹配）
+        self._grams: Dict[str, array] = {}  # 三字母组 -> 包含它的条目编号（升序）
+        self._removed: Set[int] = set()
+        self._order = order
+        self._order_keys: List[Any] = []  # 各条目的排序键（指定order时）
+        self._unordered = False  # 是否有条目不按排序键顺序添加
+        self._last: Optional[Tuple[str, List[int]]] = None  # 上一次的(查询, 结果)
+        self._last_fuzzy: Optional[Tuple[str, List[int]]] = None
+        self.extend(entries)
+
+    def add(self, text: str, item: T) -> int:
+        """添加条目，返回其编号"""
+        index = len(self._keys)
+        key = text.lower()
+        self.texts.append(text)
+        self.items.append(item)
+        self._keys.append(key)
+        if self._order is not None:
+            order_key = self._order(item)
+            if self._order_keys and order_key < self._order_keys[-1]:
+                self._unordered = True
+            self._order_keys.append(order_key)
+        grams = self._grams
+        for gram in _ngrams(key):
+            postings = grams.get(gram)
+            if postings is None:
+                grams[gram] = array('I', (index,))
+            else:
+                postings.append(index)
+        self._last = self._last_fuzzy = None
+        return index
+
+    def extend(self, entries: Iterable[Tuple[str, T]]):
+        for text, item in entries:
+            self.add(text, item)
+
+    def remove(self, index: int):
+        """删除条目（编号不再使用）"""
+        self._set_key(index, "")
+        self.texts[index] = ""
+        self.items[index] = None
+        self._removed.add(index)
+
+    def replace(self, index: int, text: str, item: T):
+        """替换条目的显示文本和对象，编号和在结果中的位置不变"""
+        self._set_key(index, text.lower())
+        self.texts[index] = text
+        self.items[index] = item
+        if self._order is not None:
+            order_key = self._order(item)
+            if order_key != self._order_keys[index]:
+                self._order_keys[index] = order_key
+                self._unordered = True
+
+    def _set_key(self, index: int, key: str):
+        """更新条目的小写文本，只调整新旧文本不同的三字母组"""
+        old_grams = _ngrams(self._keys[index])
+        new_grams = _ngrams(key)
+        for gram in old_grams - new_grams:
+            postings = self._grams[gram]
+            postings.pop(bisect_left(postings, index))
+            if not postings:
+                del self._grams[gram]
+        for gram in new_grams - old_grams:
+            postings = self._grams.get(gram)
+            if postings is None:
+                self._grams[gram] = array('I', (index,))
+            else:
+                postings.insert(bisect_left(postings, index), index)
+        self._keys[index] = key
+        self._last = self._last_fuzzy = None
+
+    def __len__(self) -> int:
+        """条目编号的上限（包括已删除的条目，后台加载时作为新一批条目的起始编号）"""
+        return len(self._keys)
+
+    def search(self, query: str, start: int = 0) -> List[int]:
+        """子串搜索（不区分大小写），返回匹配的条目编号；start>0时只查找编号>=start的条目"""
+        query = query.lower()
+        keys = self._keys
+        if not query:
+            return self._sorted([i for i in range(start, len(keys)) if i not in self._removed]
+                                if self._removed else list(range(start, len(keys))))
+        if start > 0:
+            return self._sorted([i for i in range(start, len(keys)) if query in keys[i]])
+
+        last = self._last
+        if last is not None and last[0] in query:
+            candidates = last[1]
+        elif len(query) >= NGRAM:
+            candidates = self._gram_candidates(query)
+        else:
+            candidates = range(len(keys))
+        result = [i for i in candidates if query in keys[i]]
+        self._last = (query, result)
+        return self._sorted(result)
+
+    def filter(self, query: str) -> List[int]:
+        """列表筛选：子串搜索，没有结果时改用模糊搜索（结果按匹配程度排序）"""
+        result = self.search(query)
+        if not result and query.strip():
+            result = self.fuzzy_search(query)
+        return result
+
+    def fuzzy_search(self, query: str, limit: Optional[int] = None) -> List[int]:
+        """
+        模糊搜索：查询中的字符按顺序出现在文本中即匹配（如"addhero"匹配"S2CAddNewHero"）
+        结果按匹配程度排序：子串匹配优先，其次是匹配跨度短、起始位置靠前的，同分时按添加顺序
+        """
+        query = "".join(query.lower().split())
+        if not query:
+            return self.search("")[:limit]
+
+        last = self._last_fuzzy
+        if last is not None and _is_subsequence(last[0], query):
+            candidates = last[1]
+        else:
+            candidates = range(len(self._keys))
+        pattern = re.compile(".*?".join(map(re.escape, query)))
+        keys = self._keys
+        scored = []
+        for i in candidates:
+            key = keys[i]
+            match = pattern.search(key)
+            if match is None:
+                continue
+            exact = key.find(query)
+            if exact >= 0:
+                scored.append(((0, len(query), exact), i))
+            else:
+                scored.append(((1, match.end() - match.start(), match.start()), i))
+        self._last_fuzzy = (query, [i for _, i in scored])
+        scored.sort()
+        return [i for _, i in scored[:limit]]
+
+    def _sorted(self, result: List[int]) -> List[int]:
+        """有条目不按排序键顺序添加（或替换后排序键变化）时，将结果按排序键排序"""
+        if self._unordered:
+            result = sorted(result, key=self._order_keys.__getitem__)
+        return result
+
+    def _gram_candidates(self, query: str) -> Iterable[int]:
+        """包含查询中最少见的三字母组的条目（只是候选，仍需确认子串）"""
+        smallest = None
+        for gram in _ngrams(query):
+            postings = self._grams.get(gram)
+            if postings is None:
+                return ()
+            if smallest is None or len(postings) < len(smallest):
+                smallest = postings
+        return smallest
+
+
+def _is_subsequence(short: str, long: str) -> bool:
+    """short的字符是否按顺序出现在long中（新的模糊查询能否只在上一次的结果中查找）"""
+    it = iter(long)
+    return all(ch in it for ch in short)
+
+
+if __name__ == '__main__':
+    # 测试代码
+    import random
+    import string
+    import time
+
+    random.seed(1)
+    words = ["Add", "Hero", "Item", "Bag", "Guild", "Mail", "Shop", "Skill", "Pet", "Rank"]
+    names = [f"S2C{''.join(random.sample(words, 3))}{i} - " +
+             "".join(random.choices(string.ascii_lowercase, k=12)) for i in range(100000)]
+
+    start = time.perf_counter()
+    index = SearchIndex((name, i) for i, name in enumerate(names))
+    print(f"建立索引: {len(index)} 条, {time.perf_counter() - start:.2f}s")
+
+    for query in ("h", "he", "her", "hero", "heroi", "skillpet", "s2cherobag"):
+        start = time.perf_counter()
+        result = index.search(query)
+        elapsed = time.perf_counter() - start
+        assert result == [i for i, n in enumerate(names) if query in n.lower()]
+        print(f"子串 {query!r}: {len(result)} 条, {elapsed * 1000:.1f}ms")
+
+    for query in ("s2cherobag", "guildmail"):
+        start = time.perf_counter()
+        result = index.fuzzy_search(query, limit=5)
+        print(f"模糊 {query!r}: {[names[i].split(' ')[0] for i in result]}, "
+              f"{(time.perf_counter() - start) * 1000:.1f}ms")
+
+    # 删除/替换后与逐个比较的结果相同（指定order时新增的条目仍按顺序返回）
+    ordered = SearchIndex(((name, name) for name in names[:20000:2]), order=str)
+    current = {i: name for i, name in enumerate(names[:20000:2])}
+    for i in random.sample(range(len(ordered)), 500):
+        ordered.remove(i)
+        del current[i]
+    for i in random.sample(sorted(current), 500):
+        current[i] = names[random.randrange(len(names))]
+        ordered.replace(i, current[i], current[i])
+    for name in names[1:2000:2]:
+        current[ordered.add(name, name)] = name
+    for query in ("", "he", "hero", "skillpet", "zz"):
+        expected = sorted((n for n in current.values() if query in n.lower()))
+        assert [ordered.items[i] for i in ordered.search(query)] == expected, query
+    assert not ordered.search("gldmlbag") and ordered.filter("gldmlbag") == ordered.fuzzy_search("gldmlbag") != []
+    print("删除/替换: 结果一致")
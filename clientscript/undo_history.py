@@ -0,0 +1,147 @@
+"""
+撤销/重做历史模块
+"""
+import sys
+from collections import deque
+from typing import Deque, Iterable, NamedTuple, Optional, Union
+
+from config_manager import (C2SConfig, C2SMapping, S2CTriggerConfig,
+                            copy_mapping, copy_trigger_config)
+
+
+# 撤销历史占用的内存上限（字节，撤销和重做栈合计，超出时丢弃最早的记录）
+UNDO_HISTORY_BYTES = 8 * 1024 * 1024
+
+# 修改的部分
+C2S_SECTION = 'c2s'  # 单个C2S的映射（响应、顺序组）
+S2C_SECTION = 's2c'  # 单个S2C的自定义触发条件
+
+Section = Union[C2SMapping, S2CTriggerConfig]
+
+
+class EditRecord(NamedTuple):
+    """
+    一条历史记录：只保存被修改的那一部分（单个C2S映射或单个S2C的触发条件），不复制整个配置
+    撤销栈中保存修改前的内容，重做栈中保存撤销前的内容
+    """
+    config: C2SConfig  # 所属的配置对象
+    section: str  # C2S_SECTION / S2C_SECTION
+    name: str  # C2S名称 / S2C名称
+    state: Optional[Section]  # 该部分的内容，None表示当时不存在
+    label: str  # 操作说明，如"添加响应"
+    nbytes: int  # 估算的内存占用
+
+
+def _capture(config: C2SConfig, section: str, name: str) -> Optional[Section]:
+    """复制配置中的一部分（响应、触发条件等数据类对象复制，字符串共享）"""
+    if section == C2S_SECTION:
+        mapping = config.c2s_mappings.get(name)
+        return copy_mapping(mapping) if mapping is not None else None
+    trigger_config = config.s2c_triggers.get(name)
+    return copy_trigger_config(trigger_config) if trigger_config is not None else None
+
+
+def _replace(config: C2SConfig, section: str, name: str, state: Optional[Section]) -> Optional[Section]:
+    """
+    用保存的内容替换配置中的一部分并标记为脏，返回被替换下来的对象
+    两者都是整体移交：state之后由配置持有，被替换的对象之后由历史记录持有，不需要复制
+    """
+    sections = config.c2s_mappings if section == C2S_SECTION else config.s2c_triggers
+    current = sections.get(name)
+    if state is None:
+        sections.pop(name, None)
+    else:
+        sections[name] = state  # 已存在时保持原来的顺序
+    if section == C2S_SECTION:
+        config.mark_dirty(c2s_name=name)
+    else:
+        config.mark_dirty(s2c_name=name)
+    return current
+
+
+def _state_nbytes(state: Optional[Section]) -> int:
+    """估算保存的内容占用的内存（字符串与配置共享，只计算复制的对象）"""
+    nbytes = sys.getsizeof(state)
+    if state is None:
+        return nbytes
+    lists = ((state.responses, state.order_groups) if isinstance(state, C2SMapping)
+             else (state.custom_triggers,))
+    for items in lists:
+        nbytes += sys.getsizeof(items)
+        for item in items:
+            nbytes += sys.getsizeof(item) + sys.getsizeof(item.__dict__)
+    return nbytes
+
+
+class UndoHistory:
+    """
+    撤销/重做历史
+    - record() 在修改之前调用，只复制将被修改的那一部分，代价与修改范围成正比
+    - undo()/redo() 交换该部分的当前内容与保存的内容（对象整体移交，不复制）
+    - 撤销和重做栈合计占用超过 max_bytes 时丢弃最早的撤销记录
+    """
+
+    def __init__(self, max_bytes: int = UNDO_HISTORY_BYTES):
+        self.max_bytes = max_bytes
+        self._undo: Deque[EditRecord] = deque()
+        self._redo: Deque[EditRecord] = deque()
+        self.nbytes = 0
+
+    def record(self, config: C2SConfig, section: str, name: str, label: str):
+        """记录即将修改的部分（新的修改会清空重做栈）"""
+        state = _capture(config, section, name)
+        self._clear_redo()
+        self._push(self._undo, EditRecord(config, section, name, state, label, _state_nbytes(state)))
+        while self.nbytes > self.max_bytes and len(self._undo) > 1:
+            self.nbytes -= self._undo.popleft().nbytes
+
+    def undo(self, live: Iterable[C2SConfig]) -> Optional[EditRecord]:
+        """撤销最近一次修改，返回被撤销的记录；live为仍在编辑的配置对象，其他对象的记录直接丢弃"""
+        return self._swap(self._undo, self._redo, live)
+
+    def redo(self, live: Iterable[C2SConfig]) -> Optional[EditRecord]:
+        """重做最近一次撤销的修改"""
+        return self._swap(self._redo, self._undo, live)
+
+    def prune(self, live: Iterable[C2SConfig]):
+        """丢弃不属于live中配置对象的记录（切换文件后旧配置的记录已无法撤销）"""
+        live_ids = {id(c) for c in live if c is not None}
+        for stack in (self._undo, self._redo):
+            kept = [r for r in stack if id(r.config) in live_ids]
+            if len(kept) != len(stack):
+                stack.clear()
+                stack.extend(kept)
+        self.nbytes = sum(r.nbytes for r in self._undo) + sum(r.nbytes for r in self._redo)
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self.nbytes = 0
+
+    def _swap(self, source: Deque[EditRecord], target: Deque[EditRecord],
+              live: Iterable[C2SConfig]) -> Optional[EditRecord]:
+        live_ids = {id(c) for c in live if c is not None}
+        while source:
+            record = source.pop()
+            self.nbytes -= record.nbytes
+            if id(record.config) not in live_ids:
+                # 配置已关闭（切换了文件），记录失效
+                continue
+            current = _replace(record.config, record.section, record.name, record.state)
+            self._push(target, record._replace(state=current, nbytes=_state_nbytes(current)))
+            return record
+        return None
+
+    def _push(self, stack: Deque[EditRecord], record: EditRecord):
+        stack.append(record)
+        self.nbytes += record.nbytes
+
+    def _clear_redo(self):
+        while self._redo:
+            self.nbytes -= self._redo.pop().nbytes
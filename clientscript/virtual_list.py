@@ -0,0 +1,634 @@
+"""
+虚拟列表控件模块
+数据保存在内存列表中，控件只创建可见行和少量额外行，滚动时替换显示的内容，
+行数再多，填充、筛选和滚动的开销也只与可见行数有关
+"""
+import itertools
+import tkinter as tk
+from tkinter import ttk
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+# 可见行之外额外创建的行数（窗口高度不是行高整数倍时避免底部出现空白）
+OVERSCAN_ROWS = 3
+
+# 鼠标滚轮每格滚动的行数
+WHEEL_ROWS = 3
+
+# 更新已创建的行时未指定的选项恢复为默认值
+_EMPTY_ROW = {'text': '', 'image': '', 'values': '', 'tags': ''}
+
+
+class _VirtualScrollMixin:
+    """
+    虚拟滚动的公共部分：记录首个可见行和可见行数，处理滚动条、滚轮和窗口大小变化
+    子类实现 _count()、_render()、_sync_selection()、_measure() 和 _move_selection()
+    """
+
+    def _init_virtual(self, yscrollcommand=None):
+        self._top = 0  # 首个可见行在数据中的行号
+        self._visible = max(int(self.cget('height')), 1)  # 可见行数（窗口显示后按实际高度计算）
+        self._yscrollcommand = yscrollcommand
+        self._scroll_notify_pending = False
+
+        # 控件自身的滚动只覆盖已创建的几行，改为滚动数据窗口
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            tk.Misc.bind(self, sequence, self._on_wheel)
+        for sequence, rows in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "-page"), ("<Next>", "page"),
+                               ("<Home>", "home"), ("<End>", "end")):
+            tk.Misc.bind(self, sequence, lambda e, r=rows: self._on_key_move(r))
+        tk.Misc.bind(self, "<B1-Leave>", lambda e: "break")  # 拖动到边缘时不自动滚动控件
+        tk.Misc.bind(self, "<Configure>", self._on_resize, "+")
+
+    # ---------- 滚动 ----------
+
+    def yview(self, *args):
+        """与Listbox/Treeview的yview相同，位置按数据行数计算"""
+        if not args:
+            return self._fractions()
+        if args[0] == tk.MOVETO:
+            self._scroll_to(int(round(float(args[1]) * self._count())))
+        elif args[0] == tk.SCROLL:
+            step = self._visible if args[2].startswith('page') else 1
+            self._scroll_to(self._top + int(args[1]) * step)
+        return None
+
+    def yview_moveto(self, fraction):
+        self.yview(tk.MOVETO, fraction)
+
+    def yview_scroll(self, number, what):
+        self.yview(tk.SCROLL, number, what)
+
+    def _fractions(self) -> Tuple[float, float]:
+        count = self._count()
+        if count == 0:
+            return 0.0, 1.0
+        return self._top / count, min(1.0, (self._top + self._visible) / count)
+
+    def _max_top(self) -> int:
+        return max(0, self._count() - self._visible)
+
+    def _scroll_to(self, top: int):
+        top = min(max(top, 0), self._max_top())
+        if top == self._top:
+            return
+        self._sync_selection()
+        self._top = top
+        self._render()
+
+    def _see_row(self, row: int):
+        """滚动到使第row行可见"""
+        if row < self._top:
+            self._scroll_to(row)
+        elif row >= self._top + self._visible:
+            self._scroll_to(row - self._visible + 1)
+
+    def _window(self) -> Tuple[int, int]:
+        """需要创建的行范围 [start, end)"""
+        return self._top, min(self._count(), self._top + self._visible + OVERSCAN_ROWS)
+
+    def _clamp_top(self):
+        self._top = min(self._top, self._max_top())
+
+    def _notify_scroll(self):
+        """更新滚动条（合并到空闲时执行，逐行插入大量数据时只更新一次）"""
+        if self._yscrollcommand is None or self._scroll_notify_pending:
+            return
+        self._scroll_notify_pending = True
+        self.after_idle(self._do_notify_scroll)
+
+    def _do_notify_scroll(self):
+        self._scroll_notify_pending = False
+        if self._yscrollcommand is not None and self.winfo_exists():
+            self._yscrollcommand(*self._fractions())
+
+    def _pop_yscrollcommand(self, kw: dict) -> dict:
+        """configure()中的yscrollcommand由本控件按数据位置调用，不交给原控件"""
+        if 'yscrollcommand' in kw:
+            self._yscrollcommand = kw.pop('yscrollcommand') or None
+            self._notify_scroll()
+        return kw
+
+    # ---------- 事件 ----------
+
+    def _on_wheel(self, event):
+        if event.num == 4:
+            rows = -WHEEL_ROWS
+        elif event.num == 5:
+            rows = WHEEL_ROWS
+        elif event.delta:
+            # Windows每格为120，macOS为1
+            notches = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+            rows = -notches * WHEEL_ROWS
+        else:
+            return "break"
+        self._scroll_to(self._top + rows)
+        return "break"
+
+    def _on_key_move(self, rows):
+        count = self._count()
+        if count == 0:
+            return "break"
+        current = self._selected_row()
+        if rows == "home":
+            row = 0
+        elif rows == "end":
+            row = count - 1
+        elif current is None:
+            row = self._top
+        elif rows == "page":
+            row = current + self._visible
+        elif rows == "-page":
+            row = current - self._visible
+        else:
+            row = current + rows
+        row = min(max(row, 0), count - 1)
+        if row != current:
+            self._see_row(row)
+            self._move_selection(row)
+        return "break"
+
+    def _on_resize(self, event=None):
+        if not self.winfo_exists():
+            return
+        measured = self._measure()
+        if measured is None:
+            return
+        offset, row_height = measured
+        visible = max((self.winfo_height() - offset) // max(row_height, 1), 1)
+        if visible != self._visible:
+            self._sync_selection()
+            self._visible = visible
+            self._clamp_top()
+            self._render()
+
+
+class VirtualListbox(_VirtualScrollMixin, tk.Listbox):
+    """
+    虚拟列表框：接口与tk.Listbox相同（行号都是数据中的行号），只支持单选
+    - 大量数据用 set_items() 一次替换
+    - 默认 exportselection=False，选中状态由本控件记录，滚出可见范围后仍保留
+    """
+
+    def __init__(self, master=None, **kw):
+        kw.setdefault('exportselection', False)
+        yscrollcommand = kw.pop('yscrollcommand', None)
+        tk.Listbox.__init__(self, master, **kw)
+        self._texts: List[str] = []
+        self._options: List[Optional[dict]] = []  # 每行的itemconfig选项（如fg），None表示默认
+        self._selected: Optional[int] = None
+        self._rendered = (0, 0)
+        self._init_virtual(yscrollcommand)
+
+    def configure(self, cnf=None, **kw):
+        if isinstance(cnf, str) or (cnf is None and not kw):
+            return tk.Listbox.configure(self, cnf)
+        kw = self._pop_yscrollcommand(dict(cnf or {}, **kw))
+        return tk.Listbox.configure(self, kw) if kw else None
+
+    config = configure
+
+    # ---------- 数据 ----------
+
+    def set_items(self, texts: Sequence[str], options: Optional[Sequence[Optional[dict]]] = None,
+                  keep_selection: bool = False):
+        """
+        替换全部行（options为每行的itemconfig选项）
+        keep_selection=True时按文本保留选中行和滚动位置，否则清除选中并滚动到顶部
+        """
+        selected_text = (self._texts[self._selected]
+                         if keep_selection and self._sync_selection() is not None else None)
+        self._texts = list(texts)
+        self._options = list(options) if options is not None else [None] * len(self._texts)
+        self._selected = None
+        if selected_text is not None:
+            try:
+                self._selected = self._texts.index(selected_text)
+            except ValueError:
+                pass
+        if keep_selection:
+            self._clamp_top()
+        else:
+            self._top = 0
+        self._render()
+
+    def set_item(self, index, text: str, options: Optional[dict] = None):
+        """替换一行的文本和选项（选中状态和滚动位置不变），该行已显示时只重绘这一行"""
+        row = self._row(index)
+        if not 0 <= row < len(self._texts):
+            raise tk.TclError(f'item number "{index}" out of range')
+        self._sync_selection()
+        self._texts[row] = text
+        self._options[row] = options
+        start, end = self._rendered
+        if start <= row < end:
+            pos = row - start
+            tk.Listbox.delete(self, pos)
+            tk.Listbox.insert(self, pos, text)
+            if options:
+                tk.Listbox.itemconfigure(self, pos, **options)
+            if self._selected == row:
+                tk.Listbox.selection_set(self, pos)
+
+    def insert(self, index, *elements):
+        self._sync_selection()
+        row = self._row(index, insert=True)
+        self._texts[row:row] = elements
+        self._options[row:row] = [None] * len(elements)
+        if self._selected is not None and self._selected >= row:
+            self._selected += len(elements)
+        self._changed(row)
+
+    def delete(self, first, last=None):
+        first, last = self._row_range(first, last)
+        if last < first:
+            return
+        self._sync_selection()
+        del self._texts[first:last + 1]
+        del self._options[first:last + 1]
+        if self._selected is not None:
+            if self._selected > last:
+                self._selected -= last - first + 1
+            elif self._selected >= first:
+                self._selected = None
+        self._clamp_top()
+        self._changed(first)
+
+    def get(self, first, last=None):
+        if last is None:
+            row = self._row(first)
+            return self._texts[row] if 0 <= row < len(self._texts) else ''
+        first, last = self._row_range(first, last)
+        return tuple(self._texts[first:last + 1])
+
+    def size(self) -> int:
+        return len(self._texts)
+
+    def itemconfigure(self, index, cnf=None, **kw):
+        row = self._row(index)
+        if not 0 <= row < len(self._texts):
+            raise tk.TclError(f'item number "{index}" out of range')
+        kw = dict(cnf or {}, **kw)
+        if not kw:
+            return dict(self._options[row] or {})
+        self._options[row] = dict(self._options[row] or {}, **kw)
+        start, end = self._rendered
+        if start <= row < end:
+            tk.Listbox.itemconfigure(self, row - start, **kw)
+        return None
+
+    itemconfig = itemconfigure
+
+    # ---------- 选中和定位 ----------
+
+    def curselection(self):
+        selected = self._sync_selection()
+        return (selected,) if selected is not None else ()
+
+    def selection_set(self, first, last=None):
+        row = self._row(first)
+        if not 0 <= row < len(self._texts):
+            return
+        self._selected = row
+        tk.Listbox.selection_clear(self, 0, tk.END)
+        start, end = self._rendered
+        if start <= row < end:
+            tk.Listbox.selection_set(self, row - start)
+
+    select_set = selection_set
+
+    def selection_clear(self, first, last=None):
+        first, last = self._row_range(first, last)
+        selected = self._sync_selection()
+        if selected is not None and first <= selected <= last:
+            self._selected = None
+            tk.Listbox.selection_clear(self, 0, tk.END)
+
+    select_clear = selection_clear
+
+    def selection_includes(self, index) -> bool:
+        return self._sync_selection() == self._row(index)
+
+    select_includes = selection_includes
+
+    def see(self, index):
+        if self._texts:
+            self._see_row(min(max(self._row(index), 0), len(self._texts) - 1))
+
+    def nearest(self, y) -> int:
+        if not self._texts:
+            return -1
+        start, end = self._rendered
+        return min(start + tk.Listbox.nearest(self, y), len(self._texts) - 1)
+
+    # ---------- 内部实现 ----------
+
+    def _count(self) -> int:
+        return len(self._texts)
+
+    def _row(self, index, insert: bool = False) -> int:
+        """将tk.END等索引转换为数据行号"""
+        if index == tk.END:
+            return len(self._texts) if insert else len(self._texts) - 1
+        row = int(index)
+        return min(max(row, 0), len(self._texts)) if insert else row
+
+    def _row_range(self, first, last) -> Tuple[int, int]:
+        first = max(self._row(first), 0)
+        last = first if last is None else min(self._row(last), len(self._texts) - 1)
+        return first, last
+
+    def _changed(self, row: int):
+        """数据从第row行起发生变化：影响已创建的行时重新显示，否则只更新滚动条"""
+        start, end = self._rendered
+        if row < end or end - start < self._visible + OVERSCAN_ROWS:
+            self._render()
+        else:
+            self._notify_scroll()
+
+    def _sync_selection(self) -> Optional[int]:
+        """用户点击会直接改变控件的选中行，换算为数据行号"""
+        start, end = self._rendered
+        native = tk.Listbox.curselection(self)
+        if native:
+            self._selected = start + native[0]
+        elif self._selected is not None and start <= self._selected < end:
+            self._selected = None
+        return self._selected
+
+    def _selected_row(self) -> Optional[int]:
+        return self._sync_selection()
+
+    def _move_selection(self, row: int):
+        self.selection_set(row)
+        self.activate(row - self._rendered[0])
+        self.event_generate("<<ListboxSelect>>")
+
+    def _render(self):
+        start, end = self._window()
+        tk.Listbox.delete(self, 0, tk.END)
+        if end > start:
+            tk.Listbox.insert(self, 0, *self._texts[start:end])
+            for row in range(start, end):
+                if self._options[row]:
+                    tk.Listbox.itemconfigure(self, row - start, **self._options[row])
+        if self._selected is not None and start <= self._selected < end:
+            tk.Listbox.selection_set(self, self._selected - start)
+        tk.Listbox.yview_moveto(self, 0)
+        self._rendered = (start, end)
+        self._notify_scroll()
+
+    def _measure(self) -> Optional[Tuple[int, int]]:
+        # Listbox的行距为字体行高 + 1 + 选中边框
+        line_height = int(self.tk.call('font', 'metrics', self.cget('font'), '-linespace'))
+        row_height = line_height + 1 + 2 * int(self.cget('selectborderwidth'))
+        border = int(self.cget('borderwidth')) + int(self.cget('highlightthickness'))
+        return 2 * border, row_height
+
+
+class VirtualTreeview(_VirtualScrollMixin, ttk.Treeview):
+    """
+    虚拟表格：接口与ttk.Treeview相同，但只支持没有层级的行（父节点都是""），只支持单选
+    控件中创建的行使用与数据相同的item id，identify_row()等返回的id可以直接使用
+    """
+
+    _id_counter = itertools.count()
+
+    def __init__(self, master=None, **kw):
+        kw.setdefault('selectmode', 'browse')
+        yscrollcommand = kw.pop('yscrollcommand', None)
+        ttk.Treeview.__init__(self, master, **kw)
+        self._iids: List[str] = []
+        self._rows: Dict[str, dict] = {}  # item id -> insert()的选项（text、values、tags等）
+        self._positions: Optional[Dict[str, int]] = {}  # item id -> 行号，行号变化后置为None重新计算
+        self._selected: Optional[str] = None
+        self._quiet_select = False  # 显示过程中选中状态变化引起的<<TreeviewSelect>>不通知
+        self._notified: Tuple[str, ...] = ()
+        self._row_metrics: Optional[Tuple[int, int]] = None  # (首行顶部位置, 行高)
+        self._init_virtual(yscrollcommand)
+        tk.Misc.bind(self, "<ButtonPress>", self._on_user_input, "+")
+        tk.Misc.bind(self, "<KeyPress>", self._on_user_input, "+")
+
+    def configure(self, cnf=None, **kw):
+        if isinstance(cnf, str) or (cnf is None and not kw):
+            return ttk.Treeview.configure(self, cnf)
+        kw = self._pop_yscrollcommand(dict(cnf or {}, **kw))
+        return ttk.Treeview.configure(self, kw) if kw else None
+
+    config = configure
+
+    def bind(self, sequence=None, func=None, add=None):
+        if sequence == "<<TreeviewSelect>>" and func is not None:
+            func = self._select_callback(func)
+        return ttk.Treeview.bind(self, sequence, func, add)
+
+    # ---------- 数据 ----------
+
+    def set_rows(self, rows: Sequence[Tuple[str, dict]]):
+        """
+        替换全部行（[(item id, insert()的选项)]），按item id保留选中行和滚动位置
+        已创建且仍然显示的行只在选项变化时更新，不重新创建
+        """
+        self._sync_selection()
+        previous = self._rows
+        self._iids = [iid for iid, _ in rows]
+        self._rows = {iid: kw for iid, kw in rows}
+        self._positions = None
+        for iid in ttk.Treeview.get_children(self, ""):
+            kw = self._rows.get(iid)
+            if kw is not None and kw != previous.get(iid):
+                ttk.Treeview.item(self, iid, **dict(_EMPTY_ROW, **kw))
+        if self._selected not in self._rows:
+            self._selected = None
+        self._clamp_top()
+        self._render()
+
+    def insert(self, parent, index, iid=None, **kw):
+        if parent:
+            raise tk.TclError("VirtualTreeview不支持子节点")
+        if iid is None:
+            iid = f"V{next(self._id_counter)}"
+        elif iid in self._rows:
+            raise tk.TclError(f'Item {iid} already exists')
+        row = len(self._iids) if index == tk.END else min(max(int(index), 0), len(self._iids))
+        kw.pop('open', None)
+        self._rows[iid] = kw
+        self._iids.insert(row, iid)
+        if self._positions is not None and row == len(self._iids) - 1:
+            self._positions[iid] = row
+        else:
+            self._positions = None
+        self._changed(row)
+        return iid
+
+    def delete(self, *items):
+        items = set(items)
+        if not items:
+            return
+        self._sync_selection()
+        if len(items) >= len(self._iids) and items.issuperset(self._iids):
+            first = 0
+            self._iids = []
+            self._rows.clear()
+            self._positions = {}
+        else:
+            first = min(self.index(item) for item in items)
+            self._iids = [iid for iid in self._iids if iid not in items]
+            for item in items:
+                del self._rows[item]
+            self._positions = None
+        if self._selected in items:
+            self._selected = None
+        self._clamp_top()
+        self._changed(first)
+
+    def get_children(self, item=None):
+        return tuple(self._iids) if not item else ()
+
+    def exists(self, item) -> bool:
+        return item in self._rows
+
+    def parent(self, item) -> str:
+        return ""
+
+    def index(self, item) -> int:
+        if self._positions is None:
+            self._positions = {iid: row for row, iid in enumerate(self._iids)}
+        try:
+            return self._positions[item]
+        except KeyError:
+            raise tk.TclError(f'Item {item} not found') from None
+
+    def item(self, item, option=None, **kw):
+        if item not in self._rows:
+            raise tk.TclError(f'Item {item} not found')
+        row = self._rows[item]
+        if kw:
+            kw.pop('open', None)
+            row.update(kw)
+            if ttk.Treeview.exists(self, item):
+                ttk.Treeview.item(self, item, **kw)
+            return None
+        if option is not None:
+            value = row.get(option, '')
+            return tuple(value) if option in ('values', 'tags') and value else value
+        return {'text': row.get('text', ''), 'image': row.get('image', ''),
+                'values': tuple(row.get('values', ())), 'open': False,
+                'tags': tuple(row.get('tags', ()))}
+
+    # ---------- 选中和定位 ----------
+
+    def selection(self):
+        selected = self._sync_selection()
+        return (selected,) if selected is not None else ()
+
+    def selection_set(self, *items):
+        if len(items) == 1 and isinstance(items[0], (list, tuple)):
+            items = items[0]
+        items = [item for item in items if item in self._rows]
+        self._quiet_select = False
+        self._selected = items[0] if items else None
+        # 选中的行还没有创建时清空控件的选中行，同样会发出<<TreeviewSelect>>
+        if self._selected is not None and ttk.Treeview.exists(self, self._selected):
+            ttk.Treeview.selection_set(self, self._selected)
+        else:
+            ttk.Treeview.selection_set(self, ())
+
+    def selection_remove(self, *items):
+        if len(items) == 1 and isinstance(items[0], (list, tuple)):
+            items = items[0]
+        if self._sync_selection() in items:
+            self.selection_set(())
+
+    def see(self, item):
+        self._see_row(self.index(item))
+
+    # ---------- 内部实现 ----------
+
+    def _count(self) -> int:
+        return len(self._iids)
+
+    def _changed(self, row: int):
+        """数据从第row行起发生变化：影响已创建的行时重新显示，否则只更新滚动条"""
+        start, end = self._window()
+        rendered = len(ttk.Treeview.get_children(self, ""))
+        if row < start + rendered or rendered < end - start:
+            self._render()
+        else:
+            self._notify_scroll()
+
+    def _sync_selection(self) -> Optional[str]:
+        native = ttk.Treeview.selection(self)
+        if native:
+            self._selected = native[0]
+        elif self._selected is not None and ttk.Treeview.exists(self, self._selected):
+            self._selected = None
+        return self._selected
+
+    def _selected_row(self) -> Optional[int]:
+        selected = self._sync_selection()
+        return self.index(selected) if selected is not None else None
+
+    def _move_selection(self, row: int):
+        iid = self._iids[row]
+        self.selection_set(iid)
+        ttk.Treeview.focus(self, iid)
+
+    def _render(self):
+        """只增删进出可见范围的行，仍可见的行保留（选中状态不变）"""
+        start, end = self._window()
+        wanted = self._iids[start:end]
+        current = ttk.Treeview.get_children(self, "")
+        if tuple(wanted[:len(current)]) == current:
+            # 常见情况：在末尾追加行
+            missing = wanted[len(current):]
+        else:
+            wanted_set = set(wanted)
+            stale = [iid for iid in current if iid not in wanted_set]
+            if stale:
+                if self._selected in stale:
+                    self._quiet_select = True
+                ttk.Treeview.delete(self, *stale)
+            current_set = set(current)
+            kept = [iid for iid in wanted if iid in current_set]
+            for position, iid in enumerate(kept):
+                ttk.Treeview.move(self, iid, "", position)
+            missing = None
+        if missing is None:
+            existing = set(ttk.Treeview.get_children(self, ""))
+            for position, iid in enumerate(wanted):
+                if iid not in existing:
+                    ttk.Treeview.insert(self, "", position, iid=iid, **self._rows[iid])
+        else:
+            for iid in missing:
+                ttk.Treeview.insert(self, "", tk.END, iid=iid, **self._rows[iid])
+        if (self._selected is not None and ttk.Treeview.exists(self, self._selected)
+                and self._selected not in ttk.Treeview.selection(self)):
+            self._quiet_select = True
+            ttk.Treeview.selection_set(self, self._selected)
+        ttk.Treeview.yview_moveto(self, 0)
+        self._notify_scroll()
+        if self._row_metrics is None and wanted:
+            # 行高要在控件显示后才能取得，取得后按实际高度重新计算可见行数
+            self.after_idle(self._on_resize)
+
+    def _measure(self) -> Optional[Tuple[int, int]]:
+        children = ttk.Treeview.get_children(self, "")
+        bbox = ttk.Treeview.bbox(self, children[0]) if children else ''
+        if bbox:
+            x, y, width, height = bbox
+            self._row_metrics = (y, height)
+        return self._row_metrics
+
+    def _on_user_input(self, event=None):
+        self._quiet_select = False
+
+    def _select_callback(self, func):
+        """显示过程中重新选中同一行引起的<<TreeviewSelect>>不重复通知"""
+        def callback(event):
+            selection = self.selection()
+            if self._quiet_select and selection == self._notified:
+                return None
+            self._notified = selection
+            return func(event)
+        return callback